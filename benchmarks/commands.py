@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Command benchmarks against the in-process mock Solr.
+
+Runs connect, list_collections, inventory, cache_report (one sample) and
+summarize_collection (server-side and sampled) against generated clusters
+of different shapes and records, per command: wall time, HTTP request
+count, bytes received and peak Python memory. Results can be saved and compared with an earlier run:
+
+    python benchmarks/commands.py --save baseline.json
+    python benchmarks/commands.py --compare baseline.json   # exits 1 on regression
+
+--stdlib-json runs with the stdlib JSON parser even when orjson is installed.
+"""
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_solr import MockSolr  # noqa: E402
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solr-assistant.py')
+
+# Cluster shapes: MockSolr keyword arguments
+SCENARIOS = {
+    'small': {'fields': 50, 'cores': 4},
+    'wide-schema': {'fields': 10000, 'dynamic_fields': 200},
+    'many-cores': {'collections': 250, 'cores': 1000},
+    'slow-network': {'fields': 200, 'cores': 16, 'latency': 0.02, 'jitter': 0.01},
+}
+
+COMMANDS = ['connect', 'collections', 'inventory', 'caches', 'summarize-server', 'summarize-sample']
+
+# Changes smaller than this are noise whatever their relative size
+NOISE_FLOOR = {'wall_ms': 2.0, 'requests': 0, 'bytes': 0, 'peak_kb': 64}
+
+def load_assistant():
+    spec = importlib.util.spec_from_file_location('solr_assistant', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_command(sa, url: str, command: str):
+    """Return (setup, action) callables for one command on a fresh connection"""
+    # In-memory metadata cache only, so every run starts cold
+    solr = sa.SolrConnection(cache=sa.MetadataCache(path=''))
+
+    def setup():
+        if command != 'connect':
+            solr.connect(url, quiet=True)
+
+    def action():
+        if command == 'connect':
+            ok = solr.connect(url)
+        elif command == 'collections':
+            ok = solr.list_collections()
+        elif command == 'inventory':
+            ok = solr.inventory()
+        elif command == 'caches':
+            ok = solr.cache_report(interval=0)
+        else:
+            ok = solr.summarize_collection('collection0', engine=command.split('-')[1])
+        solr.transport.close()
+        if not ok:
+            raise RuntimeError(f'{command} failed')
+
+    return setup, action
+
+def measure(sa, server: MockSolr, url: str, command: str, runs: int) -> dict:
+    times = []
+    requests = bytes_received = 0
+    for _ in range(runs):
+        setup, action = run_command(sa, url, command)
+        with redirect_stdout(io.StringIO()):
+            setup()
+            server.reset_stats()
+            start = time.perf_counter()
+            action()
+        times.append(time.perf_counter() - start)
+        requests, bytes_received = server.requests, server.bytes_sent
+
+    # Memory is measured on a separate run: tracemalloc slows allocation-heavy code
+    setup, action = run_command(sa, url, command)
+    with redirect_stdout(io.StringIO()):
+        setup()
+        tracemalloc.start()
+        action()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'wall_ms': statistics.median(times) * 1000,
+        'wall_min_ms': min(times) * 1000,
+        'requests': requests,
+        'bytes': bytes_received,
+        'peak_kb': peak / 1024,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Print changes against a saved run; returns the number of regressions"""
+    regressions = 0
+    print(f"\nCompared with {baseline.get('created', 'baseline')} (threshold {threshold:.0%}):")
+    for key, current in results['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            continue
+        changes = []
+        for metric in ('wall_ms', 'requests', 'bytes', 'peak_kb'):
+            before, after = previous[metric], current[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            flag = ''
+            # Wall time is noisy; require the minimum to regress as well
+            if (change > threshold and after - before > NOISE_FLOOR[metric] and
+                    (metric != 'wall_ms' or current['wall_min_ms'] > previous['wall_min_ms'] * (1 + threshold))):
+                flag = ' REGRESSION'
+                regressions += 1
+            if abs(change) >= 0.01:
+                changes.append(f"{metric} {change:+.0%}{flag}")
+        print(f"  {key:36} {', '.join(changes) or 'unchanged'}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='cluster shape to run (repeatable; default: all)')
+    parser.add_argument('--command', action='append', choices=COMMANDS,
+                        help='command to run (repeatable; default: all)')
+    parser.add_argument('--runs', type=int, default=5, help='timed runs per command (median is reported)')
+    parser.add_argument('--save', metavar='FILE', help='write results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare with results saved by --save')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change counted as a regression')
+    parser.add_argument('--stdlib-json', action='store_true', help='decode with the stdlib json module')
+    args = parser.parse_args()
+
+    if args.stdlib_json:
+        os.environ['SOLR_ASSISTANT_JSON'] = 'json'
+    sa = load_assistant()
+    results = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'json': sa.json_backend()[0],
+        'runs': args.runs,
+        'results': {},
+    }
+
+    print(f"{'scenario / command':36} {'wall ms':>9} {'min ms':>9} {'requests':>9} {'KB recv':>10} {'peak KB':>10}")
+    for scenario in args.scenario or list(SCENARIOS):
+        server = MockSolr(**SCENARIOS[scenario])
+        url = server.start()
+        try:
+            for command in args.command or COMMANDS:
+                key = f'{scenario}/{command}'
+                result = measure(sa, server, url, command, args.runs)
+                results['results'][key] = result
+                print(f"{key:36} {result['wall_ms']:9.1f} {result['wall_min_ms']:9.1f} {result['requests']:9} "
+                      f"{result['bytes'] / 1024:10.1f} {result['peak_kb']:10.0f}")
+        finally:
+            server.stop()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""JSON decoding benchmarks for large Solr responses.
+
+Decodes payloads generated by the mock Solr with each available strategy
+and records CPU time and peak Python memory:
+
+    requests    Response.json(): charset detection, text copy, stdlib parse
+    json        stdlib json.loads on the raw bytes
+    orjson      orjson.loads on the raw bytes (when orjson is installed)
+    trim        stdlib parse trimmed to the projection (project_json without orjson)
+    orjson-trim orjson parse trimmed to the projection (project_json with orjson)
+
+    python benchmarks/decoding.py
+    python benchmarks/decoding.py --payload metrics-full --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from commands import load_assistant  # noqa: E402
+from mock_solr import MockSolr  # noqa: E402
+
+# name: (MockSolr keyword arguments, path, parameters, projection)
+PAYLOADS = {
+    'metrics-full': ({'collections': 250, 'cores': 1000}, '/solr/admin/metrics', {},
+                     {'metrics': {'solr.jvm': True}}),
+    'schema-wide': ({'fields': 10000, 'dynamic_fields': 200, 'text_types': 60}, '/solr/collection0/schema', {},
+                    'SCHEMA_SUMMARY_PROJECTION'),
+    'luke-wide': ({'fields': 10000}, '/solr/collection0/admin/luke', {'numTerms': '0'}, None),
+    'select-sample': ({'fields': 2000}, '/solr/collection0/select', {'q': '*:*', 'rows': '100'}, None),
+}
+
+def build_payload(name: str) -> bytes:
+    options, path, q, _ = PAYLOADS[name]
+    status, payload = MockSolr(**options).route(path, q, {k: [v] for k, v in q.items()})
+    if status != 200:
+        raise RuntimeError(f'{name}: HTTP {status}')
+    return json.dumps(payload).encode()
+
+def decoders(sa, name: str) -> dict:
+    """Decoding strategies for one payload as callables taking the body"""
+    import requests
+    import requests.models
+
+    def via_requests(body):
+        response = requests.models.Response()
+        response._content = body
+        response.encoding = None
+        return response.json()
+
+    strategies = {'requests': via_requests, 'json': json.loads}
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    if orjson is not None:
+        strategies['orjson'] = orjson.loads
+    projection = PAYLOADS[name][3]
+    if isinstance(projection, str):
+        projection = getattr(sa.SolrConnection, projection)
+    if projection is not None:
+        strategies['trim'] = lambda body: sa.trim_json(json.loads(body), projection)
+        if orjson is not None:
+            strategies['orjson-trim'] = lambda body: sa.trim_json(orjson.loads(body), projection)
+    return strategies
+
+def measure(decode, body: bytes, runs: int) -> dict:
+    times = []
+    for _ in range(runs):
+        start = time.process_time()
+        decode(body)
+        times.append(time.process_time() - start)
+
+    tracemalloc.start()
+    decode(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'cpu_ms': statistics.median(times) * 1000, 'peak_kb': peak / 1024}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payload', action='append', choices=sorted(PAYLOADS),
+                        help='payload to decode (repeatable; default: all)')
+    parser.add_argument('--runs', type=int, default=10, help='timed runs per strategy (median is reported)')
+    args = parser.parse_args()
+
+    sa = load_assistant()
+    print(f"{'payload / strategy':32} {'KB':>9} {'cpu ms':>9} {'peak KB':>10} {'vs requests':>12}")
+    for name in args.payload or list(PAYLOADS):
+        body = build_payload(name)
+        baseline = None
+        for strategy, decode in decoders(sa, name).items():
+            result = measure(decode, body, args.runs)
+            baseline = baseline or result
+            speedup = baseline['cpu_ms'] / result['cpu_ms'] if result['cpu_ms'] else 0
+            memory = result['peak_kb'] / baseline['peak_kb'] if baseline['peak_kb'] else 0
+            print(f"{name + ' / ' + strategy:32} {len(body) / 1024:9.0f} {result['cpu_ms']:9.2f} "
+                  f"{result['peak_kb']:10.0f} {speedup:5.1f}x {memory:5.0%}")
+
+if __name__ == '__main__':
+    main()
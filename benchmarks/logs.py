@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Log analysis benchmark: scan throughput of 'logs' over a generated Solr log.
+
+Writes a synthetic solr.log of the given size (request, slow request, error
+with stack trace and housekeeping lines) and a solr_gc.log covering the same
+hours, then times the
+command in a fresh process three ways: cold (nothing indexed), indexed
+(everything reused from the index) and grown (the log appended to).
+
+    python benchmarks/logs.py [--size-mb 512] [--workers N] [--keep DIR]
+
+The index lives in a temporary home directory, so runs never touch
+~/.solr-assistant.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_solr import MockSolr  # noqa: E402
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solr-assistant.py')
+
+COLLECTIONS = ['products', 'orders', 'logs', 'users']
+HANDLERS = ['/select', '/select', '/select', '/update', '/get', '/export']
+QUERIES = ['q=*:*', 'q=title:phone&fq=price:[10+TO+100]', 'q=name:*ing&rows=20', 'q=id:12345',
+           'q=text:(red+AND+blue)&facet=true&facet.field=brand', 'q=category:books&sort=price+desc']
+ERRORS = [
+    ('org.apache.solr.common.SolrException', 'undefined field brand_s'),
+    ('org.apache.solr.common.SolrException', 'Cannot parse \'title:(\': Encountered "<EOF>"'),
+    ('java.io.IOException', 'Connection reset by peer'),
+]
+
+def log_lines(start: float, rng: random.Random):
+    """Endless Solr 9 log lines, one to ten milliseconds apart"""
+    now = start
+    while True:
+        now += rng.uniform(0.001, 0.01)
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)) + f'.{int(now * 1000) % 1000:03d}'
+        collection = rng.choice(COLLECTIONS)
+        core = f'{collection}_shard{rng.randint(1, 2)}_replica_n{rng.randint(1, 3)}'
+        mdc = f'[c:{collection} s:shard1 r:core_node2 x:{core} t:null-{rng.randint(1, 99999)}]'
+        roll = rng.random()
+        # Error bursts: one minute in sixty fails a lot
+        burst = int(now // 60) % 60 == 17
+        if roll < (0.2 if burst else 0.002):
+            kind, message = rng.choice(ERRORS)
+            yield (f'{stamp} ERROR (qtp123-{rng.randint(1, 200)}) {mdc} o.a.s.h.RequestHandlerBase '
+                   f'{kind}: {message}\n'
+                   f'\tat org.apache.solr.schema.IndexSchema.getField(IndexSchema.java:1463)\n'
+                   f'\tat org.apache.solr.search.SolrQueryParser.handleBareTokenQuery(SolrQueryParser.java:412)\n')
+        elif roll < 0.9:
+            handler = rng.choice(HANDLERS)
+            qtime = int(rng.lognormvariate(1.5, 1.2))
+            params = rng.choice(QUERIES) + '&wt=javabin&version=2'
+            if rng.random() < 0.3:
+                params += '&distrib=false&isShard=true&shard.url=http://node1:8983/solr/' + core
+            line = (f'o.a.s.c.S.Request [{core}]  webapp=/solr path={handler} params={{{params}}} '
+                    f'hits={rng.randint(0, 50000)} status=0 QTime={qtime}\n')
+            yield f'{stamp} INFO  (qtp123-{rng.randint(1, 200)}) {mdc} {line}'
+            if qtime > 1000:
+                yield f'{stamp} WARN  (qtp123-{rng.randint(1, 200)}) {mdc} o.a.s.c.S.SlowRequest slow: {line}'
+        else:
+            yield (f'{stamp} INFO  (commitScheduler-{rng.randint(1, 9)}) {mdc} o.a.s.u.DirectUpdateHandler2 '
+                   f'start commit{{,optimize=false,openSearcher=false,waitSearcher=true,expungeDeletes=false}}\n')
+
+def gc_lines(start: float, rng: random.Random):
+    """Endless JDK unified GC log pause lines"""
+    now = start
+    while True:
+        now += rng.uniform(0.05, 0.5)
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + f'.{int(now * 1000) % 1000:03d}+0000'
+        yield (f'[{stamp}][{now - start:.3f}s][info][gc] GC({int(now)}) Pause Young (Normal) (G1 Evacuation Pause) '
+               f'{rng.randint(200, 900)}M->{rng.randint(100, 300)}M(2048M) {rng.lognormvariate(2.5, 0.8):.3f}ms\n')
+
+def write_lines(path: str, lines, size: int, mode: str = 'w') -> str:
+    """Append lines until `size` bytes are written; returns the last line"""
+    written = 0
+    with open(path, mode) as f:
+        while written < size:
+            block = [next(lines) for _ in range(1000)]
+            f.writelines(block)
+            written += sum(map(len, block))
+    return block[-1]
+
+def write_gc_log(path: str, start: float, until: str, rng: random.Random):
+    """GC pauses covering the same time as solr.log, up to the `until` timestamp"""
+    with open(path, 'w') as f:
+        for line in gc_lines(start, rng):
+            if line[1:20].replace('T', ' ') > until:
+                break
+            f.write(line)
+
+def run(url: str, home: str, log_dir: str, workers) -> dict:
+    command = ['logs', log_dir] + (['--workers', str(workers)] if workers else [])
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, SCRIPT, '--url', url, '--timeout', '0', '--json'] + command,
+                            env=dict(os.environ, HOME=home), capture_output=True, check=True).stdout
+    wall = time.perf_counter() - start
+    return dict(json.loads(output)['result'], wall=wall)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=512, help='size of the generated solr.log')
+    parser.add_argument('--workers', type=int, help='scan processes (default: one per CPU)')
+    parser.add_argument('--keep', metavar='DIR', help='generate the logs into DIR and leave them there')
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='solr-logs-')
+    log_dir = args.keep or os.path.join(work, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    rng = random.Random(42)
+    start = time.time() - 86400
+    lines = log_lines(start, rng)
+    size = args.size_mb * 1024 * 1024
+    print(f"Generating {args.size_mb} MB of logs in {log_dir} ...")
+    last = write_lines(os.path.join(log_dir, 'solr.log'), lines, size)
+    write_gc_log(os.path.join(log_dir, 'solr_gc.log'), start, last[:19], rng)
+
+    server = MockSolr(fields=10, cores=1)
+    url = server.start()
+    try:
+        print(f"{'run':10} {'wall s':>8} {'scanned MB':>11} {'MB/s':>8}")
+        for name in ('cold', 'indexed', 'grown'):
+            if name == 'grown':
+                write_lines(os.path.join(log_dir, 'solr.log'), lines, size // 20, mode='a')
+            result = run(url, work, log_dir, args.workers)
+            scanned = result['scanned_bytes'] / 1024 ** 2
+            rate = scanned / result['elapsed'] if result['elapsed'] and scanned else 0
+            print(f"{name:10} {result['wall']:8.2f} {scanned:11.1f} {rate:8.0f}")
+    finally:
+        server.stop()
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+"""In-process stand-in for the Solr HTTP API, for benchmarks.
+
+Serves the endpoints solr-assistant calls (/admin/metrics, /admin/info/system,
+/admin/collections, /admin/cores, /schema, /select, /admin/luke, /config) from
+generated data. Payload sizes and response latency are configurable, and
+the server counts requests and bytes sent so callers can measure the
+traffic a command generates.
+
+    server = MockSolr(fields=10000, cores=1000, latency=0.005, jitter=0.002)
+    url = server.start()
+    ...
+    server.stop()
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# (suffix, field type, type class) cycled through when generating fields
+FIELD_KINDS = [
+    ('_s', 'string', 'solr.StrField'),
+    ('_t', 'text_general', 'solr.TextField'),
+    ('_i', 'pint', 'solr.IntPointField'),
+    ('_d', 'pdouble', 'solr.DoublePointField'),
+    ('_dt', 'pdate', 'solr.DatePointField'),
+    ('_b', 'boolean', 'solr.BoolField'),
+]
+
+class MockSolr:
+    """Generated Solr cluster served over HTTP from a background thread"""
+
+    def __init__(self, fields: int = 50, dynamic_fields: int = 10, collections: int = 3, cores: int = 4,
+                 docs: int = 1000, latency: float = 0.0, jitter: float = 0.0, cloud: bool = True, seed: int = 42,
+                 text_types: int = 20, unhealthy: int = 0, wildcard_latency: float = 0.0):
+        self.latency = latency
+        self.wildcard_latency = wildcard_latency
+        self.jitter = jitter
+        self.cloud = cloud
+        self.docs = docs
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+        self.collections = [f'collection{i}' for i in range(collections)]
+        self.cores = [f'{self.collections[i % collections]}_shard{i // collections + 1}_replica_n1'
+                      for i in range(cores)]
+        self._core_index = {core: i for i, core in enumerate(self.cores)}
+        # The first `unhealthy` cores report a recovering replica in CLUSTERSTATUS
+        self.unhealthy = set(self.cores[:unhealthy])
+        self.fields = [{'name': 'id', 'type': 'string', 'indexed': True, 'stored': True, 'docValues': True}]
+        self.fields += [
+            {'name': f'field{i}{suffix}', 'type': type_name, 'indexed': True, 'stored': True,
+             'docValues': type_name != 'text_general'}
+            for i, (suffix, type_name, _) in ((i, FIELD_KINDS[i % len(FIELD_KINDS)]) for i in range(fields))
+        ]
+        self.dynamic_fields = [
+            {'name': f'*_{i}{suffix}', 'type': type_name, 'indexed': True, 'stored': True}
+            for i, (suffix, type_name, _) in ((i, FIELD_KINDS[i % len(FIELD_KINDS)]) for i in range(dynamic_fields))
+        ]
+        self.field_types = [{'name': type_name, 'class': type_class} for _, type_name, type_class in FIELD_KINDS]
+        # Language-specific text types carry analyzer chains, like a stock configset
+        self.field_types += [
+            {'name': f'text_lang{i}', 'class': 'solr.TextField', 'positionIncrementGap': '100',
+             'indexAnalyzer': self._analyzer(i, query=False), 'queryAnalyzer': self._analyzer(i, query=True)}
+            for i in range(text_types)
+        ]
+        # Every text field feeds the catch-all field
+        self.copy_fields = [{'source': f['name'], 'dest': '_text_'}
+                            for f in self.fields if f['type'] == 'text_general']
+        self.metrics = self._build_metrics()
+        # Searches served drive the cache counters; a commit opens a new searcher that runs the listeners
+        self.searches = 0
+        self.searcher = 1
+        self.listeners = []
+
+    def _build_metrics(self) -> dict:
+        jvm = {
+            'memory.heap.used': 512 * 2 ** 20, 'memory.heap.max': 2048 * 2 ** 20, 'memory.heap.usage': 0.25,
+            'memory.non-heap.used': 128 * 2 ** 20, 'memory.total.used': 640 * 2 ** 20,
+            'os.name': 'Linux', 'os.availableProcessors': 8, 'os.systemLoadAverage': 1.5,
+            'os.openFileDescriptorCount': 800, 'os.maxFileDescriptorCount': 65536,
+            'gc.G1-Young-Generation.count': 120, 'gc.G1-Young-Generation.time': 900,
+            'system.properties': {'solr.log.dir': '/var/solr/logs', 'java.version': '17.0.8'},
+        }
+        registries = {'solr.jvm': jvm, 'solr.node': {'CONTAINER.cores.loaded': len(self.cores)}}
+        for core in self.cores:
+            collection, shard = core.split('_shard')
+            shard = shard.split('_')[0]
+            core_metrics = {
+                f'QUERY./select.{name}': {'count': 1000, 'meanRate': 1.5, 'p95_ms': 12.0, 'p99_ms': 30.0}
+                for name in ('requestTimes', 'errors', 'timeouts', 'clientErrors', 'serverErrors')
+            }
+            core_metrics.update({
+                'INDEX.sizeInBytes': self._core_size(core), 'SEARCHER.searcher.numDocs': self.docs,
+                'SEARCHER.searcher.maxDoc': self.docs + 10, 'SEARCHER.searcher.deletedDocs': 10,
+                'UPDATE.updateHandler.cumulativeAdds': {'count': self.docs},
+            })
+            registries[f'solr.core.{collection}.shard{shard}.replica_n1'] = core_metrics
+        return registries
+
+    def _cache_metrics(self) -> dict:
+        """Searcher cache and warmup metrics of every core; cache counters grow with the searches served"""
+        # Per search: lookups, hits, inserts, evictions; then entries held
+        rates = {'filterCache': (5, 2, 3, 2.5, 512), 'queryResultCache': (2, 1.9, 0.1, 0, 40),
+                 'documentCache': (3, 0.3, 2.7, 0, 512), 'perSegFilter': (0, 0, 0, 0, 0)}
+        out = {}
+        for cache, (lookups, hits, inserts, evictions, size) in rates.items():
+            # Traffic from before the server started, for caches that are used at all
+            base = 1 if lookups else 0
+            counters = {'lookups': base * 10000 + int(lookups * self.searches),
+                        'hits': base * 8000 + int(hits * self.searches),
+                        'inserts': base * 2000 + int(inserts * self.searches),
+                        'evictions': base * 10 + int(evictions * self.searches)}
+            metrics = dict(counters, size=size, warmupTime=5, ramBytesUsed=size * 2048,
+                           hitratio=counters['hits'] / counters['lookups'] if counters['lookups'] else 0.0)
+            metrics.update({f'cumulative_{name}': value for name, value in counters.items()})
+            out[f'CACHE.searcher.{cache}'] = metrics
+        out['SEARCHER.searcher.searcherName'] = f'Searcher@{self.searcher:x} main'
+        out['SEARCHER.searcher.warmupTime'] = 12 + 3 * sum(len(listener.get('queries', []))
+                                                            for listener in self.listeners)
+        return out
+
+    def _core_size(self, core: str) -> int:
+        return (self._core_index[core] % 97 + 1) * 2 ** 20
+
+    @staticmethod
+    def _analyzer(lang: int, query: bool) -> dict:
+        filters = [
+            {'class': 'solr.StopFilterFactory', 'words': f'lang/stopwords_{lang}.txt', 'ignoreCase': 'true'},
+            {'class': 'solr.LowerCaseFilterFactory'},
+            {'class': 'solr.SnowballPorterFilterFactory', 'language': f'Lang{lang}', 'protected': 'protwords.txt'},
+        ]
+        if query:
+            filters.insert(1, {'class': 'solr.SynonymGraphFilterFactory', 'synonyms': 'synonyms.txt',
+                               'ignoreCase': 'true', 'expand': 'true'})
+        else:
+            filters.append({'class': 'solr.RemoveDuplicatesTokenFilterFactory'})
+        return {'tokenizer': {'class': 'solr.StandardTokenizerFactory'}, 'filters': filters}
+
+    def doc(self, n: int) -> dict:
+        doc = {'id': str(n), '_version_': 1000 + n}
+        for i, field in enumerate(self.fields[1:], 1):
+            # Sparse documents: each field is present in roughly 60% of docs
+            if (n * 7 + i) % 5 < 3:
+                kind = field['type']
+                if kind == 'string':
+                    doc[field['name']] = f'value{(n + i) % 50}'
+                elif kind == 'text_general':
+                    doc[field['name']] = f'text for document {n} field {i}'
+                elif kind == 'boolean':
+                    doc[field['name']] = n % 2 == 0
+                elif kind == 'pdate':
+                    doc[field['name']] = f'2024-01-{n % 28 + 1:02d}T00:00:00Z'
+                else:
+                    doc[field['name']] = n * i
+        return doc
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def start(self, port: int = 0) -> str:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                mock._handle(self)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                mock._handle(self, self.rfile.read(length) if length else b'')
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='mock-solr', daemon=True).start()
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: bytes = None):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.random.uniform(0, self.jitter))
+        url = urlparse(handler.path)
+        params = parse_qs(url.query)
+        extra = self._query_cost(params.get('q', [''])[-1])
+        if extra:
+            time.sleep(extra)
+        status, payload = self.route(url.path, {k: v[-1] for k, v in params.items()}, params, body)
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+
+    def route(self, path: str, q: dict, params: dict, body: bytes = None):
+        """(status, payload) for a request; q holds the last value of each parameter"""
+        ok = {} if q.get('omitHeader') == 'true' else {'responseHeader': {'status': 0, 'QTime': 1, 'params': q}}
+        if path == '/solr/admin/metrics':
+            return 200, dict(ok, metrics=self._metrics(q, params))
+        if path == '/solr/admin/info/system':
+            return 200, dict(ok, lucene={'solr-spec-version': '9.4.0', 'lucene-spec-version': '9.8.0'},
+                             jvm={'version': '17.0.8'}, mode='solrcloud' if self.cloud else 'std')
+        if path == '/solr/admin/collections':
+            if not self.cloud:
+                return 400, {'error': {'msg': 'Solr instance is not running in SolrCloud mode.', 'code': 400}}
+            if q.get('action') == 'CLUSTERSTATUS':
+                return 200, dict(ok, cluster=self._cluster_status(q.get('collection')))
+            return 200, dict(ok, collections=self.collections)
+        if path == '/solr/admin/cores':
+            return 200, dict(ok, status={core: self._core_status(core, q.get('indexInfo') != 'false')
+                                         for core in self.cores if q.get('core') in (None, core)})
+
+        parts = path.strip('/').split('/')
+        if len(parts) < 3 or parts[0] != 'solr' or parts[1] not in self.collections + self.cores:
+            return 404, {'error': {'msg': 'Not Found', 'code': 404}}
+        handler = '/'.join(parts[2:])
+        if handler == 'schema' and body is not None:
+            return self._update_schema(json.loads(body), ok)
+        if handler == 'schema':
+            return 200, dict(ok, schema={'name': 'mock', 'uniqueKey': 'id', 'fields': self.fields,
+                                         'dynamicFields': self.dynamic_fields, 'fieldTypes': self.field_types,
+                                         'copyFields': self.copy_fields})
+        if handler == 'schema/zkversion':
+            return 200, dict(ok, zkversion=1)
+        if handler == 'schema/uniquekey':
+            return 200, dict(ok, uniqueKey='id')
+        if handler == 'admin/luke':
+            return 200, dict(ok, index={'numDocs': self.docs, 'maxDoc': self.docs + 10, 'deletedDocs': 10,
+                                        'segmentCount': 4},
+                             fields={f['name']: {'type': f['type'],
+                                                 'schema': 'ITS' if f['type'] == 'text_general' else 'I-S',
+                                                 'index': 'ITS' if f['type'] == 'text_general' else 'I-S',
+                                                 'docs': self.docs * 3 // 5, 'distinct': self.docs // 2}
+                                     for f in self.fields})
+        if handler == 'select':
+            self.searches += 1
+            return 200, self._select(q, params, ok)
+        if handler == 'update':
+            if q.get('commit') == 'true' and q.get('openSearcher') != 'false':
+                self.searcher += 1
+            return 200, ok
+        if handler == 'config/query':
+            caches = {cache: {'class': 'solr.CaffeineCache', 'size': '512', 'initialSize': '512',
+                              'autowarmCount': '0'} for cache in ('filterCache', 'queryResultCache')}
+            caches['documentCache'] = {'class': 'solr.CaffeineCache', 'size': '512', 'initialSize': '512'}
+            return 200, dict(ok, config={'query': caches})
+        if handler == 'config/listener':
+            return 200, dict(ok, config={'listener': self.listeners})
+        if handler == 'config' and body is not None:
+            for command, listener in json.loads(body).items():
+                self.listeners = [known for known in self.listeners if known.get('name') != listener.get('name')]
+                if command in ('add-listener', 'update-listener'):
+                    self.listeners.append(listener)
+            return 200, ok
+        return 404, {'error': {'msg': 'Not Found', 'code': 404}}
+
+    def _query_cost(self, query: str) -> float:
+        """Extra seconds a query takes: leading wildcards are slow, like on a real index"""
+        return self.wildcard_latency if re.search(r'(?:^|[\s(:])\*\w', query) else 0.0
+
+    def _debug(self, q: dict, params: dict) -> dict:
+        query_ms = 0.5 + self._query_cost(q.get('q', '')) * 1000
+        facet_ms = 3.0 if 'json.facet' in q or 'facet.field' in params else 0.0
+        components = ('query', 'facet', 'facet_module', 'mlt', 'highlight', 'stats', 'expand', 'terms', 'debug')
+        process = {name: {'time': 0.0} for name in components}
+        process['query']['time'] = query_ms
+        process['facet_module']['time'] = facet_ms
+        prepare = {name: {'time': 0.0} for name in components}
+        prepare['query']['time'] = 0.2
+        fqs = params.get('fq', [])
+        return {
+            'rawquerystring': q.get('q'), 'querystring': q.get('q'), 'QParser': 'LuceneQParser',
+            'parsedquery': q.get('q'), 'parsedquery_toString': q.get('q'),
+            'filter_queries': fqs, 'parsed_filter_queries': fqs,
+            'timing': {'time': query_ms + facet_ms + 0.2, 'prepare': dict(prepare, time=0.2),
+                       'process': dict(process, time=query_ms + facet_ms)},
+        }
+
+    def _update_schema(self, commands: dict, ok: dict):
+        """Apply a multi-command Schema API request atomically, like Solr"""
+        sections = {
+            'field': ('fields', 'name'), 'dynamic-field': ('dynamic_fields', 'name'),
+            'field-type': ('field_types', 'name'),
+        }
+        state = {attr: {item['name']: item for item in getattr(self, attr)} for attr, _ in sections.values()}
+        copies = list(self.copy_fields)
+        errors = []
+        for command, items in commands.items():
+            action, _, noun = command.partition('-')
+            for item in items if isinstance(items, list) else [items]:
+                if noun == 'copy-field':
+                    key = (item['source'], item['dest'])
+                    existing = [c for c in copies if (c['source'], c['dest']) == key]
+                    if action == 'add':
+                        copies.append(item)
+                    elif existing:
+                        copies.remove(existing[0])
+                    else:
+                        errors.append({command: item, 'errorMessages': [f'Copy field {key} does not exist.']})
+                    continue
+                table = state[sections[noun][0]]
+                exists = item['name'] in table
+                if (action == 'add') == exists:
+                    problem = 'already exists' if exists else 'does not exist'
+                    errors.append({command: item, 'errorMessages': [f"{noun} '{item['name']}' {problem}."]})
+                elif action == 'delete':
+                    del table[item['name']]
+                else:
+                    table[item['name']] = item
+        if errors:
+            return 400, dict(ok, errors=errors, error={'msg': 'error processing commands', 'code': 400})
+        for attr, _ in sections.values():
+            setattr(self, attr, list(state[attr].values()))
+        self.copy_fields = copies
+        return 200, ok
+
+    def _metrics(self, q: dict, params: dict) -> dict:
+        live = self._cache_metrics()
+        if 'key' in params:
+            out = {}
+            for key in params['key']:
+                registry, _, name = key.partition(':')
+                name = name.split(':')[0]
+                if registry.startswith('solr.core.') and registry in self.metrics and name in live:
+                    out[key] = live[name]
+                    continue
+                value = self.metrics.get(registry, {}).get(name)
+                if value is not None:
+                    out[key] = value
+            return out
+        group = q.get('group')
+        prefixes = q['prefix'].split(',') if q.get('prefix') else None
+        out = {}
+        for registry, values in self.metrics.items():
+            if group and not registry.startswith(f'solr.{group}'):
+                continue
+            if registry.startswith('solr.core.'):
+                values = dict(values, **live)
+            out[registry] = {k: v for k, v in values.items()
+                             if prefixes is None or any(k.startswith(p) for p in prefixes)}
+        return out
+
+    def _core_status(self, core: str, index_info: bool) -> dict:
+        status = {'name': core, 'instanceDir': f'/var/solr/data/{core}', 'uptime': 3600000}
+        if index_info:
+            status['index'] = {'numDocs': self.docs, 'maxDoc': self.docs + 10, 'deletedDocs': 10,
+                               'segmentCount': 4, 'sizeInBytes': self._core_size(core), 'current': True,
+                               'lastModified': f'2024-01-{self._core_index[core] % 28 + 1:02d}T12:00:00.000Z'}
+        return status
+
+    def _cluster_status(self, only) -> dict:
+        node = f'127.0.0.1:{self._server.server_port if self._server else 8983}_solr'
+        cores_by_collection = {}
+        for core in self.cores:
+            cores_by_collection.setdefault(core.split('_shard')[0], []).append(core)
+        collections = {}
+        for name in self.collections:
+            if only and name != only:
+                continue
+            shards = {}
+            for core in cores_by_collection.get(name, []):
+                shard = core.split('_')[-3]
+                shards[shard] = {'state': 'active', 'replicas': {f'core_node_{core}': {
+                    'core': core, 'base_url': f"http://{node.split('_')[0]}/solr", 'node_name': node,
+                    'state': 'recovering' if core in self.unhealthy else 'active', 'leader': 'true'}}}
+            collections[name] = {'shards': shards}
+        return {'live_nodes': [node], 'collections': collections}
+
+    def _facets(self, facet: dict, count: int) -> dict:
+        """JSON Facet results over `count` documents: query facets nest, terms and range facets get
+        evenly spread buckets, other facets are distinct counts"""
+        out = {'count': count}
+        types = {f['name']: f['type'] for f in self.fields}
+        for key, spec in facet.items():
+            if isinstance(spec, dict) and spec.get('type') == 'terms':
+                # Every field is present in about 60% of documents
+                present = count * 3 // 5
+                values = 2 if types.get(spec['field']) == 'boolean' else 50
+                buckets = [{'val': f'value{i}', 'count': present // values} for i in range(values)]
+                out[key] = {'buckets': buckets[:spec.get('limit', 10)], 'numBuckets': values,
+                            'missing': {'count': count - present}}
+                continue
+            if isinstance(spec, dict) and spec.get('type') == 'range':
+                if isinstance(spec['start'], str):
+                    values = [f'2024-01-{day:02d}T00:00:00Z' for day in range(1, 29)]
+                else:
+                    values = []
+                    value = spec['start']
+                    while value < spec['end'] and len(values) < 1000:
+                        values.append(value)
+                        value += spec['gap']
+                out[key] = {'buckets': [{'val': value, 'count': count * 3 // 5 // len(values)} for value in values]}
+                continue
+            if not isinstance(spec, dict) or spec.get('type') != 'query':
+                out[key] = count // 2
+                continue
+            match = re.match(r'_version_:\{"?(\d+)"? TO \*\]', spec['q'])
+            # Documents have _version_ 1000 + n; every other field is present in about 60% of them
+            matched = max(0, self.docs - (int(match.group(1)) - 999)) if match else count * 3 // 5
+            out[key] = self._facets(spec.get('facet', {}), matched)
+        return out
+
+    def _select(self, q: dict, params: dict, ok: dict) -> dict:
+        rows = int(q.get('rows', 10))
+        start = int(q.get('start', 0))
+        if q.get('sort', '').startswith('_version_ desc'):
+            docs = [self.doc(n) for n in range(self.docs - 1 - start, max(-1, self.docs - 1 - start - rows), -1)]
+        else:
+            docs = [self.doc(n) for n in range(start, min(start + rows, self.docs))]
+        if q.get('fl') and q['fl'] != '*':
+            names = {name.strip() for name in q['fl'].split(',')}
+            docs = [{k: v for k, v in doc.items() if k in names} for doc in docs]
+        response = dict(ok, response={'numFound': self.docs, 'start': start, 'docs': docs})
+        if 'responseHeader' in response and self._query_cost(q.get('q', '')):
+            response['responseHeader'] = dict(response['responseHeader'],
+                                              QTime=1 + int(self._query_cost(q['q']) * 1000))
+        if 'debug' in params:
+            response['debug'] = self._debug(q, params)
+        if 'json.facet' in q:
+            # Each filter query halves the matching documents
+            response['facets'] = self._facets(json.loads(q['json.facet']), self.docs >> len(params.get('fq', [])))
+        if 'stats.field' in params:
+            types = {f['name']: f['type'] for f in self.fields}
+            stats = {}
+            for spec in params['stats.field']:
+                name = spec.rsplit('}', 1)[-1]
+                if types.get(name) == 'pdate':
+                    stats[name] = {'min': '2024-01-01T00:00:00Z', 'max': '2024-01-28T00:00:00Z'}
+                else:
+                    stats[name] = {'min': 0.0, 'max': float(self.docs * 10)}
+            response['stats'] = {'stats_fields': stats}
+        return response
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Startup benchmark: time from launching solr-assistant to its first output.
+
+Each scenario is started as a fresh process several times; we record the
+time until the first byte arrives on stdout and until the process exits.
+
+    python benchmarks/startup.py [--url http://127.0.0.1:8983] [--runs 10] [--include-banner]
+
+Without --url the connected scenarios run against the in-process mock Solr.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_solr import MockSolr  # noqa: E402
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solr-assistant.py')
+
+def measure(argv, stdin_data: bytes = b''):
+    """Return (seconds to first stdout byte, seconds to exit) for one run"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, SCRIPT] + argv, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdin.write(stdin_data)
+    process.stdin.close()
+    first = process.stdout.read(1)
+    first_output = time.perf_counter() - start if first else None
+    process.stdout.read()
+    process.wait()
+    return first_output, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Solr URL for the connected scenarios (default: in-process mock Solr)')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--include-banner', action='store_true', help='also time the animated interactive start')
+    args = parser.parse_args()
+    
+    server = None
+    if not args.url:
+        server = MockSolr()
+        args.url = server.start()
+    
+    scenarios = [
+        ('--version', ['--version'], b''),
+        ('shell --no-banner', ['--no-banner'], b'skip\nexit\n'),
+        ('status --json', ['--url', args.url, 'status', '--json'], b''),
+        ('collections --json', ['--url', args.url, 'collections', '--json'], b''),
+    ]
+    if args.include_banner:
+        scenarios.append(('shell (banner)', [], b'skip\nexit\n'))
+    
+    print(f"{'scenario':22} {'first output (ms)':>28} {'exit (ms)':>28}")
+    print(f"{'':22} {'min':>8} {'median':>9} {'max':>9} {'min':>9} {'median':>9} {'max':>9}")
+    for name, argv, stdin_data in scenarios:
+        runs = [measure(argv, stdin_data) for _ in range(args.runs)]
+        firsts = [first * 1000 for first, _ in runs if first is not None] or [float('nan')]
+        exits = [total * 1000 for _, total in runs]
+        print(f"{name:22} {min(firsts):8.0f} {statistics.median(firsts):9.0f} {max(firsts):9.0f} "
+              f"{min(exits):9.0f} {statistics.median(exits):9.0f} {max(exits):9.0f}")
+    
+    if server is not None:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,59 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import sys
+import os
 import random
-import requests
+import argparse
+import importlib.util
 import json
-from typing import List, Dict, Optional
-from urllib.parse import urljoin, urlparse
+import contextvars
+import base64
+import bisect
+import calendar
+import csv
+import fnmatch
+import functools
+import glob
+import hashlib
+import heapq
+import math
+import mmap
+import queue
+import re
+import shlex
+import signal
+import sqlite3
+import socket
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
+
+__version__ = '0.2.0'
+
+def _lazy_import(name: str):
+    """Import a module on first attribute access, keeping it off the startup path"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# requests/urllib3 cost more than the rest of startup combined and asyncio is
+# only needed by the interactive loop
+requests = _lazy_import('requests')
+asyncio = _lazy_import('asyncio')
 
 class Colors:
     RED = '\033[91m'
@@ -144,224 +193,5320 @@ def animate_loading():
             time.sleep(0.05)
     print("\r" + " " * 30 + "\r", end="")  # Clear the line
 
-# TODO: We should ideally use a Python Solr client instead of making HTTP calls
-class SolrConnection:
-    """Manages connection to Apache Solr instance"""
+# Per-thread scratch space the timed connections write DNS/connect durations into
+_timing_local = threading.local()
+
+class CommandCancelled(KeyboardInterrupt):
+    """Raised inside a command that was cancelled or ran past its timeout.
     
-    def __init__(self):
-        self.base_url: Optional[str] = None
-        self.connected: bool = False
-        self.solr_info: Dict = {}
+    It derives from KeyboardInterrupt so commands that already stop cleanly
+    (and save their checkpoints) on Ctrl-C do the same when cancelled.
+    """
+
+class CancelScope:
+    """Cancellation flag and optional deadline shared by everything one command does"""
+    
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.reason: Optional[str] = None
+        self._raised = set()
+        self._connections = set()
+        self._lock = threading.Lock()
+    
+    def cancel(self, reason: str = 'cancelled'):
+        if self.reason is not None:
+            return
+        self.reason = reason
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except (AttributeError, OSError):
+                pass
+    
+    def attach(self, conn):
+        with self._lock:
+            self._connections.add(conn)
+    
+    def detach(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+    
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+    
+    def check(self):
+        # Raised once per thread: code that handles the interrupt may still clean up
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.cancel(f'timed out after {self.timeout:g}s')
+        if self.reason is not None and threading.get_ident() not in self._raised:
+            self._raised.add(threading.get_ident())
+            raise CommandCancelled(self.reason)
+
+_current_scope: contextvars.ContextVar = contextvars.ContextVar('solr_assistant_scope', default=None)
+
+class _ContextExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in the submitter's context, so a
+    command's CancelScope also covers the requests it fans out"""
+    
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def check_cancelled():
+    """Raise CommandCancelled if the command running in this context was cancelled"""
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.check()
+
+# Line reader for prompts inside a command; the REPL installs one that reads through its event loop
+_current_reader: contextvars.ContextVar = contextvars.ContextVar('solr_assistant_reader', default=None)
+
+def read_input(prompt: str) -> str:
+    """input() for commands: under the REPL, Ctrl-C or a timeout cancels the prompt with the command"""
+    reader = _current_reader.get()
+    if reader is None:
+        return input(prompt)
+    return reader(prompt)
+
+class Histogram:
+    """Log-bucketed histogram: constant memory, percentiles accurate to ~2.5%"""
+    
+    RATIO = 1.05
+    _LOG_RATIO = math.log(RATIO)
+    
+    def __init__(self, floor: float = 1e-6):
+        self.floor = floor
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def add(self, value: float):
+        bucket = int(math.log(max(value, self.floor) / self.floor) / self._LOG_RATIO)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
     
-    def connect(self, url: str) -> bool:
-        """Connect to Solr instance"""
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                # Geometric middle of the bucket, never above the largest value seen
+                return min(self.floor * self.RATIO ** (bucket + 0.5), self.max)
+        return self.max
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def merge(self, buckets: Dict[int, int], total: float, maximum: float):
+        """Add bucket counts recorded elsewhere with the same floor"""
+        for bucket, n in buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + n
+            self.count += n
+        self.total += total
+        self.max = max(self.max, maximum)
+    
+    def bins(self, edges: List[float]) -> List[int]:
+        """Counts below each edge (and above the last), to within one bucket's width"""
+        counts = [0] * (len(edges) + 1)
+        for bucket, n in self.buckets.items():
+            counts[bisect.bisect_right(edges, self.floor * self.RATIO ** (bucket + 0.5))] += n
+        return counts
+
+class Tracer:
+    """Span recorder behind the 'stats' command and trace export.
+    
+    Each span feeds a per-(category, name) latency histogram and, while
+    tracing is on, a bounded event buffer that can be written in Chrome
+    trace format (chrome://tracing, Perfetto). Disabled, span() hands back a
+    shared no-op context manager, so instrumented code pays one flag check.
+    """
+    
+    def __init__(self, max_events: int = 100000):
+        self.enabled = False
+        self.started: Optional[float] = None
+        self.stats: Dict[Tuple[str, str], Dict] = {}
+        self.events = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+    
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.started = time.time()
+    
+    def disable(self):
+        self.enabled = False
+    
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.events.clear()
+        self.started = time.time() if self.enabled else None
+    
+    def span(self, category: str, name: str, **args):
+        """Context manager timing a block; a no-op while tracing is disabled"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(category, name, args)
+    
+    @contextmanager
+    def _span(self, category: str, name: str, args: Dict):
+        start = time.perf_counter()
+        status = None
         try:
-            # Normalize URL
-            if not url.startswith(('http://', 'https://')):
-                url = f'http://{url}'
-            
-            parsed = urlparse(url)
-            if not parsed.port and not parsed.netloc.endswith(':8983'):
-                if ':' not in parsed.netloc:
-                    url = url.rstrip('/') + ':8983'
-            
-            self.base_url = url.rstrip('/')
-            
-            # Test connection
-            metrics_url = urljoin(self.base_url + '/', 'solr/admin/metrics')
-            
-            print(f"{Colors.CYAN}Connecting to Solr at {self.base_url}...{Colors.RESET}")
-            
-            response = requests.get(metrics_url, timeout=10)
-            response.raise_for_status()
-            
-            metrics_data = response.json()
-            self.solr_info = self._extract_info(metrics_data)
-            self.connected = True
-            
-            print(f"{Colors.GREEN}Successfully connected to Apache Solr!{Colors.RESET}\n")
-            self._display_info()
-            
-            return True
-            
-        except requests.exceptions.ConnectionError:
-            print(f"{Colors.RED}Failed to connect to {url}. Is Solr running?{Colors.RESET}")
-            return False
-        except requests.exceptions.Timeout:
-            print(f"{Colors.RED}Connection timeout to {url}{Colors.RESET}")
-            return False
-        except requests.exceptions.HTTPError as e:
-            print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
-            return False
-        except Exception as e:
-            print(f"{Colors.RED}Unexpected error: {e}{Colors.RESET}")
-            return False
+            yield args
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            self.record(category, name, start, time.perf_counter() - start, status=status, args=args)
     
-    def _extract_info(self, metrics_data: Dict) -> Dict:
-        """Extract Solr information from metrics"""
-        info = {}
+    def record(self, category: str, name: str, start: float, duration: float,
+               size: Optional[int] = None, status=None, args: Optional[Dict] = None):
+        """Add a finished span; start is a time.perf_counter() value"""
+        thread = threading.current_thread()
+        with self._lock:
+            stats = self.stats.get((category, name))
+            if stats is None:
+                stats = self.stats[(category, name)] = {
+                    'time': Histogram(), 'bytes': 0, 'sized': 0, 'statuses': {},
+                }
+            stats['time'].add(duration)
+            if size is not None:
+                stats['bytes'] += size
+                stats['sized'] += 1
+            if status is not None:
+                stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+            self._thread_names.setdefault(thread.ident, thread.name)
+            event = {
+                'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': thread.ident,
+                'ts': round((start - self._origin) * 1e6, 1), 'dur': round(duration * 1e6, 1),
+            }
+            extra = dict(args or {})
+            if size is not None:
+                extra['bytes'] = size
+            if status is not None:
+                extra['status'] = status
+            if extra:
+                event['args'] = extra
+            self.events.append(event)
+    
+    def export_chrome(self, path: str) -> int:
+        """Write buffered spans as a Chrome trace file; returns the number of spans"""
+        with self._lock:
+            events = list(self.events)
+            names = dict(self._thread_names)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                    for tid, name in names.items()]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, default=str)
+        return len(events)
+
+_NULL_SPAN = nullcontext({})
+
+TRACER = Tracer()
+if os.environ.get('SOLR_ASSISTANT_TRACE'):
+    TRACER.enable()
+
+def traced(category: str):
+    """Decorator recording each call of a function as a span"""
+    def decorate(func):
+        name = func.__name__.lstrip('_')
         
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            with TRACER.span(category, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class _TimedConnectionMixin:
+    """Records DNS and connect (TCP + TLS) time for every new pooled connection"""
+
+    def _new_conn(self):
+        # A separate lookup, timed on its own: the connection still resolves the
+        # host itself so create_connection can fall back across every address
+        # (e.g. ::1 then 127.0.0.1); the repeat is normally answered from the
+        # resolver's cache
+        start = time.perf_counter()
         try:
-            if 'metrics' in metrics_data:
-                metrics = metrics_data['metrics']
-                
-                # JVM metrics
-                jvm_metrics = metrics.get('solr.jvm', {})
-                if jvm_metrics:
-                    info['memory_heap_used'] = jvm_metrics.get('memory.heap.used')
-                    info['memory_heap_max'] = jvm_metrics.get('memory.heap.max')
-                    info['memory_heap_usage'] = jvm_metrics.get('memory.heap.usage')
-                    info['memory_non_heap_used'] = jvm_metrics.get('memory.non-heap.used')
-                    info['memory_non_heap_max'] = jvm_metrics.get('memory.non-heap.max')
-                    info['memory_total_used'] = jvm_metrics.get('memory.total.used')
-                    info['memory_total_committed'] = jvm_metrics.get('memory.total.committed')
-                    
-                    info['os_name'] = jvm_metrics.get('os.name')
-                    info['os_arch'] = jvm_metrics.get('os.arch')
-                    info['os_version'] = jvm_metrics.get('os.version')
-                    info['os_available_processors'] = jvm_metrics.get('os.availableProcessors')
-                    info['os_system_load_average'] = jvm_metrics.get('os.systemLoadAverage')
-                    info['os_process_cpu_load'] = jvm_metrics.get('os.processCpuLoad')
-                    info['os_system_cpu_load'] = jvm_metrics.get('os.systemCpuLoad')
-                    info['os_free_physical_memory'] = jvm_metrics.get('os.freePhysicalMemorySize')
-                    info['os_total_physical_memory'] = jvm_metrics.get('os.totalPhysicalMemorySize')
-                    info['os_open_file_descriptors'] = jvm_metrics.get('os.openFileDescriptorCount')
-                    info['os_max_file_descriptors'] = jvm_metrics.get('os.maxFileDescriptorCount')
-                    
-                    system_props = jvm_metrics.get('system.properties', {})
-                    if system_props:
-                        info['java_version'] = system_props.get('java.specification.version')
-                        info['java_vendor'] = system_props.get('java.vendor')
-                        info['java_vm_name'] = system_props.get('java.vm.name')
-                        info['solr_home'] = system_props.get('solr.solr.home')
-                        info['solr_log_dir'] = system_props.get('solr.log.dir')
-            
-            # Try to get version from system info
-            if 'version' not in info:
-                try:
-                    system_url = urljoin(self.base_url + '/', 'solr/admin/info/system')
-                    system_response = requests.get(system_url, timeout=5)
-                    system_data = system_response.json()
-                    
-                    if 'lucene' in system_data:
-                        lucene_info = system_data['lucene']
-                        if 'solr-spec-version' in lucene_info:
-                            info['version'] = lucene_info['solr-spec-version']
-                        if 'lucene-spec-version' in lucene_info:
-                            info['lucene_version'] = lucene_info['lucene-spec-version']
-                    
-                    if 'jvm' in system_data:
-                        jvm_info = system_data['jvm']
-                        if 'version' in jvm_info:
-                            info['java_version'] = jvm_info['version']
-                
-                except Exception:
-                    pass
-            
-        except Exception:
+            socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
             pass
-        
-        return info
+        _timing_local.dns = getattr(_timing_local, 'dns', 0.0) + (time.perf_counter() - start)
+        return super()._new_conn()
+
+    def connect(self):
+        start = time.perf_counter()
+        dns_before = getattr(_timing_local, 'dns', 0.0)
+        try:
+            super().connect()
+        finally:
+            dns_spent = getattr(_timing_local, 'dns', 0.0) - dns_before
+            elapsed = time.perf_counter() - start - dns_spent
+            _timing_local.connect = getattr(_timing_local, 'connect', 0.0) + elapsed
+            _timing_local.new_connections = getattr(_timing_local, 'new_connections', 0) + 1
+
+class _CancellablePoolMixin:
+    """Registers in-flight connections with the running command's CancelScope,
+    so cancelling it aborts a request that is still waiting on Solr"""
+
+    def _make_request(self, conn, *args, **kwargs):
+        scope = _current_scope.get()
+        if scope is None:
+            return super()._make_request(conn, *args, **kwargs)
+        scope.check()
+        scope.attach(conn)
+        try:
+            return super()._make_request(conn, *args, **kwargs)
+        finally:
+            scope.detach(conn)
+
+_timed_adapter_class = None
+
+def _get_timed_adapter_class():
+    """Build the HTTPAdapter whose pools hand out timed, cancellable connections.
     
-    def _display_info(self):
-        """Display Solr connection information"""
-        print(f"{Colors.CYAN}{'═' * 60}{Colors.RESET}")
-        print(f"{Colors.BOLD}{Colors.WHITE}  Apache Solr Instance Details{Colors.RESET}")
-        print(f"{Colors.CYAN}{'═' * 60}{Colors.RESET}")
-        
-        # URL
-        print(f"{Colors.GREEN}URL:{Colors.RESET} {Colors.WHITE}{self.base_url}{Colors.RESET}")
-        
-        # Solr Version
-        if self.solr_info.get('version'):
-            print(f"{Colors.GREEN}Solr Version:{Colors.RESET} {Colors.WHITE}{self.solr_info['version']}{Colors.RESET}")
+    Deferred to first use because subclassing urllib3 means importing it.
+    """
+    global _timed_adapter_class
+    if _timed_adapter_class is None:
+        from requests.adapters import HTTPAdapter
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
         
-        # Lucene Version
-        if self.solr_info.get('lucene_version'):
-            print(f"{Colors.GREEN}Lucene Version:{Colors.RESET} {Colors.WHITE}{self.solr_info['lucene_version']}{Colors.RESET}")
+        class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+            pass
         
-        # Java Version
-        if self.solr_info.get('java_version'):
-            print(f"{Colors.GREEN}Java Version:{Colors.RESET} {Colors.WHITE}{self.solr_info['java_version']}{Colors.RESET}")
+        class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+            pass
         
-        # JVM
-        if self.solr_info.get('java_vm_name'):
-            print(f"{Colors.GREEN}JVM:{Colors.RESET} {Colors.WHITE}{self.solr_info['java_vm_name']}{Colors.RESET}")
+        class _TimedHTTPConnectionPool(_CancellablePoolMixin, HTTPConnectionPool):
+            ConnectionCls = _TimedHTTPConnection
         
-        # OS
-        if self.solr_info.get('os_name'):
-            os_info = f"{self.solr_info['os_name']}"
-            if self.solr_info.get('os_arch'):
-                os_info += f" ({self.solr_info['os_arch']})"
-            if self.solr_info.get('os_version'):
-                os_info += f" - {self.solr_info['os_version']}"
-            print(f"{Colors.GREEN}OS:{Colors.RESET} {Colors.WHITE}{os_info}{Colors.RESET}")
+        class _TimedHTTPSConnectionPool(_CancellablePoolMixin, HTTPSConnectionPool):
+            ConnectionCls = _TimedHTTPSConnection
         
-        # CPU Cores
-        if self.solr_info.get('os_available_processors'):
-            print(f"{Colors.GREEN}CPU Cores:{Colors.RESET} {Colors.WHITE}{self.solr_info['os_available_processors']}{Colors.RESET}")
+        class _TimedHTTPAdapter(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                self.poolmanager.pool_classes_by_scheme = {
+                    'http': _TimedHTTPConnectionPool,
+                    'https': _TimedHTTPSConnectionPool,
+                }
         
-        # Heap Memory
-        if self.solr_info.get('memory_heap_used') and self.solr_info.get('memory_heap_max'):
+        _timed_adapter_class = _TimedHTTPAdapter
+    return _timed_adapter_class
+
+class SolrTransport:
+    """Shared keep-alive HTTP transport with pooling, retries and per-request timing"""
+
+    # (connect, read) timeouts in seconds per endpoint kind
+    DEFAULT_TIMEOUTS = {
+        'metrics': (3.05, 10),
+        'system': (3.05, 5),
+        'collections': (3.05, 10),
+        'cores': (3.05, 10),
+        'schema': (3.05, 10),
+        'select': (3.05, 10),
+        'cursor': (3.05, 60),
+        'luke': (3.05, 30),
+        'stats': (3.05, 30),
+        'export': (3.05, 300),
+        'update': (3.05, 120),
+        'schema-update': (3.05, 180),
+        'config': (3.05, 30),
+        'llm': (3.05, 60),
+    }
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16, retries: int = 3,
+                 backoff_factor: float = 0.3, timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 history_size: int = 200):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.timings = deque(maxlen=history_size)
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Lazily build the pooled session"""
+        with self._lock:
+            if self._session is None:
+                from urllib3.util.retry import Retry
+                retry = Retry(
+                    total=self.retries,
+                    connect=self.retries,
+                    read=self.retries,
+                    status=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD']),
+                    raise_on_status=False,
+                )
+                adapter = _get_timed_adapter_class()(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+
+    def get(self, url: str, endpoint: str = 'select', params: Optional[Dict] = None,
+            timeout: Optional[Tuple[float, float]] = None,
+            headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a Solr URL over the pooled session and record its timing"""
+        return self._request('GET', url, endpoint, params=params, timeout=timeout, headers=headers)
+
+    def post(self, url: str, endpoint: str = 'update', data=None, params: Optional[Dict] = None,
+             timeout: Optional[Tuple[float, float]] = None,
+             headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """POST to a Solr URL; non-idempotent, so only connection failures are retried"""
+        return self._request('POST', url, endpoint, params=params, timeout=timeout, headers=headers, data=data)
+
+    def _request(self, method: str, url: str, endpoint: str, params: Optional[Dict] = None,
+                 timeout: Optional[Tuple[float, float]] = None,
+                 headers: Optional[Dict[str, str]] = None, data=None) -> requests.Response:
+        timeout = self._timeout_for(endpoint, timeout)
+        _timing_local.dns = 0.0
+        _timing_local.connect = 0.0
+        _timing_local.new_connections = 0
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                url,
+                params=params,
+                headers=headers,
+                data=data,
+                timeout=timeout,
+                stream=True,
+            )
+        except requests.exceptions.RequestException as e:
+            if TRACER.enabled:
+                TRACER.record('http', endpoint, start, time.perf_counter() - start, status=type(e).__name__,
+                              args={'url': urlparse(url).path})
+            self._check_aborted()
+            raise
+        headers_at = time.perf_counter()
+        body = response.content
+        self._record(endpoint, response, len(body), start, headers_at)
+        return response
+
+    @contextmanager
+    def stream(self, url: str, endpoint: str = 'export', params: Optional[Dict] = None,
+               timeout: Optional[Tuple[float, float]] = None):
+        """GET a Solr URL without buffering the body; timing is recorded when the block exits"""
+        timeout = self._timeout_for(endpoint, timeout)
+        _timing_local.dns = 0.0
+        _timing_local.connect = 0.0
+        _timing_local.new_connections = 0
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                url,
+                params=params,
+                timeout=timeout,
+                stream=True,
+            )
+        except requests.exceptions.RequestException as e:
+            if TRACER.enabled:
+                TRACER.record('http', endpoint, start, time.perf_counter() - start, status=type(e).__name__,
+                              args={'url': urlparse(url).path})
+            self._check_aborted()
+            raise
+        headers_at = time.perf_counter()
+        # The pool only registers the connection until the headers arrive; keep it
+        # registered while the body streams so cancelling can still abort it
+        scope = _current_scope.get()
+        conn = getattr(response.raw, 'connection', None)
+        if scope is not None and conn is not None:
+            scope.attach(conn)
+        try:
+            self._check_aborted()
+            yield response
+        except Exception:
+            # A body cut short by the scope fails as a read error or a truncated document
+            self._check_aborted()
+            raise
+        finally:
+            if scope is not None and conn is not None:
+                scope.detach(conn)
+            response.close()
+            self._record(endpoint, response, int(response.raw.tell() if response.raw else 0), start, headers_at)
+
+    @staticmethod
+    def _check_aborted():
+        """Turn a request the running command's scope aborted or clamped into the cancellation"""
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.check()
+
+    def _timeout_for(self, endpoint: str, timeout: Optional[Tuple[float, float]]) -> Tuple[float, float]:
+        """Per-endpoint timeout, clamped to whatever is left of the running command's deadline"""
+        connect, read = timeout or self.timeouts.get(endpoint, self.DEFAULT_TIMEOUTS['select'])
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.check()
+            remaining = scope.remaining()
+            if remaining is not None:
+                connect, read = max(0.1, min(connect, remaining)), max(0.1, min(read, remaining))
+        return connect, read
+
+    def _record(self, endpoint: str, response: requests.Response, size: int, start: float, headers_at: float):
+        end = time.perf_counter()
+        dns = _timing_local.dns
+        connect = _timing_local.connect
+        self.timings.append({
+            'endpoint': endpoint,
+            'url': urlparse(response.url).path,
+            'status': response.status_code,
+            'bytes': size,
+            'dns': dns,
+            'connect': connect,
+            'ttfb': max(0.0, headers_at - start - dns - connect),
+            'body': end - headers_at,
+            'total': end - start,
+            'reused': _timing_local.new_connections == 0,
+        })
+        if TRACER.enabled:
+            TRACER.record('http', endpoint, start, end - start, size=size, status=response.status_code,
+                          args={'url': urlparse(response.url).path, 'ttfb_ms': round((headers_at - start) * 1000, 2),
+                                'new_connection': _timing_local.new_connections > 0})
+
+    def close(self):
+        """Close pooled connections; the session is rebuilt on next use"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+# Local state (profiler checkpoints, caches) lives here
+STATE_DIR = os.path.join(os.path.expanduser('~'), '.solr-assistant')
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+def sparkline(values: List[float]) -> str:
+    """Render a list of numbers as a unicode sparkline"""
+    if not values:
+        return ""
+    low = min(values)
+    high = max(values)
+    span = (high - low) or 1
+    return "".join(SPARK_CHARS[int((v - low) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as a compact h/m/s string"""
+    seconds = int(max(0, seconds))
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{secs:02d}s"
+    return f"{secs}s"
+
+def format_latency(seconds: float) -> str:
+    """Format a latency bound compactly: 5ms, 500ms, 2s"""
+    return f"{seconds * 1000:g}ms" if seconds < 1 else f"{seconds:g}s"
+
+def format_millis(value: float) -> str:
+    """Format milliseconds compactly: 4.2ms, 380ms, 12.5s"""
+    if value >= 10_000:
+        return f"{value / 1000:,.1f}s"
+    return f"{value:.1f}ms" if value < 10 else f"{value:,.0f}ms"
+
+def format_bytes(size: float) -> str:
+    """Format a byte count as B/KB/MB/GB"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+class HyperLogLog:
+    """HyperLogLog cardinality estimator with 2^p one-byte registers"""
+
+    def __init__(self, p: int = 12, registers: Optional[bytes] = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers else bytearray(self.m)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(estimate)
+
+class FieldProfiler:
+    """Running per-field coverage, cardinality and value-length statistics"""
+
+    # Value lengths are bucketed by powers of two: 0, 1, 2-3, 4-7, ... 32k+
+    LENGTH_BUCKETS = 17
+
+    def __init__(self):
+        self.docs_seen = 0
+        self.fields: Dict[str, Dict] = {}
+
+    def add(self, doc: Dict):
+        self.docs_seen += 1
+        for field_name, value in doc.items():
+            if field_name in ('_version_', '_root_'):
+                continue
+            stats = self.fields.get(field_name)
+            if stats is None:
+                stats = {
+                    'docs': 0,
+                    'values': 0,
+                    'total_length': 0,
+                    'hll': HyperLogLog(),
+                    'lengths': [0] * self.LENGTH_BUCKETS,
+                }
+                self.fields[field_name] = stats
+            stats['docs'] += 1
+            for item in (value if isinstance(value, list) else (value,)):
+                text = item if isinstance(item, str) else str(item)
+                length = len(text)
+                stats['values'] += 1
+                stats['total_length'] += length
+                stats['lengths'][min(length.bit_length(), self.LENGTH_BUCKETS - 1)] += 1
+                stats['hll'].add(text)
+
+    def to_state(self) -> Dict:
+        """Serialize counters so an interrupted run can be resumed"""
+        return {
+            'docs_seen': self.docs_seen,
+            'fields': {
+                name: {
+                    'docs': stats['docs'],
+                    'values': stats['values'],
+                    'total_length': stats['total_length'],
+                    'hll': base64.b64encode(bytes(stats['hll'].registers)).decode('ascii'),
+                    'lengths': stats['lengths'],
+                }
+                for name, stats in self.fields.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'FieldProfiler':
+        profiler = cls()
+        profiler.docs_seen = state.get('docs_seen', 0)
+        for name, stats in state.get('fields', {}).items():
+            profiler.fields[name] = {
+                'docs': stats['docs'],
+                'values': stats['values'],
+                'total_length': stats['total_length'],
+                'hll': HyperLogLog(registers=base64.b64decode(stats['hll'])),
+                'lengths': stats['lengths'],
+            }
+        return profiler
+
+class MetadataCache:
+    """Two-level cache for Solr metadata: an in-memory LRU backed by SQLite.
+    
+    Entries are keyed by full request URL, so they are naturally scoped by
+    base URL and collection. Stale entries are kept around so they can be
+    revalidated cheaply instead of re-downloaded.
+    """
+
+    # Seconds an entry is served without revalidation, per endpoint kind
+    DEFAULT_TTLS = {
+        'schema': 300,
+        'system': 3600,
+        'collections': 30,
+        'cores': 30,
+        'luke': 300,
+    }
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 128,
+                 max_disk_entries: int = 2048, ttls: Optional[Dict[str, float]] = None):
+        self.path = path if path is not None else os.path.join(STATE_DIR, 'cache.sqlite')
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._memory: OrderedDict = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        """Open the persistent store; persistence is disabled if that fails"""
+        if self._db is None and self.path:
             try:
-                used = int(self.solr_info['memory_heap_used'])
-                max_mem = int(self.solr_info['memory_heap_max'])
-                used_mb = used // (1024 * 1024)
-                max_mb = max_mem // (1024 * 1024)
-                usage_pct = self.solr_info.get('memory_heap_usage', 0) * 100
-                
-                usage_color = Colors.WHITE
-                if usage_pct > 80:
-                    usage_color = Colors.RED
-                elif usage_pct > 60:
-                    usage_color = Colors.YELLOW
-                
-                print(f"{Colors.GREEN}Heap Memory:{Colors.RESET} {usage_color}{used_mb}MB / {max_mb}MB ({usage_pct:.1f}%){Colors.RESET}")
-            except (ValueError, TypeError):
-                pass
-        
-        # Non-Heap Memory
-        if self.solr_info.get('memory_non_heap_used'):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, value TEXT, etag TEXT, last_modified TEXT, "
+                    "version INTEGER, fetched_at REAL, accessed_at REAL)"
+                )
+                db.commit()
+                self._db = db
+            except (sqlite3.Error, OSError):
+                self.path = None
+        return self._db
+
+    def ttl(self, kind: str) -> float:
+        return self.ttls.get(kind, 0)
+
+    def record(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry (fresh or stale) or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+            db = self._get_db()
+            if db is None:
+                return None
             try:
-                used = int(self.solr_info['memory_non_heap_used'])
-                used_mb = used // (1024 * 1024)
+                row = db.execute(
+                    "SELECT value, etag, last_modified, version, fetched_at FROM entries WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+                entry = {
+                    'value': json.loads(row[0]),
+                    'etag': row[1],
+                    'last_modified': row[2],
+                    'version': row[3],
+                    'fetched_at': row[4],
+                }
+            except (sqlite3.Error, ValueError):
+                return None
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key: str, value, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            version: Optional[int] = None):
+        now = time.time()
+        entry = {
+            'value': value,
+            'etag': etag,
+            'last_modified': last_modified,
+            'version': version,
+            'fetched_at': now,
+        }
+        with self._lock:
+            self._remember(key, entry)
+            db = self._get_db()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, json.dumps(value), etag, last_modified, version, now, now)
+                )
+                db.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def touch(self, key: str):
+        """Mark an entry as freshly revalidated"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                entry['fetched_at'] = now
+            db = self._get_db()
+            if db is None:
+                return
+            try:
+                db.execute("UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+    def invalidate(self, prefix: str) -> int:
+        """Drop every entry whose key starts with prefix; returns the number removed"""
+        with self._lock:
+            keys = [key for key in self._memory if key.startswith(prefix)]
+            for key in keys:
+                del self._memory[key]
+            removed = len(keys)
+            db = self._get_db()
+            if db is not None:
+                try:
+                    escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                    cursor = db.execute("DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',))
+                    db.commit()
+                    removed = max(removed, cursor.rowcount)
+                except sqlite3.Error:
+                    pass
+            return removed
+
+    def _remember(self, key: str, entry: Dict):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+class RingBuffer:
+    """Fixed-size, array-backed sample history"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._values = array('d', [0.0] * capacity)
+        self._next = 0
+        self.count = 0
+
+    def append(self, value: float):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def latest(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self._values[(self._next - 1) % self.capacity]
+
+    def values(self, last: Optional[int] = None) -> List[float]:
+        """Samples oldest-first, optionally only the most recent `last`"""
+        n = self.count if last is None else min(last, self.count)
+        start = (self._next - n) % self.capacity
+        return [self._values[(start + i) % self.capacity] for i in range(n)]
+
+class MetricsMonitor:
+    """Polls a small set of metric keys in the background into ring buffers"""
+
+    # label, metric name (relative to the registry), kind, aggregation across cores, scale
+    CORE_SERIES = [
+        ('Query req/s', 'QUERY./select.requestTimes:count', 'counter', 'sum', 1),
+        ('Query p95 (ms)', 'QUERY./select.requestTimes:p95_ms', 'gauge', 'max', 1),
+        ('Query p99 (ms)', 'QUERY./select.requestTimes:p99_ms', 'gauge', 'max', 1),
+        ('filterCache hit %', 'CACHE.searcher.filterCache:hitratio', 'gauge', 'avg', 100),
+        ('queryResultCache hit %', 'CACHE.searcher.queryResultCache:hitratio', 'gauge', 'avg', 100),
+        ('documentCache hit %', 'CACHE.searcher.documentCache:hitratio', 'gauge', 'avg', 100),
+        ('Update adds/s', 'UPDATE.updateHandler.cumulativeAdds:count', 'counter', 'sum', 1),
+    ]
+
+    def __init__(self, solr: 'SolrConnection', collection: Optional[str] = None,
+                 interval: float = 5.0, history: int = 720):
+        self.solr = solr
+        self.collection = collection
+        self.interval = interval
+        self.history = history
+        self.series: Dict[str, Dict] = {}
+        self.samples = 0
+        self.last_error: Optional[str] = None
+        self._previous: Dict[str, Tuple[float, float]] = {}
+        self._stop = threading.Event()
+        self._updated = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _add_series(self, label: str, keys: List[str], kind: str, aggregate: str, scale: float):
+        if keys:
+            self.series[label] = {
+                'keys': keys, 'kind': kind, 'aggregate': aggregate,
+                'scale': scale, 'buffer': RingBuffer(self.history),
+            }
+
+    def discover(self):
+        """Resolve GC collector names and core registries into an explicit key list"""
+        self.series = {}
+        self._add_series('Heap used (MB)', ['solr.jvm:memory.heap.used'], 'gauge', 'sum', 1 / (1024 * 1024))
+
+        gc_metrics = self.solr.fetch_metrics(group='jvm', prefix=['gc.']).get('metrics', {}).get('solr.jvm', {})
+        gc_names = sorted({name.rsplit('.', 1)[0] for name in gc_metrics if name.endswith('.count')})
+        self._add_series('GC collections/s', [f'solr.jvm:{name}.count' for name in gc_names], 'counter', 'sum', 1)
+        self._add_series('GC time (ms/s)', [f'solr.jvm:{name}.time' for name in gc_names], 'counter', 'sum', 1)
+
+        core_metrics = self.solr.fetch_metrics(group='core', prefix=['QUERY./select.requestTimes']).get('metrics', {})
+        registries = [
+            name for name in core_metrics
+            if not self.collection
+            or name == f'solr.core.{self.collection}'
+            or name.startswith(f'solr.core.{self.collection}.')
+        ]
+        for label, metric, kind, aggregate, scale in self.CORE_SERIES:
+            self._add_series(label, [f'{registry}:{metric}' for registry in registries], kind, aggregate, scale)
+
+    def poll(self):
+        """Take one sample of every series"""
+        keys = [key for series in self.series.values() for key in series['keys']]
+        values = self.solr.fetch_metrics(keys=keys).get('metrics', {})
+        now = time.monotonic()
+        for label, series in self.series.items():
+            raw = [values[key] for key in series['keys'] if isinstance(values.get(key), (int, float))]
+            if not raw:
+                continue
+            if series['aggregate'] == 'max':
+                value = max(raw)
+            elif series['aggregate'] == 'avg':
+                value = sum(raw) / len(raw)
+            else:
+                value = sum(raw)
+
+            if series['kind'] == 'counter':
+                previous = self._previous.get(label)
+                self._previous[label] = (now, value)
+                if previous is None or now <= previous[0]:
+                    continue
+                # Counters reset when a core reloads; treat that as zero activity
+                value = max(0.0, value - previous[1]) / (now - previous[0])
+            series['buffer'].append(value * series['scale'])
+
+        with self._updated:
+            self.samples += 1
+            self._updated.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                with self._updated:
+                    self._updated.notify_all()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.discover()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='solr-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    def wait_for_sample(self, seen: int, timeout: float) -> int:
+        """Block until a sample newer than `seen` arrives (or timeout); returns the sample count"""
+        with self._updated:
+            self._updated.wait_for(lambda: self.samples != seen or not self.running, timeout)
+            return self.samples
+
+    def render_lines(self, width: int = 40) -> List[str]:
+        scope = f"collection '{self.collection}'" if self.collection else "all cores"
+        lines = [
+            f"{Colors.BOLD}Solr Monitor{Colors.RESET} - {self.solr.base_url}, {scope}, every {self.interval:g}s",
+            f"  {'Series':24} {'Current':>10} {'Min':>10} {'Max':>10}  History",
+            "  " + "-" * (58 + width),
+        ]
+        for label, series in self.series.items():
+            history = series['buffer'].values(width)
+            if history:
+                current = history[-1]
+                lines.append(f"  {label:24} {current:10.1f} {min(history):10.1f} {max(history):10.1f}  "
+                             f"{Colors.CYAN}{sparkline(history)}{Colors.RESET}")
+            else:
+                lines.append(f"  {label:24} {'-':>10} {'-':>10} {'-':>10}")
+        status = f"{Colors.RED}Last poll failed: {self.last_error}{Colors.RESET}" if self.last_error \
+            else f"Samples: {self.samples}"
+        lines.append(f"  {status}  (Ctrl-C returns to the prompt; polling continues)")
+        return lines
+
+def field_kind(type_class: str) -> str:
+    """Classify a Solr field type class as text, string, date, numeric or boolean"""
+    if 'TextField' in type_class:
+        return 'text'
+    if 'Date' in type_class:
+        return 'date'
+    if 'Point' in type_class or 'Trie' in type_class:
+        return 'numeric'
+    if 'Bool' in type_class:
+        return 'boolean'
+    return 'string'
+
+class GlobMatcher:
+    """Matches names against Solr's single-'*' glob patterns ('*_s', 'attr_*', '*').
+
+    Patterns are compiled into suffix/prefix lookup tables probed longest
+    stem first, so a lookup costs one dict probe per distinct stem length
+    instead of a scan over every pattern. Like Solr, the longest pattern
+    wins and ties go to the one listed first.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._suffixes: Dict[str, List[int]] = {}
+        self._prefixes: Dict[str, List[int]] = {}
+        for i, pattern in enumerate(patterns):
+            if pattern.startswith('*'):
+                self._suffixes.setdefault(pattern[1:], []).append(i)
+            elif pattern.endswith('*'):
+                self._prefixes.setdefault(pattern[:-1], []).append(i)
+        self._lengths = sorted({len(stem) for stem in self._suffixes} | {len(stem) for stem in self._prefixes},
+                               reverse=True)
+
+    def match_all(self, name: str) -> List[int]:
+        """Indexes of every matching pattern, best match first"""
+        matches = []
+        for length in self._lengths:
+            if length > len(name):
+                continue
+            found = self._suffixes.get(name[len(name) - length:], []) + self._prefixes.get(name[:length], [])
+            matches.extend(sorted(found))
+        return matches
+
+    def match(self, name: str) -> Optional[int]:
+        """Index of the pattern Solr would apply to name, or None"""
+        for length in self._lengths:
+            if length > len(name):
+                continue
+            found = self._suffixes.get(name[len(name) - length:], []) + self._prefixes.get(name[:length], [])
+            if found:
+                return min(found)
+        return None
+
+class SchemaCatalog:
+    """Indexed view of a /schema response for instant lookups on very wide schemas.
+
+    Built once per schema version: fields and types by name, a sorted name
+    list for prefix search, a glob matcher for dynamic rules and the
+    copyField graph in both directions. The trigram index used by fuzzy
+    search is built on first use.
+    """
+
+    # Field properties shown in details, in display order
+    PROPERTIES = ('indexed', 'stored', 'docValues', 'multiValued', 'required', 'uninvertible', 'omitNorms')
+
+    def __init__(self, schema: Dict):
+        self.schema = schema
+        self.build_time: Optional[float] = None
+        self.unique_key = schema.get('uniqueKey')
+        self.fields = {f['name']: f for f in schema.get('fields', [])}
+        self.dynamic_fields = schema.get('dynamicFields', [])
+        self.types = {t['name']: t for t in schema.get('fieldTypes', [])}
+        self.dynamic = GlobMatcher([d['name'] for d in self.dynamic_fields])
+
+        # Case-insensitive prefix search over a sorted list
+        self._sorted = sorted((name.lower(), name) for name in self.fields)
+        self._sorted_keys = [key for key, _ in self._sorted]
+        self._trigrams: Optional[Dict[str, List[int]]] = None
+
+        self.fields_by_type: Dict[str, List[str]] = {}
+        for name, field in self.fields.items():
+            self.fields_by_type.setdefault(field.get('type', ''), []).append(name)
+        for rule in self.dynamic_fields:
+            self.fields_by_type.setdefault(rule.get('type', ''), []).append(rule['name'])
+
+        # copyField graph; glob sources are resolved per lookup through a matcher
+        self.copy_fields = schema.get('copyFields', [])
+        self.copies_to: Dict[str, List[Dict]] = {}
+        self.copies_from: Dict[str, List[Dict]] = {}
+        glob_sources = []
+        for copy in self.copy_fields:
+            self.copies_from.setdefault(copy['dest'], []).append(copy)
+            if '*' in copy['source']:
+                glob_sources.append(copy)
+            else:
+                self.copies_to.setdefault(copy['source'], []).append(copy)
+        self._glob_copies = glob_sources
+        self._copy_matcher = GlobMatcher([copy['source'] for copy in glob_sources])
+
+    def resolve(self, name: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """(definition, kind) for a field name: an explicit field, the dynamic
+        rule that applies to it, or (None, None)"""
+        if name in self.fields:
+            return self.fields[name], 'field'
+        index = self.dynamic.match(name)
+        if index is not None:
+            return self.dynamic_fields[index], 'dynamic'
+        return None, None
+
+    def copy_targets(self, name: str) -> List[Dict]:
+        """copyField rules with name as their source, including glob sources"""
+        targets = list(self.copies_to.get(name, []))
+        targets += [self._glob_copies[i] for i in self._copy_matcher.match_all(name)]
+        return targets
+
+    def copy_sources(self, name: str) -> List[Dict]:
+        """copyField rules that write into name"""
+        return self.copies_from.get(name, [])
+
+    def prefix_search(self, prefix: str, limit: int = 50) -> List[str]:
+        key = prefix.lower()
+        start = bisect.bisect_left(self._sorted_keys, key)
+        end = bisect.bisect_left(self._sorted_keys, key + '\uffff', start)
+        # Exact and shorter names first; 'field1_t' sorts after 'field10..' otherwise
+        matches = sorted((name for _, name in self._sorted[start:min(end, start + limit * 20)]),
+                         key=lambda name: (len(name), name))
+        return matches[:limit]
+
+    @staticmethod
+    def _grams(text: str) -> set:
+        padded = f'^{text.lower()}$'
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def fuzzy_search(self, text: str, limit: int = 20, cutoff: float = 0.6) -> List[Tuple[str, float]]:
+        """Field names similar to text, scored by difflib ratio"""
+        import difflib  # only needed here; kept off the startup path
+
+        if self._trigrams is None:
+            self._trigrams = {}
+            for i, (lower, _) in enumerate(self._sorted):
+                for gram in self._grams(lower):
+                    self._trigrams.setdefault(gram, []).append(i)
+
+        # Trigram overlap shortlists candidates; only those are scored exactly.
+        # Trigrams most names share ('fie' in field1..fieldN) do not change
+        # the ranking, so they are skipped when rarer ones exist.
+        postings = [self._trigrams.get(gram, ()) for gram in self._grams(text)]
+        informative = [posting for posting in postings if len(posting) <= len(self._sorted) // 2]
+        overlap = Counter()
+        for posting in informative or postings:
+            overlap.update(posting)
+        shortlist = heapq.nlargest(limit * 5, overlap.items(), key=lambda item: item[1])
+
+        key = text.lower()
+        scored = []
+        for i, _ in shortlist:
+            ratio = difflib.SequenceMatcher(None, key, self._sorted_keys[i]).ratio()
+            if ratio >= cutoff:
+                scored.append((self._sorted[i][1], ratio))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def search(self, text: str, limit: int = 30) -> List[Tuple[str, str]]:
+        """(name, how) matches for text: prefix first, then substring, then fuzzy"""
+        results = [(name, 'prefix') for name in self.prefix_search(text, limit)]
+        seen = {name for name, _ in results}
+        key = text.lower()
+        if len(results) < limit:
+            for lower, name in self._sorted:
+                if key in lower and name not in seen:
+                    results.append((name, 'contains'))
+                    seen.add(name)
+                    if len(results) >= limit:
+                        break
+        if len(results) < limit:
+            for name, ratio in self.fuzzy_search(text, limit):
+                if name not in seen:
+                    results.append((name, f'{ratio:.0%} similar'))
+                    if len(results) >= limit:
+                        break
+        return results
+
+    @staticmethod
+    def component_name(component: Dict) -> str:
+        """Short name of an analyzer component: 'solr.LowerCaseFilterFactory' -> 'LowerCase'"""
+        name = component.get('class') or component.get('name') or '?'
+        name = name.rsplit('.', 1)[-1]
+        if name.endswith('Factory'):
+            name = name[:-len('Factory')]
+        for suffix in ('CharFilter', 'Filter', 'Tokenizer'):
+            if name.endswith(suffix) and name != suffix:
+                name = name[:-len(suffix)]
+        return name
+
+    def analyzers(self, type_name: str) -> Dict[str, List[str]]:
+        """Analyzer chains of a field type: {'index'|'query'|'multiterm'|'all': [component, ...]}"""
+        field_type = self.types.get(type_name, {})
+        chains = {}
+        for key, label in (('analyzer', 'all'), ('indexAnalyzer', 'index'),
+                           ('queryAnalyzer', 'query'), ('multiTermAnalyzer', 'multiterm')):
+            analyzer = field_type.get(key)
+            if not analyzer:
+                continue
+            if analyzer.get('class') and not analyzer.get('tokenizer'):
+                chains[label] = [self.component_name(analyzer)]
+                continue
+            chain = [self.component_name(c) for c in analyzer.get('charFilters', [])]
+            if analyzer.get('tokenizer'):
+                chain.append(self.component_name(analyzer['tokenizer']))
+            chain += [self.component_name(f) for f in analyzer.get('filters', [])]
+            chains[label] = chain
+        return chains
+
+# Schema API commands in the order a plan applies them: copyFields are removed
+# before the fields they reference, types exist before fields use them, and
+# types are deleted only after the fields that used them
+SCHEMA_COMMANDS = (
+    'delete-copy-field',
+    'add-field-type', 'replace-field-type',
+    'add-field', 'replace-field', 'add-dynamic-field', 'replace-dynamic-field',
+    'add-copy-field',
+    'delete-field', 'delete-dynamic-field',
+    'delete-field-type',
+)
+
+def _normalize_schema_value(value):
+    """Schema values as comparable Python values: 'true' -> True, '100' -> 100"""
+    if isinstance(value, dict):
+        return {key: _normalize_schema_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize_schema_value(item) for item in value]
+    if isinstance(value, str):
+        if value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        if value.isdigit():
+            return int(value)
+    return value
+
+def plan_schema_changes(live: Dict, desired: Dict, prune: bool = False) -> List[Dict]:
+    """Schema API operations that turn the live schema into the desired one.
+
+    Each operation is {'command', 'name', 'body', 'previous'}; 'previous' is
+    the live definition it replaces or deletes. Definitions present in the
+    desired spec are added or replaced; live ones missing from it are only
+    deleted with prune, and never the uniqueKey or internal _fields_.
+    """
+    ops = []
+    protected = {live.get('uniqueKey')}
+
+    for section, noun in (('fieldTypes', 'field-type'), ('fields', 'field'), ('dynamicFields', 'dynamic-field')):
+        current = {item['name']: item for item in live.get(section, [])}
+        wanted = {item['name']: item for item in desired.get(section, [])}
+        for name, definition in wanted.items():
+            previous = current.get(name)
+            if previous is None:
+                ops.append({'command': f'add-{noun}', 'name': name, 'body': definition, 'previous': None})
+            elif _normalize_schema_value(previous) != _normalize_schema_value(definition):
+                ops.append({'command': f'replace-{noun}', 'name': name, 'body': definition, 'previous': previous})
+        if prune:
+            for name, previous in current.items():
+                internal = section == 'fields' and (name in protected or (name.startswith('_') and name.endswith('_')))
+                if name not in wanted and not internal:
+                    ops.append({'command': f'delete-{noun}', 'name': name, 'body': {'name': name},
+                                'previous': previous})
+
+    # A copy rule is identified by source and dest; there is no replace-copy-field,
+    # so a changed maxChars is planned as a delete followed by an add
+    current_copies = {(copy['source'], copy['dest']): copy for copy in live.get('copyFields', [])}
+    wanted_copies = {(copy['source'], copy['dest']): copy for copy in desired.get('copyFields', [])}
+    for key, copy in wanted_copies.items():
+        previous = current_copies.get(key)
+        if previous is not None:
+            if _normalize_schema_value(previous.get('maxChars')) == _normalize_schema_value(copy.get('maxChars')):
+                continue
+            ops.append({'command': 'delete-copy-field', 'name': f'{key[0]} → {key[1]}',
+                        'body': {'source': key[0], 'dest': key[1]}, 'previous': previous})
+        ops.append({'command': 'add-copy-field', 'name': f'{key[0]} → {key[1]}', 'body': copy, 'previous': previous})
+    if prune:
+        for key, copy in current_copies.items():
+            if key not in wanted_copies:
+                ops.append({'command': 'delete-copy-field', 'name': f'{key[0]} → {key[1]}',
+                            'body': {'source': copy['source'], 'dest': copy['dest']}, 'previous': copy})
+
+    ops.sort(key=lambda op: SCHEMA_COMMANDS.index(op['command']))
+    return ops
+
+def schema_batches(ops: List[Dict], batch_size: int) -> List[Dict]:
+    """Multi-command Schema API request bodies of at most batch_size operations.
+
+    Solr runs the commands of one request in document order and applies
+    them atomically, so each body lists its commands in plan order.
+    """
+    batches = []
+    for start in range(0, len(ops), batch_size):
+        body = {}
+        for op in ops[start:start + batch_size]:
+            body.setdefault(op['command'], []).append(op['body'])
+        batches.append(body)
+    return batches
+
+class RuleBasedBackend:
+    """Deterministic pattern-based translator, usable offline and in tests"""
+
+    name = 'rules'
+
+    # Words that carry no meaning once the patterns below have been applied
+    NOISE_WORDS = {
+        'show', 'documents', 'document', 'docs', 'results', 'records', 'items', 'with',
+        'where', 'whose', 'and', 'that', 'which', 'are', 'is', 'for', 'in', 'of', 'by', 'on',
+    }
+
+    # Politeness and filler, dropped before the patterns run unless they are part of a value
+    FILLER_WORDS = {
+        'please', 'me', 'can', 'could', 'would', 'you', 'i', 'want', 'to', 'see', 'the', 'a', 'an',
+        'all', 'find', 'get', 'give', 'list', 'search', 'any', 'some', 'just',
+    }
+
+    # The word after one of these is a value ("author is The Who", "price over 10")
+    VALUE_INTRODUCERS = {
+        'is', '=', ':', 'equals', 'of', 'between', 'and', 'than', 'over', 'above', 'after', 'under', 'below',
+        'before', 'least', 'most',
+    }
+
+    COMPARISONS = {
+        'over': '{{{v} TO *]', 'above': '{{{v} TO *]', 'after': '{{{v} TO *]',
+        'greater than': '{{{v} TO *]', 'more than': '{{{v} TO *]', 'at least': '[{v} TO *]',
+        'under': '[* TO {v}}}', 'below': '[* TO {v}}}', 'before': '[* TO {v}}}',
+        'less than': '[* TO {v}}}', 'at most': '[* TO {v}]',
+    }
+
+    @classmethod
+    def tokens(cls, utterance: str) -> List[Tuple[str, bool]]:
+        """Words of an utterance without filler, each flagged when it is (part of) a value.
+        
+        Sentence punctuation is only stripped from the end of a word, so
+        values like example.com or 4.5 stay whole; quoted phrases and
+        capitalised words following a value are values too.
+        """
+        words = []
+        previous, in_value = '', False
+        for word in re.findall(r'"[^"]*"|\S+', utterance):
+            if not word.startswith('"'):
+                word = word.rstrip('?!.,;')
+                if not word:
+                    continue
+            value = (word.startswith('"') or previous in cls.VALUE_INTRODUCERS or
+                     (in_value and word[:1].isupper()))
+            if word.lower() in cls.FILLER_WORDS and not value:
+                continue
+            words.append((word, value))
+            previous, in_value = word.lower(), value
+        return words
+
+    def translate(self, utterance: str, fields: Dict[str, Dict]) -> Dict:
+        aliases = self._aliases(fields)
+        field_re = '|'.join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True)) or r'(?!x)x'
+        F = rf'(?P<field>{field_re})'
+        value_re = r'(?P<value>"[^"]+"|\S+)'
+        # An unquoted value runs on over capitalised words: "author is The Who"
+        phrase_re = r'(?P<value>"[^"]+"|(?-i:[A-Z0-9]\S*(?:\s+[A-Z]\S*)*)|\S+)'
+        text = ' ' + ' '.join(word for word, _ in self.tokens(utterance)) + ' '
+        plan = {'q': '*:*', 'fq': [], 'sort': None, 'facet': [], 'fl': None, 'rows': 10}
+
+        def consume(pattern, handler):
+            nonlocal text
+            while True:
+                match = re.search(pattern, text, re.IGNORECASE)
+                if not match:
+                    return
+                handler(match)
+                text = text[:match.start()] + ' ' + text[match.end():]
+
+        def field_of(match):
+            return aliases[match.group('field').lower()]
+
+        def date_field():
+            dates = [name for name, info in fields.items() if info['kind'] == 'date']
+            preferred = [name for name in dates if any(w in name for w in ('date', 'time', 'created', 'modified'))]
+            return (preferred or dates or [None])[0]
+
+        def set_rows(match):
+            plan['rows'] = int(match.group('n'))
+
+        def relative_date(match):
+            name = date_field()
+            if name:
+                unit = match.group('unit').upper()
+                plan['fq'].append(f"{name}:[NOW-{match.group('n')}{unit}S TO NOW]")
+
+        def between(match):
+            name = field_of(match)
+            plan['fq'].append(f"{name}:[{self._value(match.group('low'), fields[name])} TO "
+                              f"{self._value(match.group('high'), fields[name])}]")
+
+        def compare(match):
+            name = field_of(match)
+            template = self.COMPARISONS[' '.join(match.group('op').lower().split())]
+            plan['fq'].append(f"{name}:" + template.format(v=self._value(match.group('value'), fields[name])))
+
+        def sort_by(match):
+            direction = (match.group('dir') or 'asc').lower()
+            plan['sort'] = f"{field_of(match)} {'desc' if direction.startswith('desc') else 'asc'}"
+
+        def extreme(match):
+            word = match.group('word').lower()
+            plan['sort'] = f"{field_of(match)} {'desc' if word in ('highest', 'largest', 'most', 'top') else 'asc'}"
+
+        def recency(match):
+            name = date_field()
+            if name:
+                plan['sort'] = f"{name} {'asc' if match.group(0).strip().lower() == 'oldest' else 'desc'}"
+
+        def facet(match):
+            for alias in re.findall(field_re, match.group(0), re.IGNORECASE):
+                name = aliases[alias.lower()]
+                if name not in plan['facet']:
+                    plan['facet'].append(name)
+
+        def projection(match):
+            plan['fl'] = ','.join(dict.fromkeys(
+                aliases[alias.lower()] for alias in re.findall(field_re, match.group(0), re.IGNORECASE)
+            ))
+
+        def equals(match):
+            name = field_of(match)
+            plan['fq'].append(f"{name}:{self._value(match.group('value'), fields[name], exact=True)}")
+
+        field_list = rf'{F}(?:(?:\s*,\s*|\s+and\s+|\s+)(?:{field_re}))*'
+        consume(r'\b(?:top|first|limit)\s+(?P<n>\d+)\b|\b(?P<m>\d+)\s+(?:results|docs|documents|rows)\b',
+                lambda m: plan.__setitem__('rows', int(m.group('n') or m.group('m'))))
+        consume(r'\b(?:in\s+)?(?:the\s+)?(?:last|past)\s+(?P<n>\d+)\s+(?P<unit>hour|day|week|month|year)s?\b',
+                relative_date)
+        consume(rf'\b{F}\s+(?:is\s+)?between\s+(?P<low>\S+)\s+and\s+(?P<high>\S+)', between)
+        consume(rf'\b{F}\s+(?:is\s+)?(?P<op>over|above|after|greater\s+than|more\s+than|at\s+least|'
+                rf'under|below|before|less\s+than|at\s+most)\s+{value_re}', compare)
+        consume(rf'\b(?:sort(?:ed)?|order(?:ed)?)\s+by\s+{F}(?:\s+(?P<dir>ascending|asc|descending|desc)\b)?', sort_by)
+        consume(rf'\b(?P<word>highest|largest|most|top|lowest|smallest|least)\s+{F}\b', extreme)
+        consume(r'\b(?:newest|latest|most\s+recent|oldest)\b', recency)
+        consume(rf'\b(?:count(?:ed)?|group(?:ed)?|break\s*down|breakdown|facet(?:ed)?)\s+(?:by|on)\s+{field_list}', facet)
+        consume(rf'\b(?:per|by)\s+{field_list}\s*$', facet)
+        consume(rf'\b(?:show|return|display)\s+(?:only\s+)?{field_list}\s+(?=where|with|whose|$)', projection)
+        consume(rf'\b{F}\b\s*(?:is|=|:|equals|of)\s*{phrase_re}', equals)
+
+        words = [word for word in re.findall(r'"[^"]+"|[^\s,]+', text) if word.lower() not in self.NOISE_WORDS]
+        if words:
+            plan['q'] = ' '.join(words)
+            plan['qf'] = [name for name, info in fields.items() if info['kind'] == 'text'][:10]
+        return plan
+
+    def _aliases(self, fields: Dict[str, Dict]) -> Dict[str, str]:
+        """Map spoken forms of each field name to the field"""
+        aliases = {}
+        for name in fields:
+            lowered = name.lower()
+            base = re.sub(r'_(?:t|txt|s|ss|i|is|l|ls|d|ds|f|fs|dt|dts|b|bs|p|pt)$', '', lowered)
+            for alias in (lowered, base, base.replace('_', ' '), base + 's'):
+                if alias and alias not in self.NOISE_WORDS:
+                    aliases.setdefault(alias, name)
+        return aliases
+
+    def _value(self, raw: str, info: Dict, exact: bool = False) -> str:
+        value = raw.strip('"')
+        if info['kind'] in ('numeric', 'boolean') or value in ('*', 'NOW'):
+            return value.lower() if info['kind'] == 'boolean' else value
+        if info['kind'] == 'date' and re.match(r'^\d{4}$', value):
+            return f"{value}-01-01T00:00:00Z"
+        if info['kind'] == 'text' and exact:
+            return f"({value})"
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+class LLMBackend:
+    """Translator backed by an OpenAI-compatible chat completions endpoint"""
+
+    name = 'llm'
+
+    PROMPT = (
+        "You translate questions about an Apache Solr collection into Solr request parameters. "
+        "Reply with one JSON object with keys: q (string), fq (list of strings), sort (string or null), "
+        "facet (list of field names), fl (comma separated string or null), rows (integer). "
+        "Only use these fields (name: kind):\n{fields}"
+    )
+
+    def __init__(self, url: str, model: str, api_key: Optional[str] = None, timeout: float = 60,
+                 transport: Optional[SolrTransport] = None):
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        # Sharing the connection's transport puts these calls under cancellation, stats and traces
+        self.transport = transport or SolrTransport(pool_connections=1, pool_maxsize=2)
+
+    @classmethod
+    def from_environment(cls, transport: Optional[SolrTransport] = None) -> Optional['LLMBackend']:
+        """Configured through SOLR_ASSISTANT_LLM_URL / _MODEL / _API_KEY"""
+        url = os.environ.get('SOLR_ASSISTANT_LLM_URL')
+        if not url:
+            return None
+        return cls(url, os.environ.get('SOLR_ASSISTANT_LLM_MODEL', 'gpt-4o-mini'),
+                   os.environ.get('SOLR_ASSISTANT_LLM_API_KEY'), transport=transport)
+
+    def translate(self, utterance: str, fields: Dict[str, Dict]) -> Dict:
+        field_list = '\n'.join(f"{name}: {info['kind']}" for name, info in sorted(fields.items()))
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        body = json.dumps({
+            'model': self.model,
+            'temperature': 0,
+            'response_format': {'type': 'json_object'},
+            'messages': [
+                {'role': 'system', 'content': self.PROMPT.format(fields=field_list)},
+                {'role': 'user', 'content': utterance},
+            ],
+        }).encode('utf-8')
+        response = self.transport.post(self.url, 'llm', data=body, headers=headers,
+                                       timeout=(min(3.05, self.timeout), self.timeout))
+        response.raise_for_status()
+        content = json_loads(response.content)['choices'][0]['message']['content']
+        return json.loads(content[content.index('{'):content.rindex('}') + 1])
+
+class QueryTranslator:
+    """Natural language to Solr query plans, with a plan cache in front of the backend.
+    
+    Plans are cached by (collection, schema version, normalized utterance), so
+    repeated or lightly reworded questions skip the backend entirely.
+    """
+
+    # Paraphrases folded onto one spelling so they share a cache entry
+    SYNONYMS = {
+        'descending': 'desc', 'ascending': 'asc', 'documents': 'docs', 'document': 'docs',
+        'results': 'docs', 'records': 'docs', 'items': 'docs', 'above': 'over', 'below': 'under',
+        'latest': 'newest', 'ordered': 'sorted', 'order': 'sort',
+    }
+
+    # Grammar words understood by the backends; these are case-folded, values are not
+    KEYWORDS = RuleBasedBackend.NOISE_WORDS | {
+        'top', 'first', 'limit', 'rows', 'last', 'past', 'hour', 'hours', 'day', 'days', 'week', 'weeks',
+        'month', 'months', 'year', 'years', 'between', 'over', 'above', 'after', 'greater', 'more',
+        'than', 'at', 'least', 'under', 'below', 'before', 'less', 'most', 'sort', 'sorted', 'order',
+        'ordered', 'asc', 'ascending', 'desc', 'descending', 'highest', 'largest', 'lowest', 'smallest',
+        'newest', 'latest', 'recent', 'oldest', 'count', 'counted', 'group', 'grouped', 'break', 'down',
+        'breakdown', 'facet', 'faceted', 'per', 'return', 'display', 'only', 'equals',
+    }
+
+    def __init__(self, backend, cache: MetadataCache):
+        self.backend = backend
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self.latencies = {'hit': deque(maxlen=200), 'miss': deque(maxlen=200)}
+
+    def normalize(self, utterance: str, fields: Dict[str, Dict]) -> str:
+        """Canonical form of an utterance, used only as the plan cache key.
+        
+        Drops the same filler the rule backend ignores and folds keywords
+        and field names; values are kept verbatim, so utterances that
+        differ in a value never share a plan.
+        """
+        vocabulary = set(self.KEYWORDS)
+        for name in fields:
+            vocabulary.add(name.lower())
+            vocabulary.update(part for part in name.lower().split('_') if len(part) > 2)
+        
+        kept = []
+        for word, value in RuleBasedBackend.tokens(utterance):
+            lowered = word.lower()
+            # Keywords and field names are case-insensitive; values keep their case
+            if not value and (lowered in vocabulary or lowered.rstrip('s') in vocabulary):
+                kept.append(self.SYNONYMS.get(lowered, lowered))
+            else:
+                kept.append(word)
+        return ' '.join(kept)
+
+    def translate(self, cache_prefix: str, schema_version: str, utterance: str,
+                  fields: Dict[str, Dict]) -> Tuple[Dict, bool, float]:
+        """Returns (plan, cache_hit, seconds)"""
+        start = time.perf_counter()
+        normalized = self.normalize(utterance, fields)
+        key = cache_prefix + '?' + urlencode({'v': schema_version, 'q': normalized})
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            elapsed = time.perf_counter() - start
+            self.hits += 1
+            self.latencies['hit'].append(elapsed)
+            return dict(entry['value']), True, elapsed
+
+        plan = self._validate(self.backend.translate(utterance, fields), fields)
+        self.cache.put(key, plan)
+        elapsed = time.perf_counter() - start
+        self.misses += 1
+        self.latencies['miss'].append(elapsed)
+        return dict(plan), False, elapsed
+
+    def _validate(self, plan: Dict, fields: Dict[str, Dict]) -> Dict:
+        """Keep only supported keys and fields that exist in the collection"""
+        fq = plan.get('fq') or []
+        clean = {
+            'q': str(plan.get('q') or '*:*'),
+            'fq': [str(f) for f in (fq if isinstance(fq, list) else [fq])],
+            'sort': plan.get('sort') or None,
+            'facet': [f for f in (plan.get('facet') or []) if f in fields],
+            'fl': plan.get('fl') or None,
+            'rows': max(0, min(int(plan.get('rows') or 10), 1000)),
+        }
+        qf = [f for f in (plan.get('qf') or []) if f in fields]
+        if qf:
+            clean['qf'] = qf
+        return clean
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total * 100 if total else 0.0
+
+def stream_json_docs(chunks, meta: Dict):
+    """Yield the objects of a JSON response's "docs" array from a stream of text chunks.
+    
+    Only one document (plus the unread tail of the current chunk) is held in
+    memory at a time, so arbitrarily large /export bodies can be consumed.
+    numFound is stored into `meta` once the header has been read. A body
+    that ends before the closing bracket of "docs" raises ValueError, so a
+    truncated stream is never mistaken for a complete one.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    in_docs = False
+    chunks = iter(chunks)
+    
+    while True:
+        if not in_docs:
+            marker = buffer.find('"docs"')
+            bracket = buffer.find('[', marker) if marker >= 0 else -1
+            if bracket >= 0:
+                found = re.search(r'"numFound"\s*:\s*(\d+)', buffer[:marker])
+                if found:
+                    meta['numFound'] = int(found.group(1))
+                in_docs = True
+                pos = bracket + 1
+                continue
+        else:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer):
+                if buffer[pos] == ']':
+                    return
+                try:
+                    doc, end = decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    doc = None
+                if doc is not None:
+                    pos = end
+                    yield doc
+                    continue
+        
+        chunk = next(chunks, None)
+        if chunk is None:
+            if not in_docs:
+                raise ValueError(f'response has no "docs" array: {buffer[:200]!r}')
+            raise ValueError(f'response ended inside "docs", before its closing bracket: {buffer[pos:pos + 100]!r}')
+        # Drop already-decoded documents before appending more text
+        if in_docs and pos > 65536:
+            buffer = buffer[pos:]
+            pos = 0
+        buffer += chunk
+
+@functools.lru_cache(maxsize=None)
+def json_backend() -> Tuple[str, object]:
+    """(name, loads) of the JSON parser in use: orjson when installed, else the stdlib.
+
+    SOLR_ASSISTANT_JSON=json forces the stdlib parser, e.g. for comparisons.
+    """
+    if os.environ.get('SOLR_ASSISTANT_JSON', '').lower() != 'json':
+        try:
+            import orjson
+            return 'orjson', orjson.loads
+        except ImportError:
+            pass
+    return 'json', json.loads
+
+def json_loads(data):
+    """Parse a complete JSON document from bytes or str"""
+    return json_backend()[1](data)
+
+def trim_json(value, spec):
+    """Reduce an already-parsed JSON value to the parts named by a projection spec"""
+    if isinstance(spec, dict) and isinstance(value, dict):
+        wildcard = spec.get('*')
+        return {key: trim_json(item, spec.get(key, wildcard)) for key, item in value.items()
+                if spec.get(key, wildcard) is not None}
+    if isinstance(spec, list) and isinstance(value, list):
+        return [trim_json(item, spec[0]) for item in value]
+    return value
+
+def project_json(data, spec: Dict):
+    """Parse only the parts of a JSON document named by spec.
+
+    spec mirrors the document: a dict names the keys to keep ('*' matches
+    any key), True keeps a value whole and a one-element list applies its
+    spec to every array element, e.g.
+
+        {'metrics': {'solr.jvm': True}}
+        {'schema': {'fields': True, 'fieldTypes': [{'name': True, 'class': True}]}}
+
+    The body is parsed whole and then trimmed, so only the projection is
+    kept and cached. Parsing is faster than stepping over the skipped
+    values in Python, with orjson and with the stdlib parser alike.
+    """
+    return trim_json(json_loads(data), spec)
+
+class ExportWriter:
+    """Streaming JSONL / CSV / Parquet writer that never holds more than one batch"""
+
+    FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+    def __init__(self, path: str, fmt: str, columns: Optional[List[str]] = None, append: bool = False):
+        self.path = path
+        self.fmt = fmt
+        self.columns = columns
+        self.dropped_fields = set()
+        self._parquet_writer = None
+        if fmt == 'parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+            self._pa = pyarrow
+            self._pq = pyarrow.parquet
+            self._file = None
+        else:
+            self._file = open(path, 'a' if append else 'w', newline='' if fmt == 'csv' else None,
+                              encoding='utf-8', buffering=1024 * 1024)
+            self._csv = csv.writer(self._file) if fmt == 'csv' else None
+            self._header_written = append
+
+    @staticmethod
+    def _cell(value):
+        if value is None:
+            return None
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def write(self, docs: List[Dict]):
+        if not docs:
+            return
+        if self.fmt == 'jsonl':
+            self._file.write(''.join(json.dumps(doc, ensure_ascii=False) + '\n' for doc in docs))
+            return
+
+        # Columnar formats need a fixed column set; take it from the first batch if not given
+        if self.columns is None:
+            self.columns = list(dict.fromkeys(key for doc in docs for key in doc if key != '_version_'))
+        for doc in docs:
+            self.dropped_fields.update(key for key in doc if key not in self.columns and key != '_version_')
+
+        if self.fmt == 'csv':
+            if not self._header_written:
+                self._csv.writerow(self.columns)
+                self._header_written = True
+            self._csv.writerows([self._cell(doc.get(column)) for column in self.columns] for doc in docs)
+        else:
+            # Values are written as strings so batches always share one schema
+            table = self._pa.table({
+                column: self._pa.array(
+                    [None if doc.get(column) is None else str(self._cell(doc.get(column))) for doc in docs],
+                    type=self._pa.string()
+                )
+                for column in self.columns
+            })
+            if self._parquet_writer is None:
+                self._parquet_writer = self._pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+
+    def flush(self) -> int:
+        """Flush buffered output and return the current file size"""
+        if self._file is not None:
+            self._file.flush()
+            return self._file.tell()
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def iter_file_records(path: str, fmt: str):
+    """Yield (document, size in bytes) from a JSONL or CSV file.
+    
+    The file is memory-mapped and consumed line by line, so neither the
+    file nor the parsed documents are ever held in memory as a whole.
+    Unparseable input raises ValueError naming the line of the file.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines = iter(mapped.readline, b'')
+            if fmt == 'jsonl':
+                for number, line in enumerate(lines, 1):
+                    if line.strip():
+                        try:
+                            doc = json.loads(line)
+                        except ValueError as e:
+                            raise ValueError(f"line {number}: {getattr(e, 'msg', None) or e}") from e
+                        yield doc, len(line)
+                return
+            
+            sizes = []
+            
+            def decoded():
+                for number, line in enumerate(lines, 1):
+                    sizes.append(len(line))
+                    try:
+                        yield line.decode('utf-8')
+                    except UnicodeDecodeError as e:
+                        raise ValueError(f"line {number}: not valid UTF-8 ({e.reason})") from e
+            
+            reader = csv.reader(decoded())
+            try:
+                header = next(reader, None)
+            except csv.Error as e:
+                raise ValueError(f"line {reader.line_num}: {e}") from e
+            if header is None:
+                return
+            while True:
+                try:
+                    row = next(reader, None)
+                except csv.Error as e:
+                    raise ValueError(f"line {reader.line_num}: {e}") from e
+                if row is None:
+                    break
+                size = sum(sizes)
+                sizes.clear()
+                doc = {column: value for column, value in zip(header, row) if value != ''}
+                if doc:
+                    yield doc, size
+
+# Request log line: ... path=/select params={q=...&fq=...} hits=12 status=0 QTime=5
+_LOG_REQUEST = re.compile(r'\bpath=(\S+)\s+params=\{(.*)\}(?:\s+(?:hits|status|QTime)=|\s*$)')
+# Parameters that only make sense for the original request, or for shard sub-requests
+_REPLAY_DROP_PARAMS = {'wt', 'version', '_', 'NOW', 'isShard', 'distrib', 'shards', 'shard.url', 'shards.purpose',
+                       'rid', '_stateVer_', 'ids', 'debug', 'debugQuery', 'echoParams', 'omitHeader'}
+
+def iter_query_file(path: str):
+    """Yield request parameters ({name: [values]}) for each query captured in a file.
+    
+    Lines may be Solr request log lines (params={...}; shard sub-requests
+    and non-search paths are skipped), JSON objects of parameters, URL
+    query strings, or bare q strings.
+    """
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            match = _LOG_REQUEST.search(line)
+            if match:
+                if not match.group(1).endswith(('/select', '/query')):
+                    continue
+                params = {}
+                for name, value in parse_qsl(match.group(2), keep_blank_values=True):
+                    params.setdefault(name, []).append(value)
+                if params.get('isShard') == ['true'] or params.get('distrib') == ['false']:
+                    continue
+            elif line.startswith('{'):
+                try:
+                    raw = json.loads(line)
+                except ValueError:
+                    continue
+                params = {name: [str(v) for v in value] if isinstance(value, list) else [str(value)]
+                          for name, value in raw.items()}
+            elif re.match(r'^[\w.]+=', line):
+                params = {}
+                for name, value in parse_qsl(line, keep_blank_values=True):
+                    params.setdefault(name, []).append(value)
+            else:
+                params = {'q': [line]}
+            params = {name: values for name, values in params.items() if name not in _REPLAY_DROP_PARAMS}
+            if params:
+                yield params
+
+_SHAPE_QUOTED = re.compile(r'"(?:[^"\\]|\\.)*"')
+_SHAPE_RANGE = re.compile(r'([\[{])\s*\S+\s+TO\s+\S+?\s*([\]}])')
+_SHAPE_FIELD_VALUE = re.compile(r'([\w.]+):(?![\[{(?"])([^\s()]+)')
+_SHAPE_BARE_TERM = re.compile(r'(?<![\w.:*?"\]}])(?!(?:AND|OR|NOT|TO)\b)[^\s():+\-"\[\]{}^~*?][^\s():"\[\]{}^~]*(?![\w.]*:)')
+
+def query_shape(query: str) -> str:
+    """Reduce a query string to its structure: literal values become '?'.
+    
+    Wildcards stay visible (title:?* and title:*? are different shapes)
+    because they decide the cost; local params are kept as written.
+    """
+    if query.startswith('{!') and '}' in query:
+        # Function and other local-params queries: only numbers are literals
+        end = query.index('}') + 1
+        return query[:end] + re.sub(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])', '?', query[end:])
+    
+    def value(match):
+        literal = match.group(2)
+        if literal == '*':
+            return match.group(0)
+        lead = '*' if literal.startswith('*') else ''
+        trail = '*' if literal.endswith('*') and len(literal) > 1 else ''
+        fuzzy = '~' if '~' in literal else ''
+        return f"{match.group(1)}:{lead}?{trail}{fuzzy}"
+    
+    shape = _SHAPE_QUOTED.sub('?', query)
+    shape = _SHAPE_RANGE.sub(r'\1? TO ?\2', shape)
+    shape = _SHAPE_FIELD_VALUE.sub(value, shape)
+    shape = _SHAPE_BARE_TERM.sub('?', shape)
+    # Free-text queries differ only in their number of words
+    shape = re.sub(r'\?(?:\s+\?)+', '?…', shape)
+    return ' '.join(shape.split())
+
+def request_shape(params: Dict[str, List[str]]) -> str:
+    """Shape of a whole search request: query shapes plus the parameters that change its cost"""
+    parts = [f"q={query_shape(params['q'][0])}" if params.get('q') else 'q=(none)']
+    parts += sorted(f"fq={query_shape(fq)}" for fq in params.get('fq', []))
+    for name in ('defType', 'sort', 'rows', 'group.field', 'facet.field', 'facet.pivot', 'stats.field'):
+        for value in params.get(name, []):
+            parts.append(f"{name}={value}")
+    if params.get('json.facet'):
+        parts.append('json.facet')
+    return ' '.join(parts)
+
+def _split_query_clauses(text: str) -> List[str]:
+    """Split a parsed query at top-level whitespace, keeping groups, ranges and phrases whole"""
+    clauses = []
+    depth = 0
+    quoted = False
+    start = 0
+    for i, char in enumerate(text):
+        if char == '"' and (i == 0 or text[i - 1] != '\\'):
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ' ' and depth == 0:
+            if text[start:i]:
+                clauses.append(text[start:i])
+            start = i + 1
+    if text[start:]:
+        clauses.append(text[start:])
+    # Keep disjunction separators on the clause before them
+    merged = []
+    for clause in clauses:
+        if clause == '|' and merged:
+            merged[-1] += ' |'
+        else:
+            merged.append(clause)
+    return merged
+
+def format_parsed_query(text: str, width: int = 100, indent: int = 0) -> List[str]:
+    """Lay out a parsed query one clause per line, indenting nested groups until lines fit"""
+    pad = '  ' * indent
+    if len(pad) + len(text) <= width:
+        return [pad + text]
+    clauses = _split_query_clauses(text)
+    if len(clauses) > 1:
+        return [line for clause in clauses for line in format_parsed_query(clause, width, indent)]
+    group = re.match(r'^([+\-]?[\w]*)\((.*)\)([^()\s]*)$', text, re.S)
+    if group:
+        return ([f"{pad}{group.group(1)}("] + format_parsed_query(group.group(2), width, indent + 1) +
+                [f"{pad}){group.group(3)}"])
+    return [pad + text]
+
+# Request line: <timestamp> INFO (thread) [c:coll s:shard ...] o.a.s.c.S.Request [core] webapp=/solr path=/select
+# params={...} hits=12 status=0 QTime=5. Patterns start with a literal so the regex engine can skip ahead
+# to candidates instead of trying every line; the timestamp is read from the start of the matched line.
+_LOG_REQUEST_LINE = re.compile(
+    rb' webapp=\S* path=(\S+) params=\{([^\n]*)\}(?: hits=(\d+))? status=(-?\d+) QTime=(\d+)'
+)
+# <timestamp> ERROR (thread) [MDC] logger message
+_LOG_ERROR_LINE = re.compile(
+    rb'(\d{4}-\d\d-\d\d[ T]\d\d:\d\d)\S* +ERROR +(?:\([^)\n]*\) *)?(?:\[([^\]\n]*)\] *)?(\S*) *([^\n]*)'
+)
+# JDK 9+ unified logging and JDK 8 safepoint lines
+_LOG_GC_PAUSE = re.compile(
+    rb'^\[(\d{4}-\d\d-\d\dT\d\d:\d\d)[^\n]*? Pause [^\n]*? (\d+(?:\.\d+)?)ms *$'
+    rb'|^(\d{4}-\d\d-\d\dT\d\d:\d\d)[^\n]*?Total time for which application threads were stopped: (\d+\.\d+) seconds',
+    re.M
+)
+_LOG_MDC_COLLECTION = re.compile(rb'\bc:([^\s\]]+)')
+_LOG_CORE = re.compile(r'\bx:([^\s\]]+)|\[([^\s\]]+)\]\s*$')
+_LOG_EXCEPTION = re.compile(r'\b((?:[a-z_$][\w$]*\.)+[A-Z][\w$]*(?:Exception|Error))\b')
+LOG_CHUNK_SIZE = 32 * 1024 * 1024
+LOG_SLOW_REQUESTS = 20
+
+def log_chunks(path: str, start: int = 0, chunk_size: int = LOG_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """Split a log file from `start` into line-aligned (start, end) byte ranges.
+    
+    A trailing line without a newline is left out: it may still be being
+    written, and the next run picks it up.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= start:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = mapped.rfind(b'\n', start) + 1
+            chunks = []
+            while start < end:
+                boundary = mapped.find(b'\n', start + chunk_size - 1) + 1 if start + chunk_size < end else end
+                chunks.append((start, boundary))
+                start = boundary
+            return chunks
+
+def _log_collection(prefix: bytes) -> str:
+    """Collection of a request line from its [c:...] MDC, or from the core name logged before webapp="""
+    found = _LOG_MDC_COLLECTION.search(prefix)
+    if found:
+        return found.group(1).decode('utf-8', 'replace')
+    core = _LOG_CORE.search(prefix.decode('utf-8', 'replace'))
+    # books_shard1_replica_n1 -> books
+    return re.sub(r'_shard\d+_replica_\w+$', '', core.group(1) or core.group(2)) if core else ''
+
+def scan_log_chunk(path: str, start: int, end: int) -> Dict:
+    """Parse one line-aligned byte range of a log into per-minute aggregates.
+    
+    Runs in a worker process. The file is memory-mapped and the patterns
+    run over the mapping itself, so only matching lines become Python
+    objects and a chunk's result is small whatever its size.
+    """
+    raw_requests: Dict[Tuple[bytes, bytes, bytes], List] = {}
+    errors_by_key: Dict[Tuple[str, str, str], List] = {}
+    gc_by_minute: Dict[str, List] = {}
+    slow: List[Tuple] = []
+    log_ratio = Histogram._LOG_RATIO
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if 'gc' in os.path.basename(path).lower():
+            for match in _LOG_GC_PAUSE.finditer(mapped, start, end):
+                if match.group(1):
+                    minute, pause = match.group(1), float(match.group(2))
+                else:
+                    minute, pause = match.group(3), float(match.group(4)) * 1000
+                entry = gc_by_minute.setdefault(minute.decode().replace('T', ' '), [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += pause
+                entry[2] = max(entry[2], pause)
+        else:
+            for match in _LOG_REQUEST_LINE.finditer(mapped, start, end):
+                handler, params, hits, status, qtime = match.groups()
+                prefix = mapped[mapped.rfind(b'\n', start, match.start()) + 1 or start:match.start()]
+                if prefix[4:5] != b'-':
+                    continue
+                qtime = int(qtime)
+                if b'isShard=true' in params or b'distrib=false' in params:
+                    handler += b' (shard)'
+                # The MDC part of the prefix is the same for every request to a core
+                mdc = prefix[prefix.find(b'[', 24):]
+                key = (prefix[:16], mdc[:mdc.find(b' t:') if b' t:' in mdc else None], handler)
+                if b'SlowRequest' in prefix:
+                    # Slow requests are also logged by the Request logger; they only feed the slowest list
+                    is_slow_log = True
+                else:
+                    is_slow_log = False
+                    entry = raw_requests.get(key)
+                    if entry is None:
+                        entry = raw_requests[key] = [0, 0, 0, 0, 0, {}]
+                    entry[0] += 1
+                    entry[1] += qtime
+                    if qtime > entry[2]:
+                        entry[2] = qtime
+                    if hits:
+                        entry[3] += int(hits)
+                    if status != b'0':
+                        entry[4] += 1
+                    bucket = int(math.log(qtime) / log_ratio) if qtime > 1 else 0
+                    entry[5][bucket] = entry[5].get(bucket, 0) + 1
+                if len(slow) < LOG_SLOW_REQUESTS or qtime > slow[0][0]:
+                    item = (qtime, prefix[:23].decode().replace('T', ' '), _log_collection(prefix),
+                            handler.decode(), int(hits) if hits else None, int(status),
+                            params[:500].decode('utf-8', 'replace'), is_slow_log)
+                    if len(slow) < LOG_SLOW_REQUESTS:
+                        heapq.heappush(slow, item)
+                    else:
+                        heapq.heappushpop(slow, item)
+            
+            position = start
+            while True:
+                position = mapped.find(b' ERROR ', position, end)
+                if position < 0:
+                    break
+                match = _LOG_ERROR_LINE.match(mapped, mapped.rfind(b'\n', start, position) + 1 or start, end)
+                position = mapped.find(b'\n', position, end)
+                if match:
+                    minute, mdc, logger, message = (group.decode('utf-8', 'replace') if group else ''
+                                                    for group in match.groups())
+                    collection = re.search(r'\bc:([^\s\]]+)', mdc)
+                    exception = _LOG_EXCEPTION.search(message)
+                    kind = exception.group(1).rsplit('.', 1)[-1] if exception else logger
+                    key = (minute.replace('T', ' '), collection.group(1) if collection else '', kind)
+                    entry = errors_by_key.setdefault(key, [0, message[:300]])
+                    entry[0] += 1
+                if position < 0:
+                    break
+    
+    # Requests were keyed by raw bytes; many cores and threads map to one collection
+    requests_by_key: Dict[Tuple[str, str, str], List] = {}
+    collections: Dict[bytes, str] = {}
+    for (minute, mdc, handler), (count, qtime_sum, qtime_max, hits, errors, buckets) in raw_requests.items():
+        if mdc not in collections:
+            collections[mdc] = _log_collection(mdc)
+        key = (minute.decode().replace('T', ' '), collections[mdc], handler.decode())
+        entry = requests_by_key.get(key)
+        if entry is None:
+            requests_by_key[key] = [count, qtime_sum, qtime_max, hits, errors, buckets]
+            continue
+        entry[0] += count
+        entry[1] += qtime_sum
+        entry[2] = max(entry[2], qtime_max)
+        entry[3] += hits
+        entry[4] += errors
+        for bucket, n in buckets.items():
+            entry[5][bucket] = entry[5].get(bucket, 0) + n
+    return {'requests': requests_by_key, 'errors': errors_by_key, 'gc': gc_by_minute, 'slow': slow,
+            'bytes': end - start}
+
+class LogIndex:
+    """On-disk index of aggregates parsed from Solr log files.
+    
+    Files are recognized by inode and the hash of their first bytes, so a
+    rotated log keeps its index entries, and a log that grew is only
+    scanned from where the previous run stopped. Reports are SQL over the
+    per-minute aggregates, never over the logs themselves.
+    """
+    
+    HEAD_BYTES = 4096
+    
+    def __init__(self, path: str):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT, device INTEGER, inode INTEGER, "
+            "head TEXT, head_length INTEGER, indexed_end INTEGER);"
+            "CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, file_id INTEGER, start INTEGER, end INTEGER);"
+            "CREATE TABLE IF NOT EXISTS requests (chunk_id INTEGER, minute TEXT, collection TEXT, handler TEXT, "
+            "count INTEGER, qtime_sum INTEGER, qtime_max INTEGER, hits_sum INTEGER, errors INTEGER, buckets TEXT);"
+            "CREATE TABLE IF NOT EXISTS errors (chunk_id INTEGER, minute TEXT, collection TEXT, kind TEXT, "
+            "count INTEGER, sample TEXT);"
+            "CREATE TABLE IF NOT EXISTS gc (chunk_id INTEGER, minute TEXT, count INTEGER, total_ms REAL, max_ms REAL);"
+            "CREATE TABLE IF NOT EXISTS slow (chunk_id INTEGER, qtime INTEGER, time TEXT, collection TEXT, "
+            "handler TEXT, hits INTEGER, status INTEGER, params TEXT, slow_log INTEGER);"
+            "CREATE INDEX IF NOT EXISTS chunks_file ON chunks (file_id);"
+            "CREATE INDEX IF NOT EXISTS requests_minute ON requests (minute);"
+            "CREATE INDEX IF NOT EXISTS errors_minute ON errors (minute);"
+            "CREATE INDEX IF NOT EXISTS gc_minute ON gc (minute);"
+        )
+    
+    def close(self):
+        self.db.close()
+    
+    def _head(self, path: str, length: int) -> str:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read(length)).hexdigest()
+    
+    def file_state(self, path: str) -> Tuple[int, int]:
+        """(file id, bytes already indexed) for a log file, registering it if new"""
+        stat = os.stat(path)
+        rows = self.db.execute("SELECT id, head, head_length, indexed_end, path FROM files WHERE device = ? AND inode = ?",
+                               (stat.st_dev, stat.st_ino)).fetchall()
+        for file_id, head, head_length, indexed_end, known_path in rows:
+            if stat.st_size >= indexed_end and self._head(path, head_length) == head:
+                length = min(stat.st_size, self.HEAD_BYTES)
+                self.db.execute("UPDATE files SET path = ?, head = ?, head_length = ? WHERE id = ?",
+                                (path, self._head(path, length), length, file_id))
+                return file_id, indexed_end
+            # Same inode, different content: truncated or reused
+            self.forget(file_id)
+        length = min(stat.st_size, self.HEAD_BYTES)
+        cursor = self.db.execute(
+            "INSERT INTO files (path, device, inode, head, head_length, indexed_end) VALUES (?, ?, ?, ?, ?, 0)",
+            (path, stat.st_dev, stat.st_ino, self._head(path, length), length)
+        )
+        self.db.commit()
+        return cursor.lastrowid, 0
+    
+    def forget(self, file_id: int):
+        chunk_ids = [row[0] for row in self.db.execute("SELECT id FROM chunks WHERE file_id = ?", (file_id,))]
+        for table in ('requests', 'errors', 'gc', 'slow'):
+            self.db.executemany(f"DELETE FROM {table} WHERE chunk_id = ?", [(c,) for c in chunk_ids])
+        self.db.execute("DELETE FROM chunks WHERE file_id = ?", (file_id,))
+        self.db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        self.db.commit()
+    
+    def add_chunk(self, file_id: int, start: int, end: int, result: Dict):
+        """Store one scanned chunk; chunks of a file must be added in order"""
+        chunk_id = self.db.execute("INSERT INTO chunks (file_id, start, end) VALUES (?, ?, ?)",
+                                   (file_id, start, end)).lastrowid
+        self.db.executemany(
+            "INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(chunk_id, minute, collection, handler, count, qtime_sum, qtime_max, hits, errors,
+              json.dumps(buckets, separators=(',', ':')))
+             for (minute, collection, handler), (count, qtime_sum, qtime_max, hits, errors, buckets)
+             in result['requests'].items()]
+        )
+        self.db.executemany("INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?)",
+                            [(chunk_id, *key, count, sample) for key, (count, sample) in result['errors'].items()])
+        self.db.executemany("INSERT INTO gc VALUES (?, ?, ?, ?, ?)",
+                            [(chunk_id, minute, *values) for minute, values in result['gc'].items()])
+        self.db.executemany("INSERT INTO slow VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(chunk_id, *item) for item in result['slow']])
+        self.db.execute("UPDATE files SET indexed_end = ? WHERE id = ?", (end, file_id))
+        self.db.commit()
+    
+    def select(self, table: str, columns: str, file_ids: List[int], since: Optional[str] = None,
+               until: Optional[str] = None, collection: Optional[str] = None, suffix: str = '') -> List[Tuple]:
+        """Rows of one aggregate table restricted to some files, a time range and a collection"""
+        clauses = [f"chunk_id IN (SELECT id FROM chunks WHERE file_id IN ({','.join('?' * len(file_ids))}))"]
+        args: List = list(file_ids)
+        column = 'time' if table == 'slow' else 'minute'
+        if since:
+            clauses.append(f"{column} >= ?")
+            args.append(since)
+        if until:
+            clauses.append(f"{column} < ?")
+            args.append(until)
+        if collection:
+            clauses.append("collection = ?")
+            args.append(collection)
+        return self.db.execute(f"SELECT {columns} FROM {table} WHERE {' AND '.join(clauses)} {suffix}", args).fetchall()
+
+# TODO: We should ideally use a Python Solr client instead of making HTTP calls
+class SolrConnection:
+    """Manages connection to Apache Solr instance"""
+    
+    # solr.jvm metric name prefixes read by _extract_info
+    CONNECT_METRIC_PREFIXES = ['memory.heap', 'memory.non-heap', 'memory.total', 'os.', 'system.properties']
+    
+    # The parts of /schema the summaries read; analyzer chains and copyFields
+    # are skipped unparsed
+    SCHEMA_SUMMARY_PROJECTION = {'schema': {'fields': True, 'dynamicFields': True,
+                                            'fieldTypes': [{'name': True, 'class': True}]}}
+    
+    def __init__(self, transport: Optional[SolrTransport] = None, cache: Optional[MetadataCache] = None):
+        self.base_url: Optional[str] = None
+        self.connected: bool = False
+        self.solr_info: Dict = {}
+        self.transport = transport or SolrTransport()
+        self.cache = cache or MetadataCache()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._full_metrics: Optional[Dict] = None
+        self.monitor: Optional[MetricsMonitor] = None
+        self._cluster_transport: Optional[SolrTransport] = None
+        self.translator: Optional[QueryTranslator] = None
+        self.current_collection: Optional[str] = None
+        # Most recently used schema catalogs, keyed by schema URL
+        self._schema_catalogs: OrderedDict = OrderedDict()
+        # Structured form of what the last command displayed, for --json output
+        self.last_result = None
+    
+    def connect(self, url: str, quiet: bool = False) -> bool:
+        """Connect to Solr instance; quiet skips the banner and instance details"""
+        try:
+            # Normalize URL
+            if not url.startswith(('http://', 'https://')):
+                url = f'http://{url}'
+            
+            parsed = urlparse(url)
+            if not parsed.port and not parsed.netloc.endswith(':8983'):
+                if ':' not in parsed.netloc:
+                    url = url.rstrip('/') + ':8983'
+            
+            self.base_url = url.rstrip('/')
+            
+            self._full_metrics = None
+            system_url = urljoin(self.base_url + '/', 'solr/admin/info/system')
+            
+            if not quiet:
+                print(f"{Colors.CYAN}Connecting to Solr at {self.base_url}...{Colors.RESET}")
+            
+            # The scoped JVM metrics request doubles as the liveness check; system
+            # info is independent and (usually) answered from cache, so both run
+            # concurrently.
+            system_future = self._get_executor().submit(self._fetch_cached_json, system_url, 'system')
+            metrics_data = self.fetch_metrics(group='jvm', prefix=self.CONNECT_METRIC_PREFIXES)
+            try:
+                system_data = system_future.result()
+            except Exception:
+                system_data = {}
+            
+            self.solr_info = self._extract_info(metrics_data, system_data)
+            self.connected = True
+            
+            if not quiet:
+                print(f"{Colors.GREEN}Successfully connected to Apache Solr!{Colors.RESET}\n")
+                self._display_info()
+            
+            return True
+            
+        except requests.exceptions.ConnectionError:
+            print(f"{Colors.RED}Failed to connect to {url}. Is Solr running?{Colors.RESET}")
+            return False
+        except requests.exceptions.Timeout:
+            print(f"{Colors.RED}Connection timeout to {url}{Colors.RESET}")
+            return False
+        except requests.exceptions.HTTPError as e:
+            print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"{Colors.RED}Unexpected error: {e}{Colors.RESET}")
+            return False
+    
+    def fetch_metrics(self, group: Optional[str] = None, prefix: Optional[List[str]] = None,
+                      keys: Optional[List[str]] = None) -> Dict:
+        """Fetch a scoped slice of /admin/metrics.
+        
+        group/prefix/key filters keep the response to the metrics actually
+        needed instead of the whole (multi-megabyte) registry tree.
+        """
+        metrics_url = urljoin(self.base_url + '/', 'solr/admin/metrics')
+        params = {}
+        if group:
+            params['group'] = group
+        if prefix:
+            params['prefix'] = ','.join(prefix)
+        if keys:
+            params['key'] = keys
+        return self._fetch_json(metrics_url, 'metrics', params or None)
+    
+    def get_full_metrics(self) -> Dict:
+        """The complete metrics tree, fetched lazily once per connection"""
+        if self._full_metrics is None:
+            self._full_metrics = self.fetch_metrics()
+        return self._full_metrics
+    
+    def _extract_info(self, metrics_data: Dict, system_data: Optional[Dict] = None) -> Dict:
+        """Extract Solr information from metrics"""
+        info = {}
+        
+        try:
+            if 'metrics' in metrics_data:
+                metrics = metrics_data['metrics']
+                
+                # JVM metrics
+                jvm_metrics = metrics.get('solr.jvm', {})
+                if jvm_metrics:
+                    info['memory_heap_used'] = jvm_metrics.get('memory.heap.used')
+                    info['memory_heap_max'] = jvm_metrics.get('memory.heap.max')
+                    info['memory_heap_usage'] = jvm_metrics.get('memory.heap.usage')
+                    info['memory_non_heap_used'] = jvm_metrics.get('memory.non-heap.used')
+                    info['memory_non_heap_max'] = jvm_metrics.get('memory.non-heap.max')
+                    info['memory_total_used'] = jvm_metrics.get('memory.total.used')
+                    info['memory_total_committed'] = jvm_metrics.get('memory.total.committed')
+                    
+                    info['os_name'] = jvm_metrics.get('os.name')
+                    info['os_arch'] = jvm_metrics.get('os.arch')
+                    info['os_version'] = jvm_metrics.get('os.version')
+                    info['os_available_processors'] = jvm_metrics.get('os.availableProcessors')
+                    info['os_system_load_average'] = jvm_metrics.get('os.systemLoadAverage')
+                    info['os_process_cpu_load'] = jvm_metrics.get('os.processCpuLoad')
+                    info['os_system_cpu_load'] = jvm_metrics.get('os.systemCpuLoad')
+                    info['os_free_physical_memory'] = jvm_metrics.get('os.freePhysicalMemorySize')
+                    info['os_total_physical_memory'] = jvm_metrics.get('os.totalPhysicalMemorySize')
+                    info['os_open_file_descriptors'] = jvm_metrics.get('os.openFileDescriptorCount')
+                    info['os_max_file_descriptors'] = jvm_metrics.get('os.maxFileDescriptorCount')
+                    
+                    system_props = jvm_metrics.get('system.properties', {})
+                    if system_props:
+                        info['java_version'] = system_props.get('java.specification.version')
+                        info['java_vendor'] = system_props.get('java.vendor')
+                        info['java_vm_name'] = system_props.get('java.vm.name')
+                        info['solr_home'] = system_props.get('solr.solr.home')
+                        info['solr_log_dir'] = system_props.get('solr.log.dir')
+            
+            # Try to get version from system info
+            if 'version' not in info:
+                try:
+                    if system_data is None:
+                        system_url = urljoin(self.base_url + '/', 'solr/admin/info/system')
+                        system_data = self._fetch_cached_json(system_url, 'system')
+                    
+                    if 'lucene' in system_data:
+                        lucene_info = system_data['lucene']
+                        if 'solr-spec-version' in lucene_info:
+                            info['version'] = lucene_info['solr-spec-version']
+                        if 'lucene-spec-version' in lucene_info:
+                            info['lucene_version'] = lucene_info['lucene-spec-version']
+                    
+                    if 'jvm' in system_data:
+                        jvm_info = system_data['jvm']
+                        if 'version' in jvm_info:
+                            info['java_version'] = jvm_info['version']
+                
+                except Exception:
+                    pass
+            
+        except Exception:
+            pass
+        
+        return info
+    
+    @traced('render')
+    def _display_info(self):
+        """Display Solr connection information"""
+        self.last_result = dict(self.solr_info, url=self.base_url)
+        print(f"{Colors.CYAN}{'═' * 60}{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.WHITE}  Apache Solr Instance Details{Colors.RESET}")
+        print(f"{Colors.CYAN}{'═' * 60}{Colors.RESET}")
+        
+        # URL
+        print(f"{Colors.GREEN}URL:{Colors.RESET} {Colors.WHITE}{self.base_url}{Colors.RESET}")
+        
+        # Solr Version
+        if self.solr_info.get('version'):
+            print(f"{Colors.GREEN}Solr Version:{Colors.RESET} {Colors.WHITE}{self.solr_info['version']}{Colors.RESET}")
+        
+        # Lucene Version
+        if self.solr_info.get('lucene_version'):
+            print(f"{Colors.GREEN}Lucene Version:{Colors.RESET} {Colors.WHITE}{self.solr_info['lucene_version']}{Colors.RESET}")
+        
+        # Java Version
+        if self.solr_info.get('java_version'):
+            print(f"{Colors.GREEN}Java Version:{Colors.RESET} {Colors.WHITE}{self.solr_info['java_version']}{Colors.RESET}")
+        
+        # JVM
+        if self.solr_info.get('java_vm_name'):
+            print(f"{Colors.GREEN}JVM:{Colors.RESET} {Colors.WHITE}{self.solr_info['java_vm_name']}{Colors.RESET}")
+        
+        # OS
+        if self.solr_info.get('os_name'):
+            os_info = f"{self.solr_info['os_name']}"
+            if self.solr_info.get('os_arch'):
+                os_info += f" ({self.solr_info['os_arch']})"
+            if self.solr_info.get('os_version'):
+                os_info += f" - {self.solr_info['os_version']}"
+            print(f"{Colors.GREEN}OS:{Colors.RESET} {Colors.WHITE}{os_info}{Colors.RESET}")
+        
+        # CPU Cores
+        if self.solr_info.get('os_available_processors'):
+            print(f"{Colors.GREEN}CPU Cores:{Colors.RESET} {Colors.WHITE}{self.solr_info['os_available_processors']}{Colors.RESET}")
+        
+        # Heap Memory
+        if self.solr_info.get('memory_heap_used') and self.solr_info.get('memory_heap_max'):
+            try:
+                used = int(self.solr_info['memory_heap_used'])
+                max_mem = int(self.solr_info['memory_heap_max'])
+                used_mb = used // (1024 * 1024)
+                max_mb = max_mem // (1024 * 1024)
+                usage_pct = self.solr_info.get('memory_heap_usage', 0) * 100
+                
+                usage_color = Colors.WHITE
+                if usage_pct > 80:
+                    usage_color = Colors.RED
+                elif usage_pct > 60:
+                    usage_color = Colors.YELLOW
+                
+                print(f"{Colors.GREEN}Heap Memory:{Colors.RESET} {usage_color}{used_mb}MB / {max_mb}MB ({usage_pct:.1f}%){Colors.RESET}")
+            except (ValueError, TypeError):
+                pass
+        
+        # Non-Heap Memory
+        if self.solr_info.get('memory_non_heap_used'):
+            try:
+                used = int(self.solr_info['memory_non_heap_used'])
+                used_mb = used // (1024 * 1024)
                 print(f"{Colors.GREEN}Non-Heap Memory:{Colors.RESET} {Colors.WHITE}{used_mb}MB{Colors.RESET}")
             except (ValueError, TypeError):
                 pass
         
-        # Physical Memory
-        if self.solr_info.get('os_free_physical_memory') and self.solr_info.get('os_total_physical_memory'):
-            try:
-                free = int(self.solr_info['os_free_physical_memory'])
-                total = int(self.solr_info['os_total_physical_memory'])
-                used = total - free
-                free_gb = free // (1024 * 1024 * 1024)
-                total_gb = total // (1024 * 1024 * 1024)
-                used_gb = used // (1024 * 1024 * 1024)
-                usage_pct = (used / total) * 100
-                print(f"{Colors.GREEN}Physical Memory:{Colors.RESET} {Colors.WHITE}{used_gb}GB / {total_gb}GB ({usage_pct:.1f}% used, {free_gb}GB free){Colors.RESET}")
-            except (ValueError, TypeError):
-                pass
+        # Physical Memory
+        if self.solr_info.get('os_free_physical_memory') and self.solr_info.get('os_total_physical_memory'):
+            try:
+                free = int(self.solr_info['os_free_physical_memory'])
+                total = int(self.solr_info['os_total_physical_memory'])
+                used = total - free
+                free_gb = free // (1024 * 1024 * 1024)
+                total_gb = total // (1024 * 1024 * 1024)
+                used_gb = used // (1024 * 1024 * 1024)
+                usage_pct = (used / total) * 100
+                print(f"{Colors.GREEN}Physical Memory:{Colors.RESET} {Colors.WHITE}{used_gb}GB / {total_gb}GB ({usage_pct:.1f}% used, {free_gb}GB free){Colors.RESET}")
+            except (ValueError, TypeError):
+                pass
+        
+        # Solr Home
+        if self.solr_info.get('solr_home'):
+            print(f"{Colors.GREEN}Solr Home:{Colors.RESET} {Colors.WHITE}{self.solr_info['solr_home']}{Colors.RESET}")
+        
+        # Log Directory
+        if self.solr_info.get('solr_log_dir'):
+            print(f"{Colors.GREEN}Log Directory:{Colors.RESET} {Colors.WHITE}{self.solr_info['solr_log_dir']}{Colors.RESET}")
+        
+        print(f"{Colors.CYAN}{'═' * 60}{Colors.RESET}\n")
+    
+    def disconnect(self):
+        """Disconnect from Solr"""
+        self.base_url = None
+        self.connected = False
+        self.solr_info = {}
+        self._full_metrics = None
+        self.current_collection = None
+        if self.monitor is not None:
+            self.monitor.stop()
+            self.monitor = None
+        if self._cluster_transport is not None:
+            self._cluster_transport.close()
+        self.transport.close()
+        print(f"{Colors.YELLOW}Disconnected from Solr{Colors.RESET}")
+    
+    def display_stats(self):
+        """Display latency percentiles per traced endpoint, command and render step"""
+        if not TRACER.stats:
+            if TRACER.enabled:
+                print("No spans recorded yet\n")
+            else:
+                print("Tracing is off. Use 'trace on' to start collecting request statistics.\n")
+            return
+        
+        since = time.strftime('%H:%M:%S', time.localtime(TRACER.started)) if TRACER.started else '?'
+        print(f"\n{Colors.BOLD}Span statistics{Colors.RESET} (tracing {'on' if TRACER.enabled else 'off'}, since {since})")
+        print(f"  {'Kind':8} {'Name':24} {'Count':>7} {'Errors':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'Max':>9} {'Avg size':>10}")
+        print("  " + "-" * 98)
+        order = {'command': 0, 'http': 1, 'decode': 2, 'render': 3}
+        with TRACER._lock:
+            rows = sorted(TRACER.stats.items(), key=lambda item: (order.get(item[0][0], 9), item[0][1]))
+            rows = [(key, dict(stats, statuses=dict(stats['statuses']))) for key, stats in rows]
+        for (category, name), stats in rows:
+            histogram = stats['time']
+            errors = sum(count for status, count in stats['statuses'].items()
+                         if not (isinstance(status, int) and status < 400))
+            size = format_bytes(stats['bytes'] / stats['sized']) if stats['sized'] else '-'
+            error_color = Colors.RED if errors else ''
+            print(f"  {category:8} {name[:24]:24} {histogram.count:>7,} {error_color}{errors:>6}{Colors.RESET} "
+                  + " ".join(f"{histogram.percentile(p) * 1000:7.2f}ms" for p in (50, 95, 99))
+                  + f" {histogram.max * 1000:7.2f}ms {size:>10}")
+        print()
+    
+    def display_timings(self, limit: int = 20):
+        """Display timing breakdown of the most recent HTTP requests"""
+        timings = list(self.transport.timings)[-limit:]
+        if not timings:
+            print("No requests recorded yet")
+            return
+
+        print(f"\n{Colors.BOLD}Recent Requests (last {len(timings)}):{Colors.RESET}")
+        print(f"  {'Endpoint':12} {'Status':>6} {'DNS':>8} {'Connect':>8} {'TTFB':>8} {'Body':>8} {'Total':>8} {'Bytes':>10}  Conn")
+        print("  " + "-" * 86)
+        for t in timings:
+            status_color = Colors.GREEN if t['status'] < 400 else Colors.RED
+            conn = "reused" if t['reused'] else "new"
+            print(f"  {t['endpoint']:12} {status_color}{t['status']:>6}{Colors.RESET} "
+                  f"{t['dns'] * 1000:7.1f}ms {t['connect'] * 1000:7.1f}ms {t['ttfb'] * 1000:7.1f}ms "
+                  f"{t['body'] * 1000:7.1f}ms {t['total'] * 1000:7.1f}ms {t['bytes']:>10,}  {conn}")
+
+        total = sum(t['total'] for t in timings)
+        handshakes = sum(t['dns'] + t['connect'] for t in timings)
+        reused = sum(1 for t in timings if t['reused'])
+        print(f"\n  Total: {total * 1000:.1f}ms, handshakes: {handshakes * 1000:.1f}ms, "
+              f"reused connections: {reused}/{len(timings)}")
+        cache_stats = self.cache.stats
+        print(f"  Metadata cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, "
+              f"{cache_stats['misses']} misses\n")
+
+    def start_monitor(self, collection: Optional[str] = None, interval: float = 5.0) -> bool:
+        """Start background metrics polling"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        if self.monitor is not None:
+            self.monitor.stop()
+        
+        try:
+            monitor = MetricsMonitor(self, collection=collection, interval=interval)
+            monitor.start()
+        except Exception as e:
+            print(f"{Colors.RED}Failed to start monitor: {e}{Colors.RESET}")
+            return False
+        
+        self.monitor = monitor
+        print(f"{Colors.GREEN}Monitoring {len(monitor.series)} series every {interval:g}s. "
+              f"Type 'monitor' to view, 'monitor stop' to stop.{Colors.RESET}")
+        return True
+    
+    def stop_monitor(self):
+        """Stop background metrics polling"""
+        if self.monitor is None:
+            print("Monitor is not running")
+            return
+        self.monitor.stop()
+        self.monitor = None
+        print(f"{Colors.YELLOW}Monitor stopped{Colors.RESET}")
+    
+    def show_monitor(self):
+        """Live dashboard view; redraws only the lines that changed"""
+        if self.monitor is None or not self.monitor.running:
+            print("Monitor is not running. Use 'monitor start [collection]' first.")
+            return
+        
+        monitor = self.monitor
+        drawn: List[str] = []
+        seen = -1
+        try:
+            while monitor.running:
+                lines = monitor.render_lines()
+                if len(lines) != len(drawn):
+                    print("\n".join(lines))
+                else:
+                    for i, line in enumerate(lines):
+                        if line != drawn[i]:
+                            up = len(lines) - i
+                            print(f"\033[{up}A\r\033[2K{line}\033[{up}B\r", end="")
+                    sys.stdout.flush()
+                drawn = lines
+                seen = monitor.wait_for_sample(seen, timeout=monitor.interval * 2)
+                check_cancelled()
+        except KeyboardInterrupt:
+            print()
+    
+    def _get_cluster_transport(self) -> SolrTransport:
+        """Transport for node sweeps: no retries, so a dead node costs at most its timeout"""
+        if self._cluster_transport is None:
+            self._cluster_transport = SolrTransport(pool_connections=64, pool_maxsize=4, retries=0)
+        return self._cluster_transport
+    
+    def _live_node_urls(self) -> List[str]:
+        """Base URLs of all live nodes, from CLUSTERSTATUS"""
+        url = urljoin(self.base_url + '/', 'solr/admin/collections')
+        data = self._fetch_json(url, 'collections', {'action': 'CLUSTERSTATUS'})
+        return [self._node_url(node) for node in data.get('cluster', {}).get('live_nodes', [])]
+
+    def _node_url(self, node_name: str) -> str:
+        # Node names look like "host:8983_solr"
+        return f"{urlparse(self.base_url).scheme}://{node_name.split('_', 1)[0]}"
+    
+    def _probe_node(self, node_url: str, timeout: float) -> Dict:
+        """Fetch scoped JVM metrics and system info from a single node"""
+        transport = self._get_cluster_transport()
+        start = time.perf_counter()
+        result = {'node': urlparse(node_url).netloc, 'error': None}
+        try:
+            metrics_response = transport.get(
+                urljoin(node_url + '/', 'solr/admin/metrics'), endpoint='metrics',
+                params={'group': 'jvm', 'prefix': ','.join(self.CONNECT_METRIC_PREFIXES)},
+                timeout=(min(3.05, timeout), timeout)
+            )
+            metrics_response.raise_for_status()
+            system_response = transport.get(
+                urljoin(node_url + '/', 'solr/admin/info/system'), endpoint='system',
+                timeout=(min(3.05, timeout), timeout)
+            )
+            system_data = self._decode(system_response, 'system') if system_response.ok else {}
+            result.update(self._extract_info(self._decode(metrics_response, 'metrics'), system_data))
+        except requests.exceptions.Timeout:
+            result['error'] = f"timed out after {timeout:g}s"
+        except requests.exceptions.ConnectionError:
+            result['error'] = "unreachable"
+        except requests.exceptions.HTTPError as e:
+            result['error'] = f"HTTP {e.response.status_code}"
+        except Exception as e:
+            result['error'] = str(e)[:60]
+        result['elapsed'] = time.perf_counter() - start
+        
+        heap_max = result.get('memory_heap_max')
+        result['heap_pct'] = (result['memory_heap_used'] / heap_max * 100) if heap_max and result.get('memory_heap_used') is not None else None
+        fd_max = result.get('os_max_file_descriptors')
+        result['fd_pct'] = (result['os_open_file_descriptors'] / fd_max * 100) if fd_max and result.get('os_open_file_descriptors') is not None else None
+        load = result.get('os_system_load_average')
+        cpus = result.get('os_available_processors')
+        result['load_pct'] = (load / cpus * 100) if cpus and load is not None and load >= 0 else None
+        return result
+    
+    def cluster_health(self, parallelism: int = 16, timeout: float = 5.0, sort_by: Optional[str] = None) -> bool:
+        """Sweep all live nodes concurrently and show one aggregated health table"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        try:
+            node_urls = self._live_node_urls()
+        except Exception as e:
+            print(f"{Colors.RED}Cluster status unavailable (is this SolrCloud?): {e}{Colors.RESET}")
+            return False
+        
+        if not node_urls:
+            print("No live nodes reported")
+            return True
+        
+        print(f"Sweeping {len(node_urls)} live nodes (parallelism {parallelism}, timeout {timeout:g}s)...")
+        start = time.perf_counter()
+        with _ContextExecutor(max_workers=max(1, min(parallelism, len(node_urls))),
+                              thread_name_prefix='solr-cluster') as executor:
+            results = list(executor.map(lambda node_url: self._probe_node(node_url, timeout), node_urls))
+        elapsed = time.perf_counter() - start
+        
+        self._display_cluster_health(results, elapsed, sort_by)
+        return True
+    
+    @traced('render')
+    def _display_cluster_health(self, results: List[Dict], elapsed: float, sort_by: Optional[str]):
+        """Display the node health table, worst node first"""
+        self.last_result = {'nodes': results, 'elapsed': elapsed}
+        def severity(result):
+            if result['error']:
+                return float('inf')
+            if sort_by:
+                return result.get(f'{sort_by}_pct') or 0
+            return max(result.get('heap_pct') or 0, result.get('fd_pct') or 0, result.get('load_pct') or 0)
+        
+        def cell(value, width):
+            if value is None:
+                return f"{'-':>{width}}"
+            color = Colors.RED if value > 80 else Colors.YELLOW if value > 60 else Colors.WHITE
+            return f"{color}{value:{width}.1f}{Colors.RESET}"
+        
+        results = sorted(results, key=severity, reverse=True)
+        print(f"\n{Colors.BOLD}Cluster Health ({len(results)} nodes, sorted by "
+              f"{sort_by or 'worst metric'}){Colors.RESET}")
+        print(f"  {'Node':30} {'Heap %':>7} {'Load %':>7} {'FD %':>7} {'Solr':>10} {'Java':>8} {'Time':>7}")
+        print("  " + "-" * 82)
+        for result in results:
+            if result['error']:
+                print(f"  {result['node'][:30]:30} {Colors.RED}DOWN: {result['error']}{Colors.RESET}")
+                continue
+            print(f"  {result['node'][:30]:30} {cell(result['heap_pct'], 7)} {cell(result['load_pct'], 7)} "
+                  f"{cell(result['fd_pct'], 7)} {str(result.get('version', '-'))[:10]:>10} "
+                  f"{str(result.get('java_version', '-'))[:8]:>8} {result['elapsed'] * 1000:6.0f}ms")
+        
+        down = sum(1 for result in results if result['error'])
+        slowest = max(result['elapsed'] for result in results)
+        print(f"\n  {len(results) - down} up, {down} down. Sweep took {elapsed:.2f}s "
+              f"(slowest node {slowest:.2f}s)\n")
+    
+    INVENTORY_SORTS = ('name', 'docs', 'size', 'segments', 'modified', 'health')
+    # Per-core metrics that stand in for cores STATUS when a node's STATUS call fails
+    INVENTORY_METRIC_PREFIXES = ['INDEX.sizeInBytes', 'SEARCHER.searcher.numDocs', 'SEARCHER.searcher.deletedDocs']
+    
+    def _node_json(self, node_url: str, path: str, endpoint: str, params: Dict,
+                   timeout: float) -> Tuple[Optional[Dict], Optional[str]]:
+        """GET an admin path from one node with the sweep transport; returns (data, error)"""
+        try:
+            response = self._get_cluster_transport().get(
+                urljoin(node_url + '/', path), endpoint=endpoint, params=params,
+                timeout=(min(3.05, timeout), timeout)
+            )
+            response.raise_for_status()
+            return self._decode(response, endpoint), None
+        except requests.exceptions.Timeout:
+            return None, f"timed out after {timeout:g}s"
+        except requests.exceptions.ConnectionError:
+            return None, "unreachable"
+        except requests.exceptions.HTTPError as e:
+            return None, f"HTTP {e.response.status_code}"
+        except ValueError as e:
+            return None, f"bad response: {str(e)[:50]}"
+    
+    @staticmethod
+    def _core_registry(core: str, collection: str, shard: Optional[str]) -> str:
+        """Metrics registry of a core: solr.core.<collection>.<shard>.<replica>, or solr.core.<core> standalone"""
+        if shard and core.startswith(f'{collection}_{shard}_'):
+            return f"solr.core.{collection}.{shard}.{core[len(collection) + len(shard) + 2:]}"
+        return f"solr.core.{core}"
+    
+    def inventory(self, pattern: Optional[str] = None, sort_by: str = 'name', cores: bool = False,
+                  unhealthy: bool = False, limit: Optional[int] = None, parallelism: int = 16,
+                  timeout: float = 10.0) -> bool:
+        """Doc counts, index sizes, segments, last modification and replica health for every collection.
+        
+        Everything comes from bulk calls: one CLUSTERSTATUS, then per live
+        node a cores STATUS with indexInfo and a metrics request for the
+        INDEX/SEARCHER counters, all node calls in parallel. The number of
+        requests grows with nodes, not with collections. Standalone Solr
+        lists its cores instead.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        start = time.perf_counter()
+        collections_url = urljoin(self.base_url + '/', 'solr/admin/collections')
+        try:
+            cluster = self._fetch_json(collections_url, 'collections', {'action': 'CLUSTERSTATUS'}).get('cluster', {})
+        except requests.exceptions.HTTPError:
+            # Standalone Solr rejects Collections API calls
+            cluster = None
+        except Exception as e:
+            print(f"{Colors.RED}Error reading cluster status: {e}{Colors.RESET}")
+            return False
+        
+        if cluster is None:
+            node_urls = [self.base_url]
+        else:
+            live_nodes = set(cluster.get('live_nodes', []))
+            node_urls = [self._node_url(node) for node in sorted(live_nodes)]
+        
+        calls = []
+        for node_url in node_urls:
+            calls.append((node_url, 'solr/admin/cores', 'cores', {'action': 'STATUS', 'indexInfo': 'true'}))
+            calls.append((node_url, 'solr/admin/metrics', 'metrics',
+                          {'group': 'core', 'prefix': ','.join(self.INVENTORY_METRIC_PREFIXES)}))
+        with _ContextExecutor(max_workers=max(1, min(parallelism, len(calls))),
+                              thread_name_prefix='solr-inventory') as executor:
+            responses = list(executor.map(lambda call: (call, self._node_json(*call, timeout)), calls))
+        
+        records = {}
+        if cluster is not None:
+            for collection, info in cluster.get('collections', {}).items():
+                for shard, shard_info in info.get('shards', {}).items():
+                    for replica in shard_info.get('replicas', {}).values():
+                        core = replica.get('core', '')
+                        live = replica.get('node_name') in live_nodes
+                        records[core] = {
+                            'core': core, 'collection': collection, 'shard': shard,
+                            'node': replica.get('node_name', '').split('_', 1)[0],
+                            # A replica on a dead node keeps its last published state
+                            'state': replica.get('state', 'unknown') if live else 'down',
+                            'leader': replica.get('leader') == 'true',
+                        }
+        
+        node_errors = []
+        metrics = {}
+        for (node_url, _, endpoint, _), (data, error) in responses:
+            node = urlparse(node_url).netloc
+            if error:
+                node_errors.append({'node': node, 'call': endpoint, 'error': error})
+                continue
+            if endpoint == 'metrics':
+                metrics.update(data.get('metrics', {}))
+                continue
+            for core, status in data.get('status', {}).items():
+                record = records.setdefault(core, {'core': core, 'collection': core, 'shard': None, 'node': node,
+                                                   'state': 'active', 'leader': True})
+                index = status.get('index', {})
+                record.update({
+                    'docs': index.get('numDocs'), 'deleted': index.get('deletedDocs'),
+                    'size': index.get('sizeInBytes'), 'segments': index.get('segmentCount'),
+                    'modified': index.get('lastModified'),
+                })
+            for core, message in data.get('initFailures', {}).items():
+                record = records.setdefault(core, {'core': core, 'collection': core, 'shard': None, 'node': node,
+                                                   'leader': False})
+                record.update({'state': 'failed', 'error': str(message)[:200]})
+        
+        for core, record in records.items():
+            values = metrics.get(self._core_registry(core, record['collection'], record['shard']), {})
+            for key, metric in (('size', 'INDEX.sizeInBytes'), ('docs', 'SEARCHER.searcher.numDocs'),
+                                ('deleted', 'SEARCHER.searcher.deletedDocs')):
+                if record.get(key) is None and isinstance(values.get(metric), (int, float)):
+                    record[key] = values[metric]
+        
+        if cores or cluster is None:
+            mode = 'cores'
+            rows = list(records.values())
+            for row in rows:
+                row['name'] = row['core']
+                row['health'] = 'ok' if row['state'] == 'active' else 'down'
+        else:
+            mode = 'collections'
+            rows = self._inventory_collections(cluster, records)
+        total = len(rows)
+        if pattern:
+            if any(c in pattern for c in '*?['):
+                rows = [row for row in rows if fnmatch.fnmatchcase(row['name'], pattern)]
+            else:
+                rows = [row for row in rows if pattern in row['name']]
+        if unhealthy:
+            rows = [row for row in rows if row['health'] != 'ok']
+        
+        elapsed = time.perf_counter() - start
+        self._display_inventory(rows, total, mode, sort_by, limit, node_errors, len(node_urls), len(calls) + 1, elapsed)
+        return True
+    
+    def _inventory_collections(self, cluster: Dict, records: Dict[str, Dict]) -> List[Dict]:
+        """Roll replica records up to one row per collection"""
+        by_collection = {}
+        for record in records.values():
+            by_collection.setdefault(record['collection'], []).append(record)
+        
+        rows = []
+        for name in cluster.get('collections', {}):
+            replicas = by_collection.get(name, [])
+            shards = {}
+            for replica in replicas:
+                shards.setdefault(replica['shard'], []).append(replica)
+            
+            docs = deleted = segments = 0
+            health = 'ok'
+            for shard_replicas in shards.values():
+                # Every replica holds the same documents: count each shard once, from its leader
+                source = next((r for r in shard_replicas if r['leader'] and r.get('docs') is not None),
+                              max(shard_replicas, key=lambda r: r.get('docs') or 0))
+                docs += source.get('docs') or 0
+                deleted += source.get('deleted') or 0
+                segments += source.get('segments') or 0
+                active = sum(1 for r in shard_replicas if r['state'] == 'active')
+                if not active:
+                    health = 'down'
+                elif active < len(shard_replicas) and health == 'ok':
+                    health = 'degraded'
+            
+            states = Counter(r['state'] for r in replicas if r['state'] != 'active')
+            modified = [r['modified'] for r in replicas if r.get('modified')]
+            rows.append({
+                'name': name, 'shards': len(shards), 'replicas': len(replicas),
+                'active': len(replicas) - sum(states.values()), 'states': dict(states),
+                'docs': docs, 'deleted': deleted, 'segments': segments,
+                'size': sum(r.get('size') or 0 for r in replicas),
+                'modified': max(modified) if modified else None, 'health': health,
+            })
+        return rows
+    
+    @traced('render')
+    def _display_inventory(self, rows: List[Dict], total: int, mode: str, sort_by: str, limit: Optional[int],
+                           node_errors: List[Dict], nodes: int, request_count: int, elapsed: float):
+        """Display the inventory table"""
+        severity = {'ok': 0, 'degraded': 1, 'down': 2}
+        if sort_by == 'name':
+            rows = sorted(rows, key=lambda row: row['name'])
+        elif sort_by == 'health':
+            rows = sorted(rows, key=lambda row: (-severity[row['health']], row['name']))
+        else:
+            # Largest and most recent first; unknown values last
+            empty = '' if sort_by == 'modified' else 0
+            rows = sorted(rows, key=lambda row: (row.get(sort_by) is not None, row.get(sort_by) or empty), reverse=True)
+        self.last_result = {mode: rows, 'nodes': nodes, 'node_errors': node_errors, 'elapsed': elapsed}
+        
+        def modified(value):
+            return value[:16].replace('T', ' ') if value else '-'
+        
+        def count(value):
+            return f"{value:,}" if value is not None else '-'
+        
+        def deleted_pct(row):
+            docs, deleted = row.get('docs'), row.get('deleted')
+            if docs is None or deleted is None or not docs + deleted:
+                return '-'
+            pct = deleted / (docs + deleted) * 100
+            color = Colors.RED if pct > 30 else Colors.YELLOW if pct > 10 else Colors.WHITE
+            return f"{color}{pct:6.1f}%{Colors.RESET}"
+        
+        shown = rows[:limit] if limit else rows
+        label = 'collections' if mode == 'collections' else 'cores'
+        filtered = f", {len(rows):,} shown" if len(rows) != total else ''
+        print(f"\n{Colors.BOLD}Inventory: {total:,} {label} on {nodes} node{'s' if nodes != 1 else ''}"
+              f"{filtered} (sorted by {sort_by}){Colors.RESET}")
+        if mode == 'collections':
+            print(f"  {'Collection':32} {'Docs':>13} {'Deleted':>8} {'Size':>9} {'Segs':>5} {'Modified':>16}  Replicas")
+        else:
+            print(f"  {'Core':40} {'Node':21} {'Docs':>13} {'Deleted':>8} {'Size':>9} {'Segs':>5} {'Modified':>16}  State")
+        print("  " + "-" * 108)
+        for row in shown:
+            size = format_bytes(row['size']) if row.get('size') is not None else '-'
+            common = (f"{count(row.get('docs')):>13} {deleted_pct(row):>8} {size:>9} {count(row.get('segments')):>5} "
+                      f"{modified(row.get('modified')):>16}")
+            if mode == 'collections':
+                color = {'ok': Colors.GREEN, 'degraded': Colors.YELLOW}.get(row['health'], Colors.RED)
+                others = ', '.join(f"{n} {state}" for state, n in sorted(row['states'].items()))
+                replicas = f"{row['active']}/{row['replicas']} active" + (f" ({others})" if others else '')
+                print(f"  {row['name'][:32]:32} {common}  {color}{replicas}{Colors.RESET}")
+            else:
+                color = Colors.GREEN if row['state'] == 'active' else Colors.RED
+                state = row['state'] + (' (leader)' if row['leader'] and row.get('shard') else '')
+                print(f"  {row['core'][:40]:40} {row['node'][:21]:21} {common}  {color}{state}{Colors.RESET}")
+                if row.get('error'):
+                    print(f"    {Colors.RED}{row['error'][:100]}{Colors.RESET}")
+        if len(shown) < len(rows):
+            print(f"  ... {len(rows) - len(shown):,} more (use --limit)")
+        
+        total_docs = sum(row.get('docs') or 0 for row in rows)
+        total_size = sum(row.get('size') or 0 for row in rows)
+        bad = sum(1 for row in rows if row['health'] != 'ok')
+        status = f"{Colors.RED}{bad} unhealthy{Colors.RESET}" if bad else f"{Colors.GREEN}all healthy{Colors.RESET}"
+        print(f"\n  {total_docs:,} docs, {format_bytes(total_size)} on disk, {status}. "
+              f"{request_count} requests in {elapsed:.2f}s")
+        for error in node_errors:
+            print(f"  {Colors.YELLOW}{error['node']} {error['call']}: {error['error']}{Colors.RESET}")
+        print()
+    
+    WATCH_METRICS = ['INDEX.sizeInBytes', 'SEARCHER.searcher.maxDoc', 'SEARCHER.searcher.deletedDocs']
+    
+    def _watch_targets(self, collection_name: str) -> Dict[str, List[Tuple[str, bool]]]:
+        """Node URL -> [(metrics registry, is leader)] for every replica of a collection"""
+        collections_url = urljoin(self.base_url + '/', 'solr/admin/collections')
+        try:
+            cluster = self._fetch_json(collections_url, 'collections',
+                                       {'action': 'CLUSTERSTATUS', 'collection': collection_name}).get('cluster', {})
+        except requests.exceptions.HTTPError:
+            # Standalone: the collection is a single core on this node
+            return {self.base_url: [(self._core_registry(collection_name, collection_name, None), True)]}
+        
+        live_nodes = set(cluster.get('live_nodes', []))
+        targets = {}
+        info = cluster.get('collections', {}).get(collection_name, {})
+        for shard, shard_info in info.get('shards', {}).items():
+            for replica in shard_info.get('replicas', {}).values():
+                if replica.get('node_name') not in live_nodes:
+                    continue
+                targets.setdefault(self._node_url(replica['node_name']), []).append(
+                    (self._core_registry(replica.get('core', ''), collection_name, shard), replica.get('leader') == 'true')
+                )
+        return targets
+    
+    def _watch_probe(self, collection_name: str, targets: Dict[str, List[Tuple[str, bool]]], marker: Optional[str],
+                     previous: Optional[Dict], fields: List[str]) -> Dict:
+        """Take one snapshot with a rows=0-style select and one metrics call per node, in parallel.
+        
+        The select returns numFound and the newest marker value; a range
+        filter above the previous marker counts documents written since the
+        last tick (and, with fields, how many of them carry each field)
+        without scanning the collection.
+        """
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        params = {'q': '*:*', 'rows': 0, 'omitHeader': 'true'}
+        coverage = {f'f{i}': {'type': 'query', 'q': f'{name}:*'} for i, name in enumerate(fields)}
+        if marker:
+            params.update({'rows': 1, 'fl': marker, 'sort': f'{marker} desc'})
+        if previous is None:
+            # First tick: coverage over the whole collection as the baseline
+            facet = coverage
+        elif marker and previous.get('marker') is not None:
+            facet = {'written': dict({'type': 'query', 'q': f'{marker}:{{"{previous["marker"]}" TO *]'},
+                                     **({'facet': coverage} if coverage else {}))}
+        else:
+            facet = {}
+        if facet:
+            params['json.facet'] = json.dumps(facet)
+        
+        executor = self._get_executor()
+        select_future = executor.submit(self._fetch_json, select_url, 'select', params)
+        metric_futures = [
+            (registries, executor.submit(self._node_json, node_url, 'solr/admin/metrics', 'metrics',
+                                         {'key': [f'{registry}:{name}' for registry, _ in registries
+                                                  for name in self.WATCH_METRICS]}, 10.0))
+            for node_url, registries in targets.items()
+        ]
+        
+        data = select_future.result()
+        docs = data['response'].get('docs') or []
+        facets = data.get('facets', {})
+        snapshot = {
+            'time': time.time(), 'docs': data['response']['numFound'],
+            'marker': docs[0].get(marker) if marker and docs else (previous or {}).get('marker'),
+            'written': None, 'max_doc': None, 'deleted': None, 'size': None, 'coverage': {}, 'errors': [],
+        }
+        if 'written' in facets:
+            snapshot['written'] = facets['written'].get('count', 0)
+            facets = facets['written']
+        if fields and (previous is None or 'written' in facet):
+            snapshot['coverage'] = {name: (facets.get(f'f{i}') or {}).get('count', 0) for i, name in enumerate(fields)}
+        
+        totals = {'size': 0, 'max_doc': 0, 'deleted': 0}
+        seen = False
+        for registries, future in metric_futures:
+            values, error = future.result()
+            if error:
+                snapshot['errors'].append(error)
+                continue
+            values = values.get('metrics', {})
+            for registry, leader in registries:
+                size = values.get(f'{registry}:INDEX.sizeInBytes')
+                if isinstance(size, (int, float)):
+                    totals['size'] += size
+                    seen = True
+                # Replicas repeat the leader's documents; count each shard once
+                if leader:
+                    totals['max_doc'] += values.get(f'{registry}:SEARCHER.searcher.maxDoc') or 0
+                    totals['deleted'] += values.get(f'{registry}:SEARCHER.searcher.deletedDocs') or 0
+        if seen:
+            snapshot.update(totals)
+        return snapshot
+    
+    def watch_collection(self, collection_name: str, interval: float = 10.0, fields: Optional[List[str]] = None,
+                         count: Optional[int] = None, marker: str = '_version_', history: int = 8640) -> bool:
+        """Poll a collection and print what changed between ticks until cancelled.
+        
+        Each tick costs one select and one metrics call per node hosting the
+        collection, so it can run for days; only the last `history`
+        snapshots are kept.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        fields = fields or []
+        try:
+            targets = self._watch_targets(collection_name)
+        except Exception as e:
+            print(f"{Colors.RED}Error reading cluster status: {e}{Colors.RESET}")
+            return False
+        
+        snapshots = deque(maxlen=history)
+        first = None
+        previous = None
+        rows = 0
+        next_tick = time.monotonic()
+        print(f"Watching '{collection_name}' every {interval:g}s "
+              f"({sum(len(r) for r in targets.values())} replicas on {len(targets)} node{'s' if len(targets) != 1 else ''})... "
+              f"press Ctrl-C to stop")
+        try:
+            while True:
+                try:
+                    snapshot = self._watch_probe(collection_name, targets, marker, previous, fields)
+                except requests.exceptions.HTTPError as e:
+                    if previous is None and marker and e.response.status_code == 400:
+                        print(f"{Colors.YELLOW}Cannot sort on {marker}; written documents are not counted{Colors.RESET}")
+                        marker = None
+                        continue
+                    if previous is None:
+                        print(f"{Colors.RED}Error watching '{collection_name}': {e}{Colors.RESET}")
+                        return False
+                    print(f"  {time.strftime('%H:%M:%S')} {Colors.RED}probe failed: {e}{Colors.RESET}")
+                    snapshot = None
+                except requests.exceptions.RequestException as e:
+                    if previous is None:
+                        print(f"{Colors.RED}Error watching '{collection_name}': {e}{Colors.RESET}")
+                        return False
+                    print(f"  {time.strftime('%H:%M:%S')} {Colors.RED}probe failed: {e}{Colors.RESET}")
+                    snapshot = None
+                
+                if snapshot is not None:
+                    if snapshot['errors'] and previous is not None:
+                        # Replicas may have moved; look them up again for the next tick
+                        try:
+                            targets = self._watch_targets(collection_name)
+                        except Exception:
+                            pass
+                    if rows % 20 == 0:
+                        self._print_watch_header()
+                    self._print_watch_row(snapshot, previous, first)
+                    snapshots.append(snapshot)
+                    first = first or snapshot
+                    previous = snapshot
+                rows += 1
+                if count is not None and rows >= count:
+                    break
+                
+                next_tick += interval
+                while time.monotonic() < next_tick:
+                    check_cancelled()
+                    time.sleep(min(0.2, max(0.0, next_tick - time.monotonic())))
+                if time.monotonic() - next_tick > interval:
+                    # Fell behind (e.g. a slow probe): skip the missed ticks
+                    next_tick = time.monotonic()
+        except KeyboardInterrupt:
+            print()
+        
+        self._display_watch_summary(collection_name, list(snapshots), first)
+        return True
+    
+    def _print_watch_header(self):
+        print(f"\n  {'Time':8} {'Docs':>13} {'Δ docs':>9} {'docs/s':>8} {'Written':>9} {'Deleted':>11} "
+              f"{'Δ del':>8} {'Del %':>6} {'Size':>9} {'Δ size':>9}")
+        print("  " + "-" * 98)
+    
+    def _print_watch_row(self, snapshot: Dict, previous: Optional[Dict], first: Optional[Dict]):
+        """One line per tick: absolute values with deltas and rates against the previous tick"""
+        def delta(key, fmt=lambda v: f"{v:+,}"):
+            if previous is None or snapshot[key] is None or previous[key] is None:
+                return '-'
+            change = snapshot[key] - previous[key]
+            color = Colors.GREEN if change > 0 else Colors.RED if change < 0 else Colors.WHITE
+            return f"{color}{fmt(change)}{Colors.RESET}"
+        
+        def pad(text, width):
+            # Right-align text that may contain color codes
+            visible = len(re.sub(r'\x1b\[[0-9;]*m', '', text))
+            return ' ' * max(0, width - visible) + text
+        
+        elapsed = snapshot['time'] - previous['time'] if previous else 0
+        rate = f"{(snapshot['docs'] - previous['docs']) / elapsed:,.1f}" if elapsed > 0 else '-'
+        deleted = snapshot['deleted']
+        deleted_pct = f"{deleted / snapshot['max_doc'] * 100:5.1f}%" if deleted is not None and snapshot['max_doc'] else '-'
+        size = format_bytes(snapshot['size']) if snapshot['size'] is not None else '-'
+        written = f"{snapshot['written']:,}" if snapshot['written'] is not None else '-'
+        print(f"  {time.strftime('%H:%M:%S', time.localtime(snapshot['time']))} {snapshot['docs']:>13,} "
+              f"{pad(delta('docs'), 9)} {rate:>8} {written:>9} "
+              f"{f'{deleted:,}' if deleted is not None else '-':>11} {pad(delta('deleted'), 8)} {deleted_pct:>6} "
+              f"{size:>9} {pad(delta('size', lambda v: ('+' if v >= 0 else '-') + format_bytes(abs(v))), 9)}")
+        
+        if snapshot['coverage'] and previous is not None and snapshot['written']:
+            baseline = first['coverage'] if first else {}
+            parts = []
+            for name, with_field in snapshot['coverage'].items():
+                pct = with_field / snapshot['written'] * 100
+                base = baseline.get(name, 0) / first['docs'] * 100 if first and first['docs'] else None
+                # A field missing from new documents far more often than before hints at an ingestion change
+                color = Colors.YELLOW if base is not None and pct < base - 10 else Colors.WHITE
+                parts.append(f"{color}{name} {pct:.0f}%{Colors.RESET}" + (f" (all {base:.0f}%)" if base is not None else ''))
+            print(f"           written docs with: {', '.join(parts)}")
+    
+    @traced('render')
+    def _display_watch_summary(self, collection_name: str, snapshots: List[Dict], first: Optional[Dict]):
+        """Totals and hourly rates over the watched period"""
+        self.last_result = {'collection': collection_name, 'snapshots': snapshots}
+        if not snapshots or first is None:
+            return
+        last = snapshots[-1]
+        elapsed = last['time'] - first['time']
+        print(f"\n{Colors.BOLD}'{collection_name}' over {format_duration(elapsed)} "
+              f"({len(snapshots)} snapshots kept){Colors.RESET}")
+        if elapsed <= 0:
+            print()
+            return
+        hours = elapsed / 3600
+        print(f"  Docs:     {first['docs']:,} → {last['docs']:,} ({last['docs'] - first['docs']:+,}, "
+              f"{(last['docs'] - first['docs']) / hours:+,.0f}/h)  "
+              f"{Colors.CYAN}{sparkline([s['docs'] for s in snapshots[-60:]])}{Colors.RESET}")
+        written = [s['written'] for s in snapshots if s['written'] is not None]
+        if written:
+            print(f"  Written:  {sum(written):,} ({sum(written) / hours:,.0f}/h, adds and updates)")
+        if first['deleted'] is not None and last['deleted'] is not None:
+            print(f"  Deleted:  {first['deleted']:,} → {last['deleted']:,} ({last['deleted'] - first['deleted']:+,}, "
+                  f"{(last['deleted'] - first['deleted']) / hours:+,.0f}/h)")
+        if first['size'] is not None and last['size'] is not None:
+            change = last['size'] - first['size']
+            print(f"  Size:     {format_bytes(first['size'])} → {format_bytes(last['size'])} "
+                  f"({'+' if change >= 0 else '-'}{format_bytes(abs(change))}, "
+                  f"{'+' if change >= 0 else '-'}{format_bytes(abs(change) / hours)}/h)")
+        print()
+    
+    def _field_catalog(self, collection_name: str) -> Tuple[Dict[str, Dict], str]:
+        """Fields in use with their kinds, plus a schema version for cache keys"""
+        schema_url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema')
+        luke_url = urljoin(self.base_url + '/', f'solr/{collection_name}/admin/luke')
+        schema = self._fetch_cached_json(
+            schema_url, 'schema', version_url=self._schema_version_url(collection_name),
+            projection=self.SCHEMA_SUMMARY_PROJECTION
+        )['schema']
+        type_classes = {t['name']: t.get('class', '') for t in schema.get('fieldTypes', [])}
+        
+        field_types = {f['name']: f.get('type', '') for f in schema.get('fields', [])}
+        docvalues = {f['name'] for f in schema.get('fields', []) if f.get('docValues')}
+        try:
+            # Luke also reports concrete instances of dynamic fields
+            luke = self._fetch_cached_json(luke_url, 'luke', {'numTerms': 0})
+            for name, info in luke.get('fields', {}).items():
+                field_types.setdefault(name, info.get('type', ''))
+                if 'D' in info.get('schema', ''):
+                    docvalues.add(name)
+        except Exception:
+            pass
+        
+        fields = {
+            name: {
+                'type': type_name,
+                'kind': field_kind(type_classes.get(type_name, '')),
+                'type_class': type_classes.get(type_name, ''),
+                'docvalues': name in docvalues,
+            }
+            for name, type_name in field_types.items()
+            if name not in ('_version_', '_root_', '_nest_path_', '_text_')
+        }
+        version = self._fetch_schema_version(self._schema_version_url(collection_name))
+        if version is None:
+            fingerprint = ','.join(f"{name}:{info['type']}" for name, info in sorted(fields.items()))
+            version = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+        return fields, str(version)
+    
+    def _get_translator(self) -> QueryTranslator:
+        if self.translator is None:
+            self.translator = QueryTranslator(LLMBackend.from_environment(self.transport) or RuleBasedBackend(),
+                                              self.cache)
+        return self.translator
+    
+    def use_collection(self, collection_name: str) -> bool:
+        """Select the collection natural-language questions are asked against"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        self.current_collection = collection_name
+        print(f"{Colors.GREEN}Using collection '{collection_name}'. Ask questions in plain English.{Colors.RESET}")
+        return True
+    
+    def ask(self, question: str, collection_name: Optional[str] = None) -> bool:
+        """Translate a natural-language question into a Solr query and run it"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        collection_name = collection_name or self.current_collection
+        if not collection_name:
+            print(f"{Colors.YELLOW}No collection selected. Use 'use <collection>' first.{Colors.RESET}")
+            return False
+        
+        try:
+            fields, version = self._field_catalog(collection_name)
+            translator = self._get_translator()
+            cache_prefix = urljoin(self.base_url + '/', f'solr/{collection_name}/nl-plan')
+            plan, cache_hit, elapsed = translator.translate(cache_prefix, version, question, fields)
+            
+            source = "plan cache" if cache_hit else f"{translator.backend.name} backend"
+            print(f"{Colors.CYAN}Translated via {source} in {elapsed * 1000:.1f}ms "
+                  f"(cache hit rate {translator.hit_rate:.0f}%, {translator.hits}/{translator.hits + translator.misses}){Colors.RESET}")
+            
+            params = self._plan_params(plan)
+            shown = '  '.join(
+                f"{key}={item}" for key, value in params.items()
+                for item in (value if isinstance(value, list) else [value])
+            )
+            print(f"{Colors.WHITE}Solr query: {shown}{Colors.RESET}")
+            
+            select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+            data = self._fetch_json(select_url, 'select', params)
+            self._display_query_results(data, plan)
+            return True
+            
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            elif e.response.status_code == 400:
+                print(f"{Colors.RED}Solr rejected the translated query: {e}{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"{Colors.RED}Error answering question: {e}{Colors.RESET}")
+            return False
+    
+    def _plan_params(self, plan: Dict) -> Dict:
+        """Solr request parameters for a translated plan"""
+        params = {'q': plan['q'], 'rows': plan['rows']}
+        if plan.get('qf') and plan['q'] != '*:*':
+            params['defType'] = 'edismax'
+            params['qf'] = ' '.join(plan['qf'])
+        if plan['fq']:
+            params['fq'] = plan['fq']
+        if plan['sort']:
+            params['sort'] = plan['sort']
+        if plan['fl']:
+            params['fl'] = plan['fl']
+        if plan['facet']:
+            params['facet'] = 'true'
+            params['facet.field'] = plan['facet']
+            params['facet.mincount'] = 1
+            params['facet.limit'] = 10
+        return params
+    
+    @traced('render')
+    def _display_query_results(self, data: Dict, plan: Dict):
+        """Display matching documents and facet counts"""
+        response = data.get('response', {})
+        self.last_result = {'plan': plan, 'numFound': response.get('numFound', 0),
+                            'docs': response.get('docs', []), 'facets': data.get('facets')}
+        print(f"\n{Colors.BOLD}Found {response.get('numFound', 0):,} documents{Colors.RESET}")
+        
+        for i, doc in enumerate(response.get('docs', []), 1):
+            print(f"  {i:3}. {self._format_doc_line(doc)}")
+        
+        facet_fields = data.get('facet_counts', {}).get('facet_fields', {})
+        for field_name, counts in facet_fields.items():
+            print(f"\n  {Colors.GREEN}{field_name}{Colors.RESET}:")
+            # Facet counts arrive as a flat [value, count, value, count, ...] list
+            for value, count in zip(counts[::2], counts[1::2]):
+                print(f"    {str(value)[:30]:30} {count:>10,}")
+        print()
+    
+    def _can_export(self, sort: Optional[str], fl: Optional[str], fields: Dict[str, Dict]) -> bool:
+        """/export needs an explicit sort and fl made only of docValues fields"""
+        if not sort or not fl:
+            return False
+        names = [clause.split()[0] for clause in sort.split(',') if clause.strip()]
+        names += [name.strip() for name in fl.split(',') if name.strip()]
+        return all(fields.get(name, {}).get('docvalues') for name in names)
+    
+    def _iter_cursor_query(self, collection_name: str, query: str, sort: Optional[str],
+                           fl: Optional[str], page_size: int):
+        """Yield (docs, num_found) pages via cursorMark"""
+        unique_key = self._get_unique_key(collection_name)
+        sort = sort or 'score desc'
+        if unique_key not in [clause.split()[0] for clause in sort.split(',') if clause.strip()]:
+            sort += f', {unique_key} asc'
+        params = {'q': query, 'sort': sort, 'rows': page_size}
+        if fl:
+            params['fl'] = fl
+        for docs, _, num_found in self.iter_cursor_pages(collection_name, params):
+            yield docs, num_found
+    
+    def _iter_export_query(self, collection_name: str, query: str, sort: str, fl: str, page_size: int):
+        """Yield (docs, num_found) pages decoded incrementally from the /export stream"""
+        export_url = urljoin(self.base_url + '/', f'solr/{collection_name}/export')
+        with self.transport.stream(export_url, 'export', {'q': query, 'sort': sort, 'fl': fl}) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            meta = {}
+            page = []
+            pages_sent = 0
+            for doc in stream_json_docs(response.iter_content(chunk_size=65536, decode_unicode=True), meta):
+                if 'EXCEPTION' in doc:
+                    raise RuntimeError(doc['EXCEPTION'])
+                page.append(doc)
+                if len(page) >= page_size:
+                    yield page, meta.get('numFound', 0)
+                    pages_sent += 1
+                    page = []
+            if page or not pages_sent:
+                yield page, meta.get('numFound', 0)
+    
+    def run_query(self, collection_name: str, query: str = '*:*', sort: Optional[str] = None,
+                  fl: Optional[str] = None, limit: Optional[int] = None, page_size: int = 20,
+                  export: Optional[bool] = None, interactive: bool = True) -> bool:
+        """Run a query and stream its results page by page.
+        
+        Deep result sets are read with cursorMark (next page prefetched in
+        the background) or, when sort and fl are all docValues fields, from
+        the /export stream. Only the current page is held in memory.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        try:
+            if export is None:
+                fields, _ = self._field_catalog(collection_name)
+                export = self._can_export(sort, fl, fields)
+            elif export and not (sort and fl):
+                print(f"{Colors.RED}/export requires --sort and --fl{Colors.RESET}")
+                return False
+            
+            if export:
+                pages = self._iter_export_query(collection_name, query, sort, fl, page_size)
+            else:
+                pages = self._iter_cursor_query(collection_name, query, sort, fl, page_size)
+            
+            start = time.perf_counter()
+            first_page = None
+            shown = 0
+            total = 0
+            try:
+                for docs, total in pages:
+                    check_cancelled()
+                    if first_page is None:
+                        first_page = time.perf_counter() - start
+                        print(f"\n{Colors.BOLD}Found {total:,} documents{Colors.RESET} "
+                              f"(via {'/export' if export else 'cursorMark'}, first page in {first_page * 1000:.0f}ms)")
+                    for doc in docs:
+                        shown += 1
+                        print(f"  {shown:6}. {self._format_doc_line(doc)}")
+                        if limit and shown >= limit:
+                            break
+                    if (limit and shown >= limit) or shown >= total:
+                        break
+                    if interactive:
+                        answer = read_input(f"{Colors.YELLOW}-- {shown:,}/{total:,} shown: Enter for more, q to stop --{Colors.RESET} ")
+                        if answer.strip().lower() in ('q', 'quit'):
+                            break
+            except KeyboardInterrupt:
+                print(f"\n{Colors.YELLOW}Query stopped{Colors.RESET}")
+            finally:
+                pages.close()
+            
+            elapsed = time.perf_counter() - start
+            print(f"\nShowed {shown:,} of {total:,} documents in {elapsed:.2f}s\n")
+            return True
+            
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}Query failed: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"{Colors.RED}Error running query: {e}{Colors.RESET}")
+            return False
+    
+    def _format_doc_line(self, doc: Dict) -> str:
+        """One-line rendering of a document with long values truncated"""
+        values = []
+        for key, value in doc.items():
+            if key in ('_version_', '_root_'):
+                continue
+            text = ', '.join(map(str, value)) if isinstance(value, list) else str(value)
+            values.append(f"{key}={text[:40] + '...' if len(text) > 40 else text}")
+        return '  '.join(values)
+    
+    EXPLAIN_CACHES = ('filterCache', 'queryResultCache', 'documentCache')
+    
+    def _cache_counters(self, targets: Dict[str, List[Tuple[str, bool]]]) -> Dict[str, Dict[str, float]]:
+        """Searcher cache lookups/hits/inserts summed over a collection's replicas"""
+        keys_by_node = {node_url: [f'{registry}:CACHE.searcher.{cache}' for registry, _ in registries
+                                   for cache in self.EXPLAIN_CACHES]
+                        for node_url, registries in targets.items()}
+        executor = self._get_executor()
+        futures = [executor.submit(self._node_json, node_url, 'solr/admin/metrics', 'metrics', {'key': keys}, 10.0)
+                   for node_url, keys in keys_by_node.items()]
+        totals = {cache: {'lookups': 0, 'hits': 0, 'inserts': 0} for cache in self.EXPLAIN_CACHES}
+        for future in futures:
+            data, error = future.result()
+            if error:
+                raise RuntimeError(error)
+            for key, value in data.get('metrics', {}).items():
+                cache = key.rsplit('.', 1)[-1]
+                if cache in totals and isinstance(value, dict):
+                    for counter in totals[cache]:
+                        totals[cache][counter] += value.get(counter) or 0
+        return totals
+    
+    def explain_query(self, collection_name: str, query: str, params: Optional[Dict[str, List[str]]] = None) -> bool:
+        """Run a query with debug=timing,query and show where its time goes.
+        
+        Shows the per-component prepare/process breakdown, the parsed query
+        and filters, and the searcher cache lookups it caused (read from the
+        replicas' metrics before and after, so concurrent traffic is
+        included in those counts).
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        params = dict(params or {})
+        params['q'] = [query]
+        params['debug'] = ['timing', 'query']
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        
+        try:
+            targets = self._watch_targets(collection_name)
+            before = self._cache_counters(targets)
+        except Exception:
+            targets, before = None, None
+        
+        start = time.perf_counter()
+        try:
+            response = self.transport.get(select_url, endpoint='select', params=params)
+        except requests.exceptions.RequestException as e:
+            print(f"{Colors.RED}Error running query: {e}{Colors.RESET}")
+            return False
+        elapsed = time.perf_counter() - start
+        if not response.ok:
+            try:
+                result = json_loads(response.content)
+            except ValueError:
+                result = {}
+            print(f"{Colors.RED}Query failed: {self._schema_errors(response, result)}{Colors.RESET}")
+            return False
+        data = self._decode(response, 'select', {'responseHeader': {'QTime': True},
+                                                 'response': {'numFound': True}, 'debug': True})
+        
+        caches = None
+        if before is not None:
+            try:
+                after = self._cache_counters(targets)
+                caches = {cache: {counter: after[cache][counter] - before[cache][counter] for counter in counters}
+                          for cache, counters in before.items()}
+            except Exception:
+                pass
+        
+        self._display_explain(collection_name, params, data, elapsed, caches)
+        return True
+    
+    @traced('render')
+    def _display_explain(self, collection_name: str, params: Dict[str, List[str]], data: Dict, elapsed: float,
+                         caches: Optional[Dict[str, Dict]]):
+        """Display timing breakdown, parsed query, cache use and hints for one query"""
+        debug = data.get('debug') or {}
+        timing = debug.get('timing') or {}
+        qtime = (data.get('responseHeader') or {}).get('QTime')
+        num_found = (data.get('response') or {}).get('numFound')
+        self.last_result = {'collection': collection_name, 'params': params, 'qtime': qtime, 'num_found': num_found,
+                            'elapsed': elapsed, 'debug': debug, 'caches': caches}
+        
+        print(f"\n{Colors.BOLD}Explain: '{collection_name}'{Colors.RESET} q={params['q'][0]}")
+        for fq in params.get('fq', []):
+            print(f"  fq={fq}")
+        hits = f"{num_found:,} hits, " if isinstance(num_found, int) else ''
+        print(f"  {hits}QTime {qtime}ms, {elapsed * 1000:.0f}ms round trip")
+        
+        parsed = debug.get('parsedquery_toString') or debug.get('parsedquery')
+        if parsed:
+            print(f"\n{Colors.CYAN}Parsed query{Colors.RESET} ({debug.get('QParser', 'unknown parser')})")
+            for line in format_parsed_query(str(parsed)):
+                print(f"  {line}")
+        parsed_filters = debug.get('parsed_filter_queries') or []
+        if parsed_filters:
+            print(f"\n{Colors.CYAN}Filter queries{Colors.RESET}")
+            for raw, parsed_filter in zip(debug.get('filter_queries') or params.get('fq', []), parsed_filters):
+                print(f"  {raw}" + (f"  →  {parsed_filter}" if parsed_filter != raw else ''))
+        
+        components = []
+        total = timing.get('time') or 0
+        if timing:
+            names = [name for name in timing.get('process', {}) if name != 'time']
+            names += [name for name in timing.get('prepare', {}) if name != 'time' and name not in names]
+            for name in names:
+                prepare = (timing.get('prepare', {}).get(name) or {}).get('time', 0)
+                process = (timing.get('process', {}).get(name) or {}).get('time', 0)
+                components.append((name, prepare, process))
+            components.sort(key=lambda c: c[1] + c[2], reverse=True)
+            print(f"\n{Colors.CYAN}Timing{Colors.RESET} (ms, {total:g} total)")
+            print(f"  {'Component':16} {'Prepare':>9} {'Process':>9}")
+            for name, prepare, process in components:
+                if not prepare and not process:
+                    continue
+                share = (prepare + process) / total if total else 0
+                bar = '█' * max(1, round(share * 30)) if share else ''
+                print(f"  {name:16} {prepare:9.1f} {process:9.1f}  {Colors.ORANGE}{bar}{Colors.RESET} {share:.0%}")
+        
+        if caches is not None:
+            print(f"\n{Colors.CYAN}Searcher caches during the request{Colors.RESET} (all replicas)")
+            for cache, counters in caches.items():
+                print(f"  {cache:18} {counters['lookups']:,.0f} lookups, {counters['hits']:,.0f} hits, "
+                      f"{counters['inserts']:,.0f} inserts")
+        
+        hints = self._explain_hints(params, debug, components, total, caches)
+        if hints:
+            print(f"\n{Colors.YELLOW}Hints{Colors.RESET}")
+            for hint in hints:
+                print(f"  - {hint}")
+        print()
+    
+    @staticmethod
+    def _explain_hints(params: Dict[str, List[str]], debug: Dict, components: List[Tuple[str, float, float]],
+                       total: float, caches: Optional[Dict[str, Dict]]) -> List[str]:
+        """Likely causes of slowness that can be read off the request and its debug output"""
+        hints = []
+        queries = params.get('q', []) + params.get('fq', [])
+        if any(re.search(r'(?:^|[\s(:])[*?][^\s:*)]', q) for q in queries):
+            hints.append("Leading wildcards scan the whole term dictionary; consider "
+                         "ReversedWildcardFilterFactory or an n-gram field")
+        if any(re.search(r'NOW(?![/\w])', fq) for fq in params.get('fq', [])):
+            hints.append("NOW without rounding (e.g. NOW/DAY) makes every filter query unique, "
+                         "so none are reused from the filterCache")
+        parsed = str(debug.get('parsedquery_toString') or '')
+        clauses = len(re.findall(r'[\w.]+:', parsed))
+        if clauses > 512:
+            hints.append(f"The parsed query has {clauses:,} clauses; large boolean queries are slow to score")
+        if caches and params.get('fq') and caches['filterCache']['lookups'] and not caches['filterCache']['hits']:
+            hints.append("The filter queries missed the filterCache (expected on first use; "
+                         "if it persists, check its size and evictions with 'monitor')")
+        rows = int(params.get('rows', ['10'])[0]) if params.get('rows', ['10'])[0].isdigit() else 10
+        start = int(params.get('start', ['0'])[0]) if params.get('start', ['0'])[0].isdigit() else 0
+        if rows + start > 1000:
+            hints.append("Deep paging or large rows: every shard returns start+rows sorted ids; "
+                         "use cursorMark ('query --cursor') instead")
+        if total >= 50:
+            for name, prepare, process in components:
+                share = (prepare + process) / total
+                if name == 'query' and share > 0.8:
+                    hints.append(f"Matching and scoring take {share:.0%} of the time; look for expensive "
+                                 "clauses in the parsed query")
+                elif name in ('facet', 'facet_module') and share > 0.5:
+                    hints.append(f"Faceting takes {share:.0%} of the time; fewer facet fields, smaller limits "
+                                 "or docValues on the faceted fields help")
+                elif name == 'highlight' and share > 0.3:
+                    hints.append(f"Highlighting takes {share:.0%} of the time; store term vectors or "
+                                 "use the unified highlighter with offsets")
+        return hints
+    
+    # Latency distribution edges in seconds
+    REPLAY_EDGES = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5]
+    
+    def replay_queries(self, collection_name: str, path: str, concurrency: int = 4, rate: Optional[float] = None,
+                       limit: Optional[int] = None, top: int = 10, timeout: float = 30.0) -> bool:
+        """Run captured queries against a collection and report latency by query shape.
+        
+        Queries are read lazily from the file (see iter_query_file) and sent
+        by `concurrency` workers over their own connection pool without
+        retries. With a rate, request i is sent no earlier than i/rate
+        seconds after the start; without one, workers send back to back.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        if not os.path.exists(path):
+            print(f"{Colors.RED}Query file not found: {path}{Colors.RESET}")
+            return False
+        
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        transport = SolrTransport(pool_connections=1, pool_maxsize=concurrency, retries=0)
+        queries = iter_query_file(path)
+        lock = threading.Lock()
+        stop = threading.Event()
+        overall = Histogram()
+        qtimes = Histogram()
+        shapes: Dict[str, Dict] = {}
+        errors = Counter()
+        state = {'issued': 0, 'done': 0, 'behind': 0.0}
+        
+        def worker():
+            while not stop.is_set():
+                with lock:
+                    if limit is not None and state['issued'] >= limit:
+                        return
+                    params = next(queries, None)
+                    if params is None:
+                        return
+                    index = state['issued']
+                    state['issued'] += 1
+                if rate:
+                    due = start + index / rate
+                    while not stop.is_set() and time.perf_counter() < due:
+                        time.sleep(min(0.05, due - time.perf_counter()))
+                    late = time.perf_counter() - due
+                    with lock:
+                        state['behind'] = max(state['behind'], late)
+                    if stop.is_set():
+                        return
+                
+                sent = time.perf_counter()
+                qtime = None
+                try:
+                    response = transport.get(select_url, endpoint='select', params=params,
+                                             timeout=(min(3.05, timeout), timeout))
+                    latency = time.perf_counter() - sent
+                    error = None if response.ok else f"HTTP {response.status_code}"
+                    if response.ok:
+                        header = project_json(response.content, {'responseHeader': {'QTime': True}})
+                        qtime = (header.get('responseHeader') or {}).get('QTime')
+                except KeyboardInterrupt:
+                    # Cancelled: the scope aborted this request, which is not a Solr error
+                    stop.set()
+                    return
+                except requests.exceptions.RequestException as e:
+                    if stop.is_set():
+                        return
+                    latency = time.perf_counter() - sent
+                    error = type(e).__name__
+                except ValueError:
+                    latency = time.perf_counter() - sent
+                    error = 'bad response'
+                
+                shape = request_shape(params)
+                with lock:
+                    state['done'] += 1
+                    entry = shapes.get(shape)
+                    if entry is None:
+                        entry = shapes[shape] = {'histogram': Histogram(), 'errors': 0, 'qtime': 0.0,
+                                                 'example': params}
+                    if error:
+                        errors[error] += 1
+                        entry['errors'] += 1
+                        continue
+                    overall.add(latency)
+                    entry['histogram'].add(latency)
+                    if isinstance(qtime, (int, float)):
+                        qtimes.add(qtime / 1000)
+                        entry['qtime'] += qtime
+        
+        target = f", target {rate:g} q/s" if rate else ''
+        print(f"Replaying {path} against '{collection_name}' with {concurrency} workers{target}... "
+              f"press Ctrl-C to stop")
+        start = time.perf_counter()
+        with _ContextExecutor(max_workers=concurrency, thread_name_prefix='solr-replay') as executor:
+            futures = [executor.submit(worker) for _ in range(concurrency)]
+            try:
+                while not all(future.done() for future in futures):
+                    check_cancelled()
+                    time.sleep(0.25)
+                    elapsed = max(time.perf_counter() - start, 1e-9)
+                    with lock:
+                        done, failed = state['done'], sum(errors.values())
+                        p95 = overall.percentile(95)
+                    print(f"\r{Colors.ORANGE}{done:,} queries  {done / elapsed:,.1f} q/s  "
+                          f"p95 {p95 * 1000:,.1f}ms  errors {failed:,}{Colors.RESET}   ", end="", flush=True)
+            except KeyboardInterrupt:
+                stop.set()
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+        print()
+        transport.close()
+        
+        if stop.is_set():
+            print(f"{Colors.YELLOW}Stopped; reporting the {state['done']:,} completed queries{Colors.RESET}")
+        self._display_replay(collection_name, overall, qtimes, shapes, errors, elapsed, concurrency, rate,
+                             state['behind'], top)
+        return True
+    
+    @traced('render')
+    def _display_replay(self, collection_name: str, overall: Histogram, qtimes: Histogram, shapes: Dict[str, Dict],
+                        errors: Counter, elapsed: float, concurrency: int, rate: Optional[float], behind: float,
+                        top: int):
+        """Latency distribution and the slowest query shapes of a replay"""
+        total = overall.count + sum(errors.values())
+        ranked = sorted(
+            (shape for shape in shapes.items() if shape[1]['histogram'].count),
+            key=lambda item: (item[1]['histogram'].percentile(95), item[1]['histogram'].count), reverse=True
+        )
+        self.last_result = {
+            'collection': collection_name, 'queries': total, 'elapsed': elapsed,
+            'rate': total / elapsed if elapsed else 0, 'errors': dict(errors),
+            'latency_ms': {f'p{pct}': overall.percentile(pct) * 1000 for pct in (50, 90, 95, 99)},
+            'shapes': [{'shape': shape, 'count': entry['histogram'].count, 'errors': entry['errors'],
+                        'p50_ms': entry['histogram'].percentile(50) * 1000,
+                        'p95_ms': entry['histogram'].percentile(95) * 1000,
+                        'max_ms': entry['histogram'].max * 1000,
+                        'qtime_mean_ms': entry['qtime'] / entry['histogram'].count}
+                       for shape, entry in ranked],
+        }
+        
+        achieved = total / elapsed if elapsed else 0
+        target = f", target {rate:g} q/s" if rate else ''
+        print(f"\n{Colors.BOLD}Replayed {total:,} queries against '{collection_name}' in {elapsed:.1f}s "
+              f"({achieved:,.1f} q/s{target}, concurrency {concurrency}){Colors.RESET}")
+        if rate and behind > 1 / rate:
+            print(f"  {Colors.YELLOW}Fell up to {behind:.2f}s behind the target rate; "
+                  f"more concurrency is needed to sustain it{Colors.RESET}")
+        if not overall.count:
+            print("  No successful queries\n")
+        else:
+            print("  Latency  " + "  ".join(f"p{pct} {overall.percentile(pct) * 1000:,.1f}ms" for pct in (50, 90, 95, 99))
+                  + f"  max {overall.max * 1000:,.1f}ms")
+            if qtimes.count:
+                print("  QTime    " + "  ".join(f"p{pct} {qtimes.percentile(pct) * 1000:,.0f}ms" for pct in (50, 95, 99))
+                      + "  (time spent inside Solr)")
+            
+            counts = overall.bins(self.REPLAY_EDGES)
+            widest = max(counts)
+            labels = [f"<{format_latency(self.REPLAY_EDGES[0])}"]
+            labels += [f"{format_latency(low)}-{format_latency(high)}"
+                       for low, high in zip(self.REPLAY_EDGES, self.REPLAY_EDGES[1:])]
+            labels.append(f">{format_latency(self.REPLAY_EDGES[-1])}")
+            # Trim empty bins at both ends
+            first = next(i for i, n in enumerate(counts) if n)
+            last = len(counts) - next(i for i, n in enumerate(reversed(counts)) if n)
+            print()
+            for label, n in list(zip(labels, counts))[first:last]:
+                print(f"  {label:>11} {Colors.CYAN}{'█' * round(n / widest * 40):40}{Colors.RESET} "
+                      f"{n:,} ({n / overall.count:.1%})")
+        
+        if errors:
+            print(f"\n  {Colors.RED}Errors: {sum(errors.values()):,}{Colors.RESET} "
+                  f"({', '.join(f'{name} ×{n:,}' for name, n in errors.most_common(5))})")
+        
+        if ranked:
+            print(f"\n{Colors.CYAN}Slowest query shapes{Colors.RESET} ({len(shapes):,} shapes, by p95)")
+            print(f"  {'#':>3} {'Count':>7} {'p50':>10} {'p95':>10} {'Max':>10} {'QTime':>8}  Shape")
+            for rank, (shape, entry) in enumerate(ranked[:top], 1):
+                histogram = entry['histogram']
+                print(f"  {rank:3} {histogram.count:7,} {histogram.percentile(50) * 1000:8.1f}ms "
+                      f"{histogram.percentile(95) * 1000:8.1f}ms {histogram.max * 1000:8.1f}ms "
+                      f"{entry['qtime'] / histogram.count:6.0f}ms  {shape[:120]}")
+                example = entry['example'].get('q', [''])[0]
+                if example:
+                    print(f"  {'':55}e.g. q={example[:100]}")
+        print()
+    
+    LOG_BUCKET_MINUTES = (1, 5, 15, 30, 60, 180, 360, 720, 1440)
+    LOG_COMPRESSED = ('.gz', '.zip', '.bz2', '.xz', '.zst')
+    
+    def _log_files(self, path: Optional[str]) -> Optional[List[str]]:
+        """Log files named by a file, directory or glob; the server's log directory by default"""
+        if path is None:
+            log_dir = self.solr_info.get('solr_log_dir')
+            if not log_dir or not os.path.isdir(log_dir):
+                where = f" (Solr writes them to {log_dir} on its host)" if log_dir else ''
+                print(f"{Colors.RED}No local log directory found{where}. "
+                      f"Copy the logs here and run 'logs <path>'.{Colors.RESET}")
+                return None
+            path = log_dir
+        if os.path.isdir(path):
+            candidates = [os.path.join(path, name) for name in sorted(os.listdir(path)) if '.log' in name]
+        elif os.path.exists(path):
+            candidates = [path]
+        else:
+            candidates = sorted(glob.glob(path))
+        candidates = [candidate for candidate in candidates if os.path.isfile(candidate)]
+        compressed = [candidate for candidate in candidates if candidate.endswith(self.LOG_COMPRESSED)]
+        files = [candidate for candidate in candidates if candidate not in compressed and os.path.getsize(candidate)]
+        if compressed:
+            print(f"{Colors.YELLOW}Skipping {len(compressed)} compressed file(s); "
+                  f"decompress them to include them{Colors.RESET}")
+        if not files:
+            print(f"{Colors.RED}No log files found at {path}{Colors.RESET}")
+            return None
+        return files
+    
+    def _scan_logs(self, index: LogIndex, work: List[Tuple[int, str, int, int]], workers: int) -> int:
+        """Scan (file id, path, start, end) chunks into the index; returns the bytes scanned.
+        
+        Chunks are parsed by a process pool with at most two per worker in
+        flight, and committed in file order so that a cancelled scan leaves
+        every file indexed up to a chunk boundary and resumes from there.
+        """
+        total = sum(end - start for _, _, start, end in work)
+        done = 0
+        
+        def progress():
+            print(f"\r  Scanning {format_bytes(done)} of {format_bytes(total)} ({done / total:.0%})", end='', flush=True)
+        
+        workers = max(1, min(workers, len(work)))
+        try:
+            if workers == 1:
+                for file_id, path, start, end in work:
+                    check_cancelled()
+                    index.add_chunk(file_id, start, end, scan_log_chunk(path, start, end))
+                    done += end - start
+                    progress()
+                return done
+            
+            from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+            pool = ProcessPoolExecutor(max_workers=workers)
+            pending = {}
+            ready = {}
+            submitted = committed = 0
+            try:
+                while committed < len(work):
+                    while submitted < len(work) and submitted - committed < workers * 2:
+                        _, path, start, end = work[submitted]
+                        pending[pool.submit(scan_log_chunk, path, start, end)] = submitted
+                        submitted += 1
+                    finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    check_cancelled()
+                    for future in finished:
+                        ready[pending.pop(future)] = future.result()
+                    while committed in ready:
+                        file_id, _, start, end = work[committed]
+                        index.add_chunk(file_id, start, end, ready.pop(committed))
+                        done += end - start
+                        committed += 1
+                    progress()
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+            return done
+        finally:
+            print('\r' + ' ' * 60 + '\r', end='')
+    
+    def _log_time_bound(self, value: Optional[str], newest: Optional[str]) -> Optional[str]:
+        """A 'YYYY-MM-DD[ HH:MM]' bound, or one relative to the newest indexed minute (30m, 6h, 2d)"""
+        if not value:
+            return None
+        relative = re.fullmatch(r'(\d+)([mhd])', value)
+        if relative:
+            if newest is None:
+                return None
+            minutes = int(relative.group(1)) * {'m': 1, 'h': 60, 'd': 1440}[relative.group(2)]
+            stamp = calendar.timegm(time.strptime(newest, '%Y-%m-%d %H:%M')) - (minutes - 1) * 60
+            return time.strftime('%Y-%m-%d %H:%M', time.gmtime(stamp))
+        return value.replace('T', ' ')
+    
+    @staticmethod
+    def _log_minute(minute: str) -> int:
+        return calendar.timegm(time.strptime(minute, '%Y-%m-%d %H:%M')) // 60
+    
+    def analyze_logs(self, path: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                     collection: Optional[str] = None, bucket: Optional[int] = None, top: int = 10,
+                     workers: Optional[int] = None, rebuild: bool = False, index: Optional[LogIndex] = None) -> bool:
+        """Report slow handlers, QTime over time, error bursts and GC pauses from Solr logs.
+        
+        Logs are parsed once into a per-minute index (see LogIndex); later
+        runs only scan what was appended since, so reports over days of logs
+        cost a scan of the new tail plus SQL over the aggregates. Request
+        lines come from the o.a.s.c.S.Request logger (INFO), GC pauses from
+        solr_gc.log. Timestamps are compared as written, in the server's zone.
+        """
+        files = self._log_files(path)
+        if files is None:
+            return False
+        if index is None:
+            try:
+                index = LogIndex(os.path.join(STATE_DIR, 'logs.sqlite'))
+            except (OSError, sqlite3.Error) as e:
+                print(f"{Colors.YELLOW}Log index unavailable ({e}); this run is not saved{Colors.RESET}")
+                index = LogIndex(':memory:')
+        
+        try:
+            work = []
+            file_ids = []
+            reused = 0
+            for file_path in files:
+                file_id, indexed_end = index.file_state(file_path)
+                if rebuild and indexed_end:
+                    index.forget(file_id)
+                    file_id, indexed_end = index.file_state(file_path)
+                file_ids.append(file_id)
+                reused += indexed_end
+                work.extend((file_id, file_path, start, end) for start, end in log_chunks(file_path, indexed_end))
+            
+            start_time = time.perf_counter()
+            scanned = self._scan_logs(index, work, workers or os.cpu_count() or 1) if work else 0
+            elapsed = time.perf_counter() - start_time
+            
+            newest = max((row[0] for table in ('requests', 'errors', 'gc')
+                          for row in index.select(table, 'MAX(minute)', file_ids) if row[0]), default=None)
+            since = self._log_time_bound(since, newest)
+            until = self._log_time_bound(until, newest)
+            requests_rows = index.select('requests', 'minute, collection, handler, count, qtime_sum, qtime_max, '
+                                         'errors, buckets', file_ids, since, until, collection)
+            error_rows = index.select('errors', 'minute, collection, kind, count, sample', file_ids,
+                                      since, until, collection)
+            gc_rows = index.select('gc', 'minute, count, total_ms, max_ms', file_ids, since, until)
+            slow_rows = index.select('slow', 'qtime, time, collection, handler, hits, status, params', file_ids,
+                                     since, until, collection, suffix=f'ORDER BY qtime DESC LIMIT {top * 4}')
+        except sqlite3.Error as e:
+            print(f"\n{Colors.RED}Log index error: {e}. Run with --rebuild to start over.{Colors.RESET}")
+            return False
+        except OSError as e:
+            print(f"\n{Colors.RED}Error reading logs: {e}{Colors.RESET}")
+            return False
+        finally:
+            index.close()
+        
+        self._display_logs(files, scanned, reused, elapsed, requests_rows, error_rows, gc_rows, slow_rows,
+                           bucket, top)
+        return True
+    
+    @traced('render')
+    def _display_logs(self, files: List[str], scanned: int, reused: int, elapsed: float, requests_rows: List[Tuple],
+                      error_rows: List[Tuple], gc_rows: List[Tuple], slow_rows: List[Tuple],
+                      bucket: Optional[int], top: int):
+        """Handler, timeline, error burst, GC and slowest request sections of a log report"""
+        minutes = sorted({row[0] for row in requests_rows} | {row[0] for row in error_rows} |
+                         {row[0] for row in gc_rows})
+        rate = f", {scanned / elapsed / 1024 ** 2:,.0f} MB/s" if scanned and elapsed else ''
+        print(f"\n{Colors.BOLD}Logs: {len(files)} file(s), {format_bytes(scanned + reused)}{Colors.RESET} "
+              f"(scanned {format_bytes(scanned)} in {elapsed:.1f}s{rate}; {format_bytes(reused)} from the index)")
+        self.last_result = {'files': files, 'scanned_bytes': scanned, 'indexed_bytes': reused, 'elapsed': elapsed,
+                            'from': minutes[0] if minutes else None, 'to': minutes[-1] if minutes else None}
+        if not minutes:
+            print("  No request, error or GC lines in this range\n")
+            return
+        span = self._log_minute(minutes[-1]) - self._log_minute(minutes[0]) + 1
+        print(f"  {minutes[0]} to {minutes[-1]} ({format_duration(span * 60)})")
+        
+        # Handlers by p95
+        handlers: Dict[Tuple[str, str], Dict] = {}
+        timeline: Dict[int, Dict] = {}
+        bucket = bucket or next((size for size in self.LOG_BUCKET_MINUTES if span / size <= 48),
+                                self.LOG_BUCKET_MINUTES[-1])
+        for minute, collection, handler, count, qtime_sum, qtime_max, errors, buckets in requests_rows:
+            buckets = {int(key): n for key, n in json_loads(buckets).items()}
+            for key, table in (((collection, handler), handlers), (self._log_minute(minute) // bucket, timeline)):
+                entry = table.get(key)
+                if entry is None:
+                    entry = table[key] = {'histogram': Histogram(floor=1.0), 'errors': 0}
+                entry['histogram'].merge(buckets, qtime_sum, qtime_max)
+                entry['errors'] += errors
+        ranked = sorted(handlers.items(), key=lambda item: item[1]['histogram'].percentile(95), reverse=True)
+        total_requests = sum(entry['histogram'].count for entry in handlers.values())
+        self.last_result['handlers'] = [
+            {'collection': collection, 'handler': handler, 'requests': entry['histogram'].count,
+             'errors': entry['errors'], 'mean_ms': entry['histogram'].mean,
+             **{f'p{pct}_ms': entry['histogram'].percentile(pct) for pct in (50, 95, 99)},
+             'max_ms': entry['histogram'].max}
+            for (collection, handler), entry in ranked
+        ]
+        if ranked:
+            print(f"\n{Colors.CYAN}Slowest handlers{Colors.RESET} ({total_requests:,} requests, by p95 QTime)")
+            print(f"  {'Collection':24} {'Handler':24} {'Requests':>10} {'Errors':>7} {'p50':>8} {'p95':>8} "
+                  f"{'p99':>8} {'Max':>8}")
+            for (collection, handler), entry in ranked[:top]:
+                histogram = entry['histogram']
+                errors = f"{Colors.RED}{entry['errors']:7,}{Colors.RESET}" if entry['errors'] else f"{0:7}"
+                print(f"  {collection[:24] or '-':24} {handler[:24]:24} {histogram.count:10,} {errors} "
+                      + ' '.join(f"{format_millis(histogram.percentile(pct)):>8}" for pct in (50, 95, 99))
+                      + f" {format_millis(histogram.max):>8}")
+            if len(ranked) > top:
+                print(f"  ... {len(ranked) - top} more")
+        
+        # QTime over time
+        if timeline:
+            keys = sorted(timeline)
+            self.last_result['timeline'] = [
+                {'from': time.strftime('%Y-%m-%d %H:%M', time.gmtime(key * bucket * 60)),
+                 'requests': timeline[key]['histogram'].count, 'errors': timeline[key]['errors'],
+                 'p50_ms': timeline[key]['histogram'].percentile(50),
+                 'p95_ms': timeline[key]['histogram'].percentile(95), 'max_ms': timeline[key]['histogram'].max}
+                for key in keys
+            ]
+            label = f"{bucket}m" if bucket < 60 else f"{bucket // 60}h"
+            print(f"\n{Colors.CYAN}QTime over time{Colors.RESET} ({label} buckets)")
+            print(f"  {'From':16} {'Requests':>10} {'Errors':>7} {'p50':>8} {'p95':>8} {'Max':>8}")
+            shown = self.last_result['timeline'][-48:]
+            if len(keys) > len(shown):
+                print(f"  ... {len(keys) - len(shown)} earlier buckets (see --json)")
+            slowest = max(row['p95_ms'] for row in shown)
+            for row in shown:
+                p95 = f"{format_millis(row['p95_ms']):>8}"
+                if row['p95_ms'] == slowest and len(shown) > 1:
+                    p95 = f"{Colors.YELLOW}{p95}{Colors.RESET}"
+                errors = f"{Colors.RED}{row['errors']:7,}{Colors.RESET}" if row['errors'] else f"{0:7}"
+                print(f"  {row['from']:16} {row['requests']:10,} {errors} {format_millis(row['p50_ms']):>8} "
+                      f"{p95} {format_millis(row['max_ms']):>8}")
+            if len(shown) > 1:
+                print(f"  requests {sparkline([row['requests'] for row in shown])}  "
+                      f"p95 {sparkline([row['p95_ms'] for row in shown])}")
+        
+        # Error bursts: minutes well above the usual error rate, adjacent minutes merged
+        per_minute = Counter()
+        kinds: Dict[str, Dict] = {}
+        for minute, collection, kind, count, sample in error_rows:
+            per_minute[minute] += count
+            entry = kinds.setdefault(kind, {'count': 0, 'collections': set(), 'first': minute, 'last': minute,
+                                            'sample': sample})
+            entry['count'] += count
+            if collection:
+                entry['collections'].add(collection)
+            entry['first'] = min(entry['first'], minute)
+            entry['last'] = max(entry['last'], minute)
+        bursts = []
+        if per_minute:
+            mean = sum(per_minute.values()) / span
+            deviation = math.sqrt(max(0.0, sum(n * n for n in per_minute.values()) / span - mean * mean))
+            threshold = max(5.0, mean + 3 * deviation)
+            for minute in sorted(m for m, n in per_minute.items() if n >= threshold):
+                at = self._log_minute(minute)
+                if bursts and at - bursts[-1]['end_at'] <= 1:
+                    burst = bursts[-1]
+                else:
+                    burst = {'start': minute, 'errors': 0, 'peak': 0, 'kinds': Counter()}
+                    bursts.append(burst)
+                burst.update(end=minute, end_at=at)
+                burst['errors'] += per_minute[minute]
+                burst['peak'] = max(burst['peak'], per_minute[minute])
+            for burst in bursts:
+                for minute, _, kind, count, _ in error_rows:
+                    if burst['start'] <= minute <= burst['end']:
+                        burst['kinds'][kind] += count
+            bursts.sort(key=lambda burst: burst['errors'], reverse=True)
+            
+            print(f"\n{Colors.CYAN}Errors{Colors.RESET} ({sum(per_minute.values()):,} in {len(per_minute):,} minutes)")
+            if bursts:
+                print(f"  {Colors.RED}{len(bursts)} burst(s){Colors.RESET} above {threshold:,.0f} errors/minute:")
+                for burst in bursts[:top]:
+                    length = (burst['end_at'] - self._log_minute(burst['start']) + 1)
+                    print(f"    {burst['start']} +{length}m  {burst['errors']:,} errors (peak {burst['peak']:,}/min)  "
+                          + ', '.join(f"{kind} ×{n:,}" for kind, n in burst['kinds'].most_common(3)))
+            for kind, entry in sorted(kinds.items(), key=lambda item: item[1]['count'], reverse=True)[:top]:
+                where = ', '.join(sorted(entry['collections'])[:3])
+                print(f"  {entry['count']:9,}  {Colors.RED}{kind}{Colors.RESET}"
+                      f"{f' ({where})' if where else ''}  {entry['first']} to {entry['last'][11:]}")
+                print(f"             {entry['sample'][:110]}")
+        self.last_result['errors'] = [{'kind': kind, 'count': entry['count'], 'collections': sorted(entry['collections']),
+                                       'first': entry['first'], 'last': entry['last'], 'sample': entry['sample']}
+                                      for kind, entry in kinds.items()]
+        self.last_result['error_bursts'] = [{'start': burst['start'], 'end': burst['end'], 'errors': burst['errors'],
+                                             'peak_per_minute': burst['peak'], 'kinds': dict(burst['kinds'])}
+                                            for burst in bursts]
+        
+        # GC pauses, with the worst minutes next to the slowest request logged in them
+        if gc_rows:
+            pauses = sum(row[1] for row in gc_rows)
+            paused = sum(row[2] for row in gc_rows)
+            worst = sorted(gc_rows, key=lambda row: row[2], reverse=True)[:5]
+            slowest_by_minute = {}
+            for minute, _, _, _, _, qtime_max, _, _ in requests_rows:
+                slowest_by_minute[minute] = max(slowest_by_minute.get(minute, 0), qtime_max)
+            print(f"\n{Colors.CYAN}GC pauses{Colors.RESET} ({pauses:,} pauses, {format_duration(paused / 1000)} paused, "
+                  f"{paused / (span * 60_000):.2%} of the time, longest {format_millis(max(row[3] for row in gc_rows))})")
+            for minute, count, total_ms, max_ms in worst:
+                qtime = slowest_by_minute.get(minute)
+                context = f"  slowest request {format_millis(qtime)}" if qtime is not None else ''
+                print(f"  {minute}  {count:5,} pauses  {format_millis(total_ms):>8} total  "
+                      f"{format_millis(max_ms):>8} longest{context}")
+            self.last_result['gc'] = {'pauses': pauses, 'paused_ms': paused,
+                                      'worst_minutes': [dict(zip(('minute', 'pauses', 'total_ms', 'max_ms'), row))
+                                                        for row in worst]}
+        
+        # Slowest requests; the SlowRequest logger repeats some of them
+        seen = set()
+        slowest = []
+        for qtime, when, collection, handler, hits, status, params in slow_rows:
+            key = (when, handler, qtime, params)
+            if key not in seen:
+                seen.add(key)
+                slowest.append({'qtime_ms': qtime, 'time': when, 'collection': collection, 'handler': handler,
+                                'hits': hits, 'status': status, 'params': params})
+        slowest = slowest[:top]
+        self.last_result['slowest'] = slowest
+        if slowest:
+            print(f"\n{Colors.CYAN}Slowest requests{Colors.RESET}")
+            for request in slowest:
+                status = f" {Colors.RED}status={request['status']}{Colors.RESET}" if request['status'] else ''
+                hits = f" hits={request['hits']:,}" if request['hits'] is not None else ''
+                print(f"  {format_millis(request['qtime_ms']):>8}  {request['time']}  "
+                      f"{request['collection'] or '-'} {request['handler']}{hits}{status}")
+                print(f"            {request['params'][:110]}")
+        print()
+    
+    CACHE_NAMES = ('filterCache', 'queryResultCache', 'documentCache', 'perSegFilter')
+    CACHE_METRIC_PREFIXES = ['CACHE.searcher.', 'SEARCHER.searcher.warmupTime', 'SEARCHER.searcher.searcherName']
+    CACHE_COUNTERS = ('lookups', 'hits', 'inserts', 'evictions')
+    # newSearcher listener installed by `caches <collection> --warm FILE --apply`
+    WARMING_LISTENER = 'solr-assistant-warming'
+    
+    def _cache_sample(self, node_urls: List[str], cloud: bool, match, timeout: float) -> Tuple[Dict[str, Dict], List[Dict]]:
+        """Searcher cache and warmup metrics of every core whose collection matches, one request per node.
+        
+        Returns ({registry: {'collection', 'node', 'caches', 'warmup_ms', 'searcher'}}, node errors).
+        """
+        params = {'group': 'core', 'prefix': ','.join(self.CACHE_METRIC_PREFIXES)}
+        executor = self._get_executor()
+        futures = [(node_url, executor.submit(self._node_json, node_url, 'solr/admin/metrics', 'metrics', params, timeout))
+                   for node_url in node_urls]
+        cores, errors = {}, []
+        for node_url, future in futures:
+            data, error = future.result()
+            node = urlparse(node_url).netloc
+            if error:
+                errors.append({'node': node, 'error': error})
+                continue
+            for registry, values in data.get('metrics', {}).items():
+                if not registry.startswith('solr.core.'):
+                    continue
+                name = registry[len('solr.core.'):]
+                # Cloud registries are solr.core.<collection>.<shard>.<replica>
+                collection = name.split('.', 1)[0] if cloud else name
+                if not match(collection):
+                    continue
+                cores[registry] = {
+                    'collection': collection, 'node': node,
+                    'caches': {cache: values[f'CACHE.searcher.{cache}'] for cache in self.CACHE_NAMES
+                               if isinstance(values.get(f'CACHE.searcher.{cache}'), dict)},
+                    'warmup_ms': values.get('SEARCHER.searcher.warmupTime'),
+                    'searcher': values.get('SEARCHER.searcher.searcherName'),
+                }
+        return cores, errors
+    
+    def _cache_delta(self, before: Optional[Dict], after: Dict) -> Dict[str, int]:
+        """Counter changes of one cache between two samples, or its lifetime counters without a first sample.
+        
+        The cumulative_* counters survive new searchers; the plain ones
+        restart with each searcher, so a counter that went down is read as
+        counted from zero.
+        """
+        delta = {}
+        for counter in self.CACHE_COUNTERS:
+            now = after.get(f'cumulative_{counter}', after.get(counter)) or 0
+            then = (before.get(f'cumulative_{counter}', before.get(counter)) or 0) if before else 0
+            delta[counter] = now - then if now >= then else now
+        return delta
+    
+    def _cache_config(self, collection_name: str) -> Dict[str, Dict]:
+        """Configured size and autowarmCount per cache from the Config API; empty when unavailable"""
+        url = urljoin(self.base_url + '/', f'solr/{collection_name}/config/query')
+        try:
+            query = self._fetch_json(url, 'config').get('config', {}).get('query', {})
+        except (requests.exceptions.RequestException, ValueError):
+            return {}
+        return {cache: query[cache] for cache in self.CACHE_NAMES if isinstance(query.get(cache), dict)}
+    
+    @staticmethod
+    def _cache_advice(cache: str, row: Dict, config: Dict) -> List[str]:
+        """Size and autowarm suggestions for one cache of a collection"""
+        advice = []
+        if not row['lookups']:
+            return advice
+        try:
+            limit = int(config.get('size'))
+        except (TypeError, ValueError):
+            limit = None
+        autowarm = str(config.get('autowarmCount', '')).strip()
+        ratio = row['hit_ratio']
+        per_core = row['entries'] / row['cores']
+        entry_bytes = row['ram_bytes'] / row['entries'] if row['entries'] else 0
+        
+        if row['inserts'] and row['evictions'] >= row['inserts'] * 0.2 and ratio < 0.9:
+            # Entries are pushed out before they are reused
+            churn = f"{row['evictions'] / row['inserts']:.0%} of inserts evict an entry"
+            if limit:
+                heap = f" (about {format_bytes(entry_bytes * limit * row['cores'])} more heap)" if entry_bytes else ''
+                advice.append(f"{churn}: raise size {limit:,} -> {limit * 2:,}{heap}")
+            else:
+                advice.append(f"{churn}: raise its size")
+        elif ratio < 0.2 and row['lookups'] >= 100:
+            advice.append(f"hit ratio {ratio:.0%}: " + {
+                'filterCache': "filters rarely repeat; round date math (NOW/DAY) or send one-off filters "
+                               "as {!cache=false}",
+                'queryResultCache': "queries rarely repeat, so a larger queryResultCache will not help",
+                'documentCache': "documents are rarely re-read; keep documentCache small",
+            }.get(cache, "entries are rarely reused"))
+        elif ratio >= 0.95 and limit and not row['evictions'] and per_core * 4 < limit:
+            smaller = max(64, 2 ** math.ceil(math.log2(max(per_core, 1) * 2)))
+            advice.append(f"hit ratio {ratio:.0%} with {per_core / limit:.0%} of the size in use: "
+                          f"size {limit:,} -> {smaller:,} frees heap")
+        
+        if cache in ('filterCache', 'queryResultCache'):
+            if row['warmup_ms'] >= 2000:
+                advice.append(f"autowarming takes {format_millis(row['warmup_ms'])} per new searcher: "
+                              f"lower autowarmCount ({autowarm or 'unknown'})")
+            elif autowarm in ('0', '0%') and ratio < 0.5:
+                advice.append("starts cold after every commit (autowarmCount 0): set autowarmCount, e.g. 32, "
+                              "or add warming queries with --warm <query file>")
+        return advice
+    
+    def _warming_queries(self, path: str, limit: int) -> List[Tuple[Dict[str, str], int]]:
+        """The filters, sorts and exact queries repeated most often in a query file, as warming queries.
+        
+        Each filter becomes a rows=0 match-all query with that one fq, so
+        it fills the filterCache entry every query using it shares; each
+        sort warms the sort field; queries with at most one filter that
+        recur as a whole are kept for the queryResultCache.
+        """
+        counts = Counter()
+        for params in iter_query_file(path):
+            filters = params.get('fq', [])
+            sorts = params.get('sort', [])[:1]
+            for fq in filters:
+                counts[(('q', '*:*'), ('fq', fq), ('rows', '0'))] += 1
+            for sort in sorts:
+                counts[(('q', '*:*'), ('sort', sort), ('rows', '0'))] += 1
+            q = params.get('q', [''])[0]
+            if q and len(filters) <= 1 and (q != '*:*' or sorts):
+                counts[(('q', q),) + tuple(('fq', fq) for fq in filters) + tuple(('sort', s) for s in sorts)] += 1
+        # One-offs would only fill the caches with entries nobody reads
+        return [(dict(key), count) for key, count in counts.most_common(limit) if count >= 2]
+    
+    def _run_warming(self, select_url: str, queries: List[Dict[str, str]]) -> Dict:
+        """Run the warming queries twice: summed QTime of each pass and the number that failed"""
+        passes = [0, 0]
+        failed = 0
+        for number in range(2):
+            for query in queries:
+                check_cancelled()
+                response = self.transport.get(select_url, endpoint='select', params=query)
+                if not response.ok:
+                    failed += number == 0
+                    continue
+                data = self._decode(response, 'select', {'responseHeader': {'QTime': True}})
+                passes[number] += (data.get('responseHeader') or {}).get('QTime') or 0
+        return {'first_pass_ms': passes[0], 'second_pass_ms': passes[1], 'failed': failed}
+    
+    def _install_warming(self, collection_name: str, listener: Dict) -> Optional[str]:
+        """Add or replace the warming listener through the Config API; returns an error message"""
+        config_url = urljoin(self.base_url + '/', f'solr/{collection_name}/config')
+        existing = self._fetch_json(config_url + '/listener', 'config').get('config', {}).get('listener') or []
+        if isinstance(existing, dict):
+            existing = list(existing.values())
+        command = ('update-listener' if any(isinstance(item, dict) and item.get('name') == listener['name']
+                                            for item in existing) else 'add-listener')
+        response = self.transport.post(config_url, 'config', data=json.dumps({command: listener}).encode('utf-8'),
+                                       headers={'Content-Type': 'application/json'})
+        try:
+            result = json_loads(response.content)
+        except ValueError:
+            result = {}
+        if not response.ok or result.get('errors') or result.get('error'):
+            return self._schema_errors(response, result)
+        return None
+    
+    def cache_report(self, pattern: Optional[str] = None, interval: float = 30.0, warm_file: Optional[str] = None,
+                     apply: bool = False, top: int = 20, timeout: float = 10.0) -> bool:
+        """Hit ratio, evictions, warmup time and RAM of the searcher caches, with size and autowarm advice.
+        
+        Every core's CACHE.searcher.* and searcher warmup metrics are read
+        with one metrics request per live node, twice `interval` seconds
+        apart, so ratios and rates describe current traffic rather than
+        everything since startup (interval 0 or Ctrl-C while waiting falls
+        back to lifetime counters). With warm_file, the filters and queries
+        repeated most often in a captured query file become a warming set
+        for one collection, which is run twice to show what warming saves;
+        apply installs it as a newSearcher listener, commits, and compares
+        the searcher warmup time before and after.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        if warm_file and not pattern:
+            print(f"{Colors.RED}--warm needs the collection to warm{Colors.RESET}")
+            return False
+        if warm_file and not os.path.exists(warm_file):
+            print(f"{Colors.RED}Query file not found: {warm_file}{Colors.RESET}")
+            return False
+        
+        try:
+            node_urls, cloud = self._live_node_urls(), True
+        except requests.exceptions.HTTPError:
+            # Standalone Solr rejects Collections API calls
+            node_urls, cloud = [self.base_url], False
+        except Exception as e:
+            print(f"{Colors.RED}Error reading cluster status: {e}{Colors.RESET}")
+            return False
+        
+        if warm_file:
+            match = lambda name: name == pattern
+        elif pattern and any(c in pattern for c in '*?['):
+            match = lambda name: fnmatch.fnmatchcase(name, pattern)
+        else:
+            match = lambda name: not pattern or pattern in name
+        
+        first, errors = self._cache_sample(node_urls, cloud, match, timeout)
+        if not first:
+            for error in errors:
+                print(f"{Colors.RED}{error['node']}: {error['error']}{Colors.RESET}")
+            print(f"{Colors.YELLOW}No cores matching '{pattern}'{Colors.RESET}" if pattern else
+                  f"{Colors.YELLOW}No cores reported searcher cache metrics{Colors.RESET}")
+            return not errors
+        
+        second, window = None, None
+        if interval > 0:
+            print(f"Sampled {len(first):,} cores on {len(node_urls)} node{'s' if len(node_urls) != 1 else ''}; "
+                  f"sampling again in {interval:g}s (Ctrl-C to use lifetime counters)...")
+            taken = time.monotonic()
+            try:
+                while time.monotonic() < taken + interval:
+                    check_cancelled()
+                    time.sleep(min(0.2, max(0.0, taken + interval - time.monotonic())))
+                second, more_errors = self._cache_sample(node_urls, cloud, match, timeout)
+                window = time.monotonic() - taken
+                errors += more_errors
+            except KeyboardInterrupt:
+                print(f"{Colors.YELLOW}Interrupted; using lifetime counters{Colors.RESET}")
+        
+        cores = {}
+        collections: Dict[str, Dict] = {}
+        for registry, after in (second or first).items():
+            before = first.get(registry) if second is not None else None
+            if second is not None and before is None:
+                # Core created between the samples: no baseline to compare with
+                continue
+            core = {'collection': after['collection'], 'node': after['node'], 'warmup_ms': after['warmup_ms'],
+                    'caches': {}}
+            collection = collections.setdefault(after['collection'], {'cores': 0, 'warmup_ms': 0, 'caches': {}})
+            collection['cores'] += 1
+            if isinstance(after['warmup_ms'], (int, float)):
+                collection['warmup_ms'] = max(collection['warmup_ms'], after['warmup_ms'])
+            for cache, values in after['caches'].items():
+                delta = self._cache_delta(before['caches'].get(cache, {}) if before else None, values)
+                core['caches'][cache] = delta
+                row = collection['caches'].setdefault(cache, dict.fromkeys(
+                    self.CACHE_COUNTERS + ('entries', 'ram_bytes', 'warmup_ms', 'cores'), 0))
+                for counter, value in delta.items():
+                    row[counter] += value
+                row['entries'] += values.get('size') or 0
+                row['ram_bytes'] += values.get('ramBytesUsed') or 0
+                row['warmup_ms'] = max(row['warmup_ms'], values.get('warmupTime') or 0)
+                row['cores'] += 1
+            cores[registry] = core
+        
+        # Busiest collections first; config is only read for the ones shown
+        ranked = sorted(collections, key=lambda name: -sum(row['lookups'] for row in collections[name]['caches'].values()))
+        shown = ranked[:top]
+        executor = self._get_executor()
+        configs = dict(zip(shown, executor.map(self._cache_config, shown)))
+        for name in shown:
+            collection = collections[name]
+            collection['advice'] = []
+            for cache, row in collection['caches'].items():
+                row['hit_ratio'] = row['hits'] / row['lookups'] if row['lookups'] else None
+                row['eviction_pct'] = row['evictions'] / row['inserts'] if row['inserts'] else None
+                row['evictions_per_s'] = row['evictions'] / window if window else None
+                config = configs[name].get(cache, {})
+                row['size_limit'] = config.get('size')
+                row['autowarm_count'] = config.get('autowarmCount')
+                collection['advice'] += [(cache, advice) for advice in self._cache_advice(cache, row, config)]
+        
+        self._display_caches(shown, collections, len(collections), window, errors)
+        self.last_result = {
+            'window_s': window, 'errors': errors, 'cores': cores,
+            'collections': [dict(collections[name], collection=name,
+                                 advice=[f"{cache}: {advice}" for cache, advice in collections[name]['advice']])
+                            for name in shown],
+        }
+        if warm_file:
+            warming = self._warm_collection(pattern, warm_file, top, apply, first, node_urls, cloud, match, timeout)
+            if warming is None:
+                return False
+            self.last_result['warming'] = warming
+        return True
+    
+    def _warm_collection(self, collection_name: str, path: str, top: int, apply: bool, before: Dict[str, Dict],
+                         node_urls: List[str], cloud: bool, match, timeout: float) -> Optional[Dict]:
+        """Build and run the warming set for one collection, and install it when asked"""
+        picked = self._warming_queries(path, top)
+        if not picked:
+            print(f"{Colors.YELLOW}No filter or query repeats in {path}; nothing worth warming{Colors.RESET}\n")
+            return {'queries': []}
+        queries = [query for query, _ in picked]
+        print(f"{Colors.CYAN}Warming set{Colors.RESET} ({len(queries)} queries from {os.path.basename(path)})")
+        for query, count in picked:
+            shown = '  '.join(f"{name}={value}" for name, value in query.items() if name != 'rows')
+            print(f"  {count:7,}x  {shown[:100]}")
+        
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        try:
+            timing = self._run_warming(select_url, queries)
+        except requests.exceptions.RequestException as e:
+            print(f"{Colors.RED}Error running warming queries: {e}{Colors.RESET}")
+            return None
+        saved = timing['first_pass_ms'] - timing['second_pass_ms']
+        failed = f", {Colors.RED}{timing['failed']} failed{Colors.RESET}" if timing['failed'] else ''
+        print(f"\n  First pass {timing['first_pass_ms']:,}ms, second pass {timing['second_pass_ms']:,}ms: warming "
+              f"saves about {max(saved, 0):,}ms of QTime for the first queries after a commit{failed}")
+        
+        listener = {'name': self.WARMING_LISTENER, 'event': 'newSearcher', 'class': 'solr.QuerySenderListener',
+                    'queries': queries}
+        result = dict(timing, queries=queries)
+        if not apply:
+            config_url = urljoin(self.base_url + '/', f'solr/{collection_name}/config')
+            print("\n  Install it with the Config API (or rerun with --apply):")
+            print(f"  curl -X POST -H 'Content-Type: application/json' {config_url} "
+                  f"-d {shlex.quote(json.dumps({'add-listener': listener}))}\n")
+            return result
+        
+        try:
+            error = self._install_warming(collection_name, listener)
+            if error:
+                print(f"{Colors.RED}Config API rejected the listener: {error}{Colors.RESET}")
+                return None
+            print(f"  Installed newSearcher listener '{self.WARMING_LISTENER}'; committing to open a new searcher...")
+            update_url = urljoin(self.base_url + '/', f'solr/{collection_name}/update')
+            self.transport.post(update_url, 'update', params={'commit': 'true', 'openSearcher': 'true',
+                                                              'waitSearcher': 'true'}).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"{Colors.RED}Error installing warming queries: {e}{Colors.RESET}")
+            return None
+        
+        after, _ = self._cache_sample(node_urls, cloud, match, timeout)
+        reopened = [registry for registry, core in after.items()
+                    if registry in before and core['searcher'] != before[registry]['searcher']]
+        if not reopened:
+            print(f"  {Colors.YELLOW}No new searcher opened yet; the listener runs on the next commit that "
+                  f"changes the index{Colors.RESET}\n")
+            return dict(result, installed=True, reopened=0)
+        
+        def warmup(samples):
+            values = [samples[registry]['warmup_ms'] for registry in reopened
+                      if isinstance(samples[registry]['warmup_ms'], (int, float))]
+            return max(values) if values else None
+        
+        old, new = warmup(before), warmup(after)
+        if old is not None and new is not None:
+            print(f"  Searcher warmup time: before {format_millis(old)}, after {format_millis(new)} "
+                  f"(slowest of {len(reopened)} reopened core{'s' if len(reopened) != 1 else ''})\n")
+        return dict(result, installed=True, reopened=len(reopened), warmup_before_ms=old, warmup_after_ms=new)
+    
+    @traced('render')
+    def _display_caches(self, shown: List[str], collections: Dict[str, Dict], total: int, window: Optional[float],
+                        errors: List[Dict]):
+        """Display per-collection cache tables and the tuning advice"""
+        basis = f"last {window:.{0 if window >= 10 else 1}f}s" if window else "lifetime counters"
+        print(f"\n{Colors.BOLD}Searcher caches ({basis}, {total} collection{'s' if total != 1 else ''}"
+              f"{f', busiest {len(shown)} shown' if len(shown) < total else ''}){Colors.RESET}")
+        for error in errors:
+            print(f"  {Colors.RED}{error['node']}: {error['error']}{Colors.RESET}")
+        
+        for name in shown:
+            collection = collections[name]
+            print(f"\n{Colors.CYAN}{name}{Colors.RESET} ({collection['cores']} core{'s' if collection['cores'] != 1 else ''}, "
+                  f"searcher warmup {format_millis(collection['warmup_ms'])} at most)")
+            print(f"  {'Cache':17} {'Lookups':>11} {'Hit %':>7} {'Evict/s':>8} {'Evict %':>8} {'Entries':>9} "
+                  f"{'Size':>7} {'RAM':>9} {'Autowarm':>14}")
+            for cache in self.CACHE_NAMES:
+                row = collection['caches'].get(cache)
+                if row is None:
+                    continue
+                ratio = row['hit_ratio']
+                color = (Colors.WHITE if ratio is None else Colors.RED if ratio < 0.2 else
+                         Colors.YELLOW if ratio < 0.5 else Colors.GREEN)
+                hit = f"{color}{ratio:7.1%}{Colors.RESET}" if ratio is not None else f"{'-':>7}"
+                per_s = f"{row['evictions_per_s']:8.2f}" if row['evictions_per_s'] is not None else f"{'-':>8}"
+                evict = f"{row['eviction_pct']:8.1%}" if row['eviction_pct'] is not None else f"{'-':>8}"
+                autowarm = f"{format_millis(row['warmup_ms'])}"
+                if row['autowarm_count'] is not None:
+                    autowarm += f" ({row['autowarm_count']})"
+                print(f"  {cache:17} {row['lookups']:11,} {hit} {per_s} {evict} {row['entries']:9,} "
+                      f"{str(row['size_limit'] or '-'):>7} {format_bytes(row['ram_bytes']):>9} {autowarm:>14}")
+            for cache, advice in collection['advice']:
+                print(f"  {Colors.YELLOW}→ {cache}: {advice}{Colors.RESET}")
+        print()
+    
+    def _shard_targets(self, collection_name: str) -> List[Tuple[str, str, Dict]]:
+        """(shard name, select URL, extra params) for one active replica of every shard.
+        
+        Reading replicas directly with distrib=false lets shards be exported in
+        parallel. Standalone cores (or a failed cluster lookup) yield a single
+        target for the collection itself.
+        """
+        try:
+            url = urljoin(self.base_url + '/', 'solr/admin/collections')
+            data = self._fetch_json(url, 'collections', {'action': 'CLUSTERSTATUS', 'collection': collection_name})
+            cluster = data.get('cluster', {})
+            live_nodes = set(cluster.get('live_nodes', []))
+            shards = cluster.get('collections', {}).get(collection_name, {}).get('shards', {})
+            targets = []
+            for shard_name, shard in sorted(shards.items()):
+                if shard.get('state', 'active') != 'active':
+                    continue
+                replicas = [
+                    replica for replica in shard.get('replicas', {}).values()
+                    if replica.get('state') == 'active' and (not live_nodes or replica.get('node_name') in live_nodes)
+                ]
+                # Prefer non-leaders so indexing leaders are spared the export load
+                replicas.sort(key=lambda replica: replica.get('leader') == 'true')
+                if not replicas:
+                    raise RuntimeError(f"no active replica for shard {shard_name}")
+                replica = replicas[0]
+                targets.append((shard_name, f"{replica['base_url']}/{replica['core']}/select", {'distrib': 'false'}))
+            if targets:
+                return targets
+        except requests.exceptions.HTTPError:
+            pass
+        return [(collection_name, urljoin(self.base_url + '/', f'solr/{collection_name}/select'), {})]
+    
+    def _export_state_path(self, path: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(STATE_DIR, 'export', f'{digest}.json')
+    
+    def export_collection(self, collection_name: str, query: str, path: str, fl: Optional[str] = None,
+                          fmt: Optional[str] = None, parallel: int = 8, page_size: int = 1000,
+                          resume: bool = False) -> bool:
+        """Export query results to a file, reading all shards in parallel"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        fmt = fmt or ExportWriter.FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt not in ('jsonl', 'csv', 'parquet'):
+            print(f"{Colors.RED}Unknown export format; use a .jsonl, .csv or .parquet file or --format{Colors.RESET}")
+            return False
+        if resume and fmt == 'parquet':
+            print(f"{Colors.RED}Parquet exports cannot be resumed; start a new export instead{Colors.RESET}")
+            return False
+        
+        state_path = self._export_state_path(path)
+        state = {'cursors': {}, 'done': [], 'offset': 0, 'exported': 0, 'columns': None}
+        if resume:
+            try:
+                with open(state_path) as f:
+                    state = json.load(f)
+                if state.get('collection') != collection_name or state.get('query') != query:
+                    print(f"{Colors.RED}Checkpoint for {path} belongs to a different export{Colors.RESET}")
+                    return False
+                fl = state.get('fl')
+                with open(path, 'r+b') as f:
+                    f.truncate(state['offset'])
+                print(f"{Colors.CYAN}Resuming export at {state['exported']:,} documents{Colors.RESET}")
+            except (FileNotFoundError, ValueError, KeyError):
+                print(f"{Colors.RED}No usable checkpoint for {path}{Colors.RESET}")
+                return False
+        
+        writer = None
+        stop = threading.Event()
+        try:
+            unique_key = self._get_unique_key(collection_name)
+            targets = [t for t in self._shard_targets(collection_name) if t[0] not in state['done']]
+            params = {'q': query, 'sort': f'{unique_key} asc', 'rows': page_size}
+            if fl:
+                params['fl'] = fl
+            
+            writer = ExportWriter(path, fmt, columns=state.get('columns') or (fl.split(',') if fl else None),
+                                  append=resume)
+            # Bounded hand-off between shard readers and the single writer
+            pages: queue.Queue = queue.Queue(maxsize=max(2, 2 * parallel))
+            totals: Dict[str, int] = {}
+            
+            def read_shard(shard_name, select_url, extra):
+                try:
+                    cursor = state['cursors'].get(shard_name, '*')
+                    for docs, next_cursor, num_found in self.iter_cursor_pages(
+                            collection_name, dict(params, **extra), cursor, select_url=select_url):
+                        totals.setdefault(shard_name, num_found)
+                        while not stop.is_set():
+                            try:
+                                pages.put((shard_name, docs, next_cursor, None), timeout=0.5)
+                                break
+                            except queue.Full:
+                                continue
+                        if stop.is_set():
+                            return
+                    pages.put((shard_name, None, None, None))
+                except Exception as e:
+                    pages.put((shard_name, None, None, e))
+            
+            print(f"Exporting '{collection_name}' from {len(targets)} shard(s) to {path} ({fmt})... "
+                  f"press Ctrl-C to pause")
+            start = time.perf_counter()
+            exported_before = state['exported']
+            bytes_before = state['offset']
+            last_report = 0.0
+            last_save = start
+            remaining = len(targets)
+            errors = []
+            
+            def checkpoint():
+                state.update({
+                    'collection': collection_name, 'query': query, 'fl': fl,
+                    'offset': writer.flush(), 'columns': writer.columns,
+                })
+                os.makedirs(os.path.dirname(state_path), exist_ok=True)
+                with open(state_path + '.tmp', 'w') as f:
+                    json.dump(state, f)
+                os.replace(state_path + '.tmp', state_path)
+            
+            readers = _ContextExecutor(max_workers=max(1, min(parallel, len(targets))),
+                                       thread_name_prefix='solr-export')
+            for target in targets:
+                readers.submit(read_shard, *target)
+            
+            try:
+                while remaining:
+                    check_cancelled()
+                    try:
+                        shard_name, docs, next_cursor, error = pages.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    if docs is None:
+                        remaining -= 1
+                        if error is not None:
+                            errors.append(f"{shard_name}: {error}")
+                        else:
+                            state['done'].append(shard_name)
+                        continue
+                    
+                    writer.write(docs)
+                    state['exported'] += len(docs)
+                    state['cursors'][shard_name] = next_cursor
+                    
+                    now = time.perf_counter()
+                    if now - last_report >= 0.5:
+                        last_report = now
+                        elapsed = max(now - start, 1e-9)
+                        done_now = state['exported'] - exported_before
+                        total = sum(totals.values())
+                        print(f"\r{Colors.ORANGE}{state['exported']:,}/{total:,} docs  "
+                              f"{done_now / elapsed:,.0f} docs/s  "
+                              f"{(writer.flush() - bytes_before) / elapsed / (1024 * 1024):,.1f} MB/s{Colors.RESET}   ",
+                              end="", flush=True)
+                    if now - last_save >= 5:
+                        last_save = now
+                        checkpoint()
+            except KeyboardInterrupt:
+                stop.set()
+                if fmt != 'parquet':
+                    checkpoint()
+                    print(f"\n{Colors.YELLOW}Export paused at {state['exported']:,} documents. "
+                          f"Add --resume to continue.{Colors.RESET}")
+                else:
+                    print(f"\n{Colors.YELLOW}Export stopped at {state['exported']:,} documents{Colors.RESET}")
+                return True
+            finally:
+                stop.set()
+                readers.shutdown(wait=False, cancel_futures=True)
+            
+            elapsed = time.perf_counter() - start
+            size = writer.flush()
+            print("\r" + " " * 72 + "\r", end="")
+            if errors:
+                checkpoint()
+                for error in errors:
+                    print(f"{Colors.RED}Shard failed: {error}{Colors.RESET}")
+                print(f"{Colors.YELLOW}Completed shards are checkpointed; add --resume to retry the rest{Colors.RESET}")
+                return False
+            
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            print(f"{Colors.GREEN}Exported {state['exported']:,} documents to {path} in {elapsed:.1f}s "
+                  f"({(state['exported'] - exported_before) / max(elapsed, 1e-9):,.0f} docs/s, "
+                  f"{size / (1024 * 1024):,.1f} MB){Colors.RESET}")
+            if writer.dropped_fields:
+                print(f"{Colors.YELLOW}Fields not in the column set were skipped: "
+                      f"{', '.join(sorted(writer.dropped_fields)[:10])} (use --fl to choose columns){Colors.RESET}")
+            return True
+            
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"\n{Colors.RED}Export failed: {e}{Colors.RESET}")
+            return False
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    def index_file(self, collection_name: str, path: str, fmt: Optional[str] = None,
+                   batch_size: int = 500, workers: int = 4, commit_within: int = 10000,
+                   commit: bool = False, max_retries: int = 8) -> bool:
+        """Stream documents from a JSONL/CSV file into a collection.
+        
+        A reader fills a bounded queue with batches (so reading can never run
+        ahead of Solr) and a pool of workers posts them to /update. 429 and
+        503 responses are retried with exponential backoff, honouring
+        Retry-After.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        fmt = fmt or {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}.get(os.path.splitext(path)[1].lower())
+        if fmt not in ('jsonl', 'csv'):
+            print(f"{Colors.RED}Unknown input format; use a .jsonl or .csv file or --format{Colors.RESET}")
+            return False
+        if not os.path.isfile(path):
+            print(f"{Colors.RED}File not found: {path}{Colors.RESET}")
+            return False
+        
+        update_url = urljoin(self.base_url + '/', f'solr/{collection_name}/update')
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        batches: queue.Queue = queue.Queue(maxsize=workers * 2)
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {'docs': 0, 'bytes': 0, 'batches': 0, 'retries': 0, 'failed_docs': 0, 'last_error': None}
+        
+        def post_batch(docs: List[Dict], size: int):
+            body = json.dumps(docs, ensure_ascii=False).encode('utf-8')
+            delay = 0.5
+            for attempt in range(max_retries + 1):
+                try:
+                    response = self.transport.post(
+                        update_url, 'update', data=body, params={'commitWithin': commit_within, 'wt': 'json'},
+                        headers={'Content-Type': 'application/json'}
+                    )
+                except requests.exceptions.RequestException as e:
+                    response = None
+                    error = str(e)
+                if response is not None and response.ok:
+                    with lock:
+                        stats['docs'] += len(docs)
+                        stats['bytes'] += size
+                        stats['batches'] += 1
+                    return
+                if response is not None:
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+                    if response.status_code not in (429, 503) and response.status_code < 500:
+                        break
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = max(delay, float(retry_after))
+                if attempt == max_retries or stop.is_set():
+                    break
+                with lock:
+                    stats['retries'] += 1
+                stop.wait(delay)
+                delay = min(delay * 2, 30)
+            with lock:
+                stats['failed_docs'] += len(docs)
+                stats['last_error'] = error
+        
+        def worker():
+            while True:
+                item = batches.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    # Keep draining so the reader never blocks on a full queue
+                    continue
+                try:
+                    post_batch(*item)
+                except KeyboardInterrupt:
+                    # Cancelled: the scope aborted this request; the reader sees the same scope and stops
+                    stop.set()
+        
+        def searchable() -> Optional[int]:
+            try:
+                return self._fetch_json(select_url, 'select', {'q': '*:*', 'rows': 0, 'omitHeader': 'true'})['response']['numFound']
+            except Exception:
+                return None
+        
+        initial_count = searchable()
+        if initial_count is None:
+            print(f"{Colors.RED}Collection '{collection_name}' is not reachable{Colors.RESET}")
+            return False
+        
+        file_size = os.path.getsize(path)
+        print(f"Indexing {path} ({file_size / (1024 * 1024):,.1f} MB, {fmt}) into '{collection_name}' "
+              f"with {workers} workers, batches of {batch_size}, commitWithin={commit_within}ms... "
+              f"press Ctrl-C to stop")
+        
+        # Each worker runs in a copy of this context so the command's CancelScope covers its /update requests
+        pool = [threading.Thread(target=contextvars.copy_context().run, args=(worker,), name='solr-indexer', daemon=True)
+                for _ in range(workers)]
+        for thread in pool:
+            thread.start()
+        
+        start = time.perf_counter()
+        last_report = 0.0
+        last_probe = 0.0
+        visible = 0
+        read_bytes = 0
+        
+        def report(now, probe=False):
+            nonlocal visible, last_probe
+            check_cancelled()
+            if probe or now - last_probe >= 2:
+                last_probe = now
+                count = searchable()
+                if count is not None:
+                    visible = max(0, count - initial_count)
+            elapsed = max(now - start, 1e-9)
+            with lock:
+                docs, sent_bytes, retries, failed = stats['docs'], stats['bytes'], stats['retries'], stats['failed_docs']
+            print(f"\r{Colors.ORANGE}{docs:,} docs sent ({read_bytes / file_size * 100 if file_size else 100:5.1f}% read)  "
+                  f"{docs / elapsed:,.0f} docs/s  {sent_bytes / elapsed / (1024 * 1024):,.2f} MB/s  "
+                  f"searchable +{visible:,}  retries {retries}  errors {failed}{Colors.RESET}   ",
+                  end="", flush=True)
+        
+        interrupted = False
+        parse_error = None
+        batch = []
+        batch_bytes = 0
+        try:
+            for doc, size in iter_file_records(path, fmt):
+                batch.append(doc)
+                batch_bytes += size
+                read_bytes += size
+                if len(batch) >= batch_size:
+                    # Blocks while the queue is full: Solr's pace throttles the reader
+                    while True:
+                        try:
+                            batches.put((batch, batch_bytes), timeout=0.5)
+                            break
+                        except queue.Full:
+                            report(time.perf_counter())
+                    batch = []
+                    batch_bytes = 0
+                now = time.perf_counter()
+                if now - last_report >= 0.5:
+                    last_report = now
+                    report(now)
+            if batch:
+                batches.put((batch, batch_bytes))
+        except KeyboardInterrupt:
+            interrupted = True
+            stop.set()
+            # Drop queued batches; in-flight requests are allowed to finish
+            while True:
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    break
+        except ValueError as e:
+            # Everything before the bad line is valid: send it, then stop reading
+            parse_error = str(e)
+            if batch:
+                batches.put((batch, batch_bytes))
+            print(f"\n{Colors.RED}Could not parse {path} at {parse_error}; stopped reading there, "
+                  f"documents before it are still sent{Colors.RESET}")
+        
+        for _ in pool:
+            batches.put(None)
+        try:
+            for thread in pool:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+                    report(time.perf_counter())
+        except KeyboardInterrupt:
+            interrupted = True
+            stop.set()
+        
+        if commit and not interrupted:
+            try:
+                self.transport.post(update_url, 'update', params={'commit': 'true'}).raise_for_status()
+            except requests.exceptions.RequestException as e:
+                print(f"\n{Colors.RED}Commit failed: {e}{Colors.RESET}")
+        
+        elapsed = time.perf_counter() - start
+        report(time.perf_counter(), probe=True)
+        print()
+        color = Colors.GREEN if not stats['failed_docs'] else Colors.YELLOW
+        color = Colors.YELLOW if parse_error else color
+        print(f"{color}{'Stopped' if interrupted or parse_error else 'Finished'}: {stats['docs']:,} documents in "
+              f"{stats['batches']:,} batches, {elapsed:.1f}s ({stats['docs'] / max(elapsed, 1e-9):,.0f} docs/s), "
+              f"{stats['retries']} retries, {stats['failed_docs']:,} failed{Colors.RESET}")
+        if stats['last_error']:
+            print(f"{Colors.RED}Last error: {stats['last_error']}{Colors.RESET}")
+        if not commit:
+            print(f"Documents become searchable within {commit_within}ms (commitWithin)")
+        print()
+        return not stats['failed_docs'] and not interrupted and parse_error is None
+    
+    # Schema catalogs kept in memory; each holds the full /schema response
+    SCHEMA_CATALOGS = 4
+    
+    def _schema_catalog(self, collection_name: str) -> SchemaCatalog:
+        """Catalog for a collection's schema, rebuilt only when the schema changed"""
+        schema_url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema')
+        schema = self._fetch_cached_json(
+            schema_url, 'schema', version_url=self._schema_version_url(collection_name)
+        )['schema']
+        catalog = self._schema_catalogs.get(schema_url)
+        # The metadata cache hands back the same object until the schema changes
+        if catalog is not None and catalog.schema is schema:
+            self._schema_catalogs.move_to_end(schema_url)
+            return catalog
+        
+        with TRACER.span('schema', 'catalog'):
+            start = time.perf_counter()
+            catalog = SchemaCatalog(schema)
+            catalog.build_time = time.perf_counter() - start
+        self._schema_catalogs[schema_url] = catalog
+        while len(self._schema_catalogs) > self.SCHEMA_CATALOGS:
+            self._schema_catalogs.popitem(last=False)
+        return catalog
+    
+    def explore_schema(self, collection_name: str, action: Optional[str] = None, arg: Optional[str] = None) -> bool:
+        """Schema overview, or one lookup: field <name>, search <text>, type <name>, copies [field]"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        try:
+            catalog = self._schema_catalog(collection_name)
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"{Colors.RED}Error loading schema: {e}{Colors.RESET}")
+            return False
+        
+        if action is None:
+            self._display_schema_overview(collection_name, catalog)
+            return True
+        
+        start = time.perf_counter()
+        if action == 'field':
+            definition, kind = catalog.resolve(arg)
+            if definition is None:
+                suggestions = [name for name, _ in catalog.fuzzy_search(arg, limit=5)]
+                self.last_result = {'field': arg, 'definition': None, 'suggestions': suggestions}
+                print(f"{Colors.YELLOW}No field or dynamic rule matches '{arg}'{Colors.RESET}")
+                if suggestions:
+                    print(f"  Did you mean: {', '.join(suggestions)}")
+                print()
+                return False
+            self._display_schema_field(catalog, arg, definition, kind, time.perf_counter() - start)
+        elif action == 'search':
+            matches = catalog.search(arg)
+            self._display_schema_search(catalog, arg, matches, time.perf_counter() - start)
+        elif action == 'type':
+            if arg not in catalog.types:
+                print(f"{Colors.YELLOW}No field type '{arg}'{Colors.RESET} "
+                      f"(types: {', '.join(sorted(catalog.types)[:10])}{', ...' if len(catalog.types) > 10 else ''})\n")
+                return False
+            self._display_schema_type(catalog, arg)
+        elif action == 'copies':
+            self._display_schema_copies(catalog, arg)
+        return True
+    
+    @traced('render')
+    def _display_schema_overview(self, collection_name: str, catalog: SchemaCatalog):
+        type_usage = sorted(catalog.fields_by_type.items(), key=lambda item: -len(item[1]))
+        self.last_result = {
+            'collection': collection_name,
+            'unique_key': catalog.unique_key,
+            'fields': len(catalog.fields),
+            'dynamic_fields': len(catalog.dynamic_fields),
+            'copy_fields': len(catalog.copy_fields),
+            'field_types': len(catalog.types),
+            'type_usage': {name: len(users) for name, users in type_usage},
+        }
+        
+        print(f"\n{Colors.BOLD}{Colors.CYAN}Schema of '{collection_name}'{Colors.RESET}"
+              f"  (name {catalog.schema.get('name', '-')}, uniqueKey {catalog.unique_key or '-'})")
+        print(f"  {len(catalog.fields):,} fields, {len(catalog.dynamic_fields):,} dynamic rules, "
+              f"{len(catalog.copy_fields):,} copyFields, {len(catalog.types):,} field types")
+        if catalog.build_time is not None:
+            print(f"  {Colors.WHITE}Catalog built in {catalog.build_time * 1000:.1f}ms{Colors.RESET}")
         
-        # Solr Home
-        if self.solr_info.get('solr_home'):
-            print(f"{Colors.GREEN}Solr Home:{Colors.RESET} {Colors.WHITE}{self.solr_info['solr_home']}{Colors.RESET}")
+        print(f"\n{Colors.BOLD}Field types by use:{Colors.RESET}")
+        for type_name, users in type_usage[:15]:
+            type_class = catalog.types.get(type_name, {}).get('class', '?')
+            chains = catalog.analyzers(type_name)
+            analyzed = f"  {' → '.join(next(iter(chains.values())))}" if chains else ''
+            print(f"  {type_name:24} {type_class[:32]:32} {len(users):>8,}{Colors.WHITE}{analyzed[:60]}{Colors.RESET}")
+        unused = [name for name in catalog.types if name not in catalog.fields_by_type]
+        if unused:
+            print(f"  {Colors.WHITE}{len(unused)} unused types: {', '.join(sorted(unused)[:8])}"
+                  f"{', ...' if len(unused) > 8 else ''}{Colors.RESET}")
         
-        # Log Directory
-        if self.solr_info.get('solr_log_dir'):
-            print(f"{Colors.GREEN}Log Directory:{Colors.RESET} {Colors.WHITE}{self.solr_info['solr_log_dir']}{Colors.RESET}")
+        if catalog.dynamic_fields:
+            print(f"\n{Colors.BOLD}Dynamic rules{Colors.RESET} (highest priority first):")
+            ordered = sorted(range(len(catalog.dynamic_fields)),
+                             key=lambda i: (-len(catalog.dynamic_fields[i]['name']), i))
+            for i in ordered[:10]:
+                rule = catalog.dynamic_fields[i]
+                print(f"  {rule['name']:24} {rule.get('type', '')}")
+            if len(ordered) > 10:
+                print(f"  {Colors.WHITE}... {len(ordered) - 10} more{Colors.RESET}")
         
-        print(f"{Colors.CYAN}{'═' * 60}{Colors.RESET}\n")
+        print(f"\n{Colors.WHITE}Look up: schema {collection_name} field <name> | search <text> | "
+              f"type <name> | copies [field]{Colors.RESET}\n")
     
-    def disconnect(self):
-        """Disconnect from Solr"""
-        self.base_url = None
-        self.connected = False
-        self.solr_info = {}
-        print(f"{Colors.YELLOW}Disconnected from Solr{Colors.RESET}")
+    @traced('render')
+    def _display_schema_field(self, catalog: SchemaCatalog, name: str, definition: Dict, kind: str, elapsed: float):
+        type_name = definition.get('type', '')
+        field_type = catalog.types.get(type_name, {})
+        # Properties missing from the field definition are inherited from its type
+        properties = {}
+        for prop in catalog.PROPERTIES:
+            if prop in definition:
+                properties[prop] = (definition[prop], 'field')
+            elif prop in field_type:
+                properties[prop] = (field_type[prop], 'type')
+        targets = catalog.copy_targets(name)
+        sources = catalog.copy_sources(name)
+        chains = catalog.analyzers(type_name)
+        self.last_result = {
+            'field': name, 'kind': kind, 'definition': definition, 'type_class': field_type.get('class'),
+            'properties': {prop: value for prop, (value, _) in properties.items()},
+            'analyzers': chains, 'copies_to': targets, 'copies_from': sources,
+        }
+        
+        print(f"\n{Colors.BOLD}{Colors.CYAN}{name}{Colors.RESET}  "
+              f"{Colors.WHITE}(resolved in {elapsed * 1000:.2f}ms){Colors.RESET}")
+        if kind == 'dynamic':
+            others = [catalog.dynamic.patterns[i] for i in catalog.dynamic.match_all(name)[1:]]
+            shadowed = f"  (also matches {', '.join(others)})" if others else ''
+            print(f"  Defined by:  dynamic rule {Colors.GREEN}{definition['name']}{Colors.RESET}{shadowed}")
+        else:
+            unique = '  (uniqueKey)' if name == catalog.unique_key else ''
+            print(f"  Defined by:  explicit field{unique}")
+        print(f"  Type:        {type_name} ({field_type.get('class', 'unknown type')})")
+        if properties:
+            shown = ', '.join(f"{prop} {'yes' if value in (True, 'true') else 'no'}"
+                              f"{'*' if source == 'type' else ''}" for prop, (value, source) in properties.items())
+            print(f"  Properties:  {shown}")
+            if any(source == 'type' for _, source in properties.values()):
+                print(f"  {Colors.WHITE}             * inherited from the field type{Colors.RESET}")
+        for label, chain in chains.items():
+            print(f"  Analyzer ({label}): {' → '.join(chain)}")
+        for copy in targets:
+            via = f" via {copy['source']}" if copy['source'] != name else ''
+            limit = f" (maxChars {copy['maxChars']})" if copy.get('maxChars') else ''
+            print(f"  Copied to:   {copy['dest']}{limit}{via}")
+        if sources:
+            shown = ', '.join(copy['source'] for copy in sources[:10])
+            more = f" and {len(sources) - 10} more" if len(sources) > 10 else ''
+            print(f"  Copied from: {shown}{more}")
+        print()
+    
+    @traced('render')
+    def _display_schema_search(self, catalog: SchemaCatalog, text: str, matches: List[Tuple[str, str]],
+                               elapsed: float):
+        self.last_result = {
+            'query': text,
+            'matches': [{'name': name, 'match': how, 'type': catalog.fields[name].get('type')}
+                        for name, how in matches],
+        }
+        print(f"\n{len(matches)} matches for '{text}' among {len(catalog.fields):,} fields "
+              f"{Colors.WHITE}({elapsed * 1000:.2f}ms){Colors.RESET}")
+        for name, how in matches:
+            print(f"  {name:40} {catalog.fields[name].get('type', ''):20} {Colors.WHITE}{how}{Colors.RESET}")
+        if not matches:
+            index = catalog.dynamic.match(text)
+            if index is not None:
+                print(f"  No explicit field; '{text}' would use dynamic rule {catalog.dynamic.patterns[index]}")
+        print()
+    
+    @traced('render')
+    def _display_schema_type(self, catalog: SchemaCatalog, type_name: str):
+        field_type = catalog.types[type_name]
+        users = catalog.fields_by_type.get(type_name, [])
+        chains = catalog.analyzers(type_name)
+        self.last_result = {'type': type_name, 'definition': field_type, 'analyzers': chains, 'used_by': users}
+        
+        print(f"\n{Colors.BOLD}{Colors.CYAN}{type_name}{Colors.RESET}  {field_type.get('class', '')}")
+        settings = {key: value for key, value in field_type.items()
+                    if key not in ('name', 'class') and not isinstance(value, (dict, list))}
+        if settings:
+            print(f"  Settings:  {', '.join(f'{key}={value}' for key, value in settings.items())}")
+        for label, chain in chains.items():
+            print(f"  Analyzer ({label}): {' → '.join(chain)}")
+        shown = ', '.join(users[:15])
+        more = f", ... {len(users) - 15} more" if len(users) > 15 else ''
+        print(f"  Used by {len(users):,} fields/rules{': ' + shown + more if users else ''}\n")
+    
+    @traced('render')
+    def _display_schema_copies(self, catalog: SchemaCatalog, name: Optional[str]):
+        if name:
+            targets = catalog.copy_targets(name)
+            sources = catalog.copy_sources(name)
+            self.last_result = {'field': name, 'copies_to': targets, 'copies_from': sources}
+            print(f"\n{Colors.BOLD}copyField graph around {name}{Colors.RESET}")
+            for copy in sources[:30]:
+                print(f"  {copy['source']:40} → {name}")
+            if len(sources) > 30:
+                print(f"  {Colors.WHITE}... {len(sources) - 30} more sources{Colors.RESET}")
+            for copy in targets:
+                via = f"  (via {copy['source']})" if copy['source'] != name else ''
+                print(f"  {name:40} → {copy['dest']}{via}")
+            if not sources and not targets:
+                print(f"  No copyField rules read or write {name}")
+            print()
+            return
+        
+        fan_in = sorted(catalog.copies_from.items(), key=lambda item: -len(item[1]))
+        self.last_result = {'copy_fields': len(catalog.copy_fields),
+                            'destinations': {dest: len(sources) for dest, sources in fan_in}}
+        print(f"\n{Colors.BOLD}{len(catalog.copy_fields):,} copyField rules into "
+              f"{len(fan_in):,} destinations{Colors.RESET}")
+        for dest, sources in fan_in[:20]:
+            sample = ', '.join(copy['source'] for copy in sources[:3])
+            more = ', ...' if len(sources) > 3 else ''
+            print(f"  {dest:32} ← {len(sources):>6,} sources  {Colors.WHITE}{sample}{more}{Colors.RESET}")
+        if len(fan_in) > 20:
+            print(f"  {Colors.WHITE}... {len(fan_in) - 20} more destinations{Colors.RESET}")
+        print()
+    
+    def _schema_backup_path(self, collection_name: str) -> str:
+        host = urlparse(self.base_url).netloc.replace(':', '_')
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(STATE_DIR, 'schema-backups', f'{host}_{collection_name}_{stamp}.json')
+        # Two applies within a second must not overwrite each other's backup
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(STATE_DIR, 'schema-backups', f'{host}_{collection_name}_{stamp}-{suffix}.json')
+        return path
+    
+    def manage_schema(self, collection_name: str, path: str, apply: bool = False, prune: bool = False,
+                      batch_size: int = 500) -> bool:
+        """Diff a desired schema spec against the live schema; with apply, carry out the plan.
+        
+        The spec is a JSON file shaped like a /schema response (fields,
+        dynamicFields, copyFields, fieldTypes; optionally wrapped in
+        "schema"). Changes are sent as multi-command Schema API requests of
+        at most batch_size operations, and the live schema is saved first so
+        the change can be rolled back by applying the backup with prune.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        try:
+            with open(os.path.expanduser(path)) as f:
+                desired = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{Colors.RED}Could not read schema spec {path}: {e}{Colors.RESET}")
+            return False
+        desired = desired.get('schema', desired) if isinstance(desired, dict) else None
+        sections = ('fields', 'dynamicFields', 'copyFields', 'fieldTypes')
+        if not isinstance(desired, dict) or not any(isinstance(desired.get(key), list) for key in sections):
+            print(f"{Colors.RED}Schema spec must have at least one of: {', '.join(sections)}{Colors.RESET}")
+            return False
+        
+        schema_url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema')
+        try:
+            # Always diff against the live schema, never a cached copy
+            live = self._fetch_json(schema_url, 'schema')['schema']
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"{Colors.RED}Error loading schema: {e}{Colors.RESET}")
+            return False
+        
+        ops = plan_schema_changes(live, desired, prune=prune)
+        self._display_schema_plan(collection_name, ops, prune)
+        if not ops or not apply:
+            return True
+        
+        backup_path = self._schema_backup_path(collection_name)
+        try:
+            self._save_state(backup_path, {'schema': live})
+        except OSError as e:
+            print(f"{Colors.RED}Could not save a schema backup, nothing applied: {e}{Colors.RESET}")
+            return False
+        print(f"Saved the current schema to {backup_path}")
+        
+        batches = schema_batches(ops, batch_size)
+        applied = 0
+        error = None
+        interrupted = False
+        start = time.perf_counter()
+        try:
+            for number, body in enumerate(batches, 1):
+                check_cancelled()
+                size = sum(len(items) for items in body.values())
+                response = self.transport.post(
+                    schema_url, 'schema-update', data=json.dumps(body).encode('utf-8'),
+                    headers={'Content-Type': 'application/json'}
+                )
+                try:
+                    result = json_loads(response.content)
+                except ValueError:
+                    result = {}
+                if not response.ok or result.get('errors') or result.get('error'):
+                    error = self._schema_errors(response, result)
+                    break
+                applied += size
+                print(f"\r{Colors.ORANGE}[{number}/{len(batches)}] {applied:,}/{len(ops):,} operations applied  "
+                      f"{time.perf_counter() - start:.1f}s{Colors.RESET}   ", end="", flush=True)
+        except KeyboardInterrupt:
+            interrupted = True
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        
+        # Whatever happened, cached copies of this collection's schema are stale
+        self.cache.invalidate(urljoin(self.base_url + '/', f'solr/{collection_name}/'))
+        self._schema_catalogs.pop(schema_url, None)
+        
+        elapsed = time.perf_counter() - start
+        print()
+        self.last_result = {
+            'collection': collection_name, 'operations': len(ops), 'applied': applied,
+            'batches': len(batches), 'error': error, 'interrupted': interrupted, 'backup': backup_path,
+        }
+        if not error and not interrupted:
+            print(f"{Colors.GREEN}Applied {len(ops):,} operations in {len(batches)} requests "
+                  f"({elapsed:.1f}s){Colors.RESET}")
+        else:
+            pending = len(ops) - applied
+            if interrupted:
+                print(f"{Colors.YELLOW}Stopped after {applied:,} of {len(ops):,} operations; the request in "
+                      f"flight may or may not have been applied{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}Batch rejected: {error}{Colors.RESET}")
+                print(f"Each request is atomic: {applied:,} operations were applied, the remaining "
+                      f"{pending:,} were not")
+        if applied or interrupted:
+            print(f"To roll back: schema {collection_name} apply {backup_path} --prune")
+        print()
+        return not error and not interrupted
+    
+    @staticmethod
+    def _schema_errors(response: requests.Response, result: Dict) -> str:
+        """Readable summary of a rejected Schema API request"""
+        messages = []
+        for item in result.get('errors') or []:
+            messages += item.get('errorMessages', []) if isinstance(item, dict) else [str(item)]
+        if not messages and result.get('error'):
+            messages.append(result['error'].get('msg', '') if isinstance(result['error'], dict) else str(result['error']))
+        detail = '; '.join(message.strip() for message in messages[:5] if message)
+        more = f" (+{len(messages) - 5} more)" if len(messages) > 5 else ''
+        return f"HTTP {response.status_code}: {detail or response.text[:200]}{more}"
+    
+    @traced('render')
+    def _display_schema_plan(self, collection_name: str, ops: List[Dict], prune: bool):
+        counts = Counter(op['command'] for op in ops)
+        self.last_result = {
+            'collection': collection_name,
+            'operations': len(ops),
+            'counts': {command: counts[command] for command in SCHEMA_COMMANDS if counts[command]},
+            'plan': [{'command': op['command'], 'name': op['name'], 'body': op['body']} for op in ops],
+        }
+        if not ops:
+            print(f"\n{Colors.GREEN}Schema of '{collection_name}' already matches the spec{Colors.RESET}"
+                  f"{'' if prune else ' (definitions missing from the spec are kept; add --prune to remove them)'}\n")
+            return
+        
+        print(f"\n{Colors.BOLD}{Colors.CYAN}Schema plan for '{collection_name}'{Colors.RESET}: {len(ops):,} operations")
+        for command in SCHEMA_COMMANDS:
+            group = [op for op in ops if op['command'] == command]
+            if not group:
+                continue
+            color = Colors.RED if command.startswith('delete') else Colors.YELLOW if command.startswith('replace') else Colors.GREEN
+            print(f"\n  {color}{command}{Colors.RESET} ({len(group):,})")
+            for op in group[:10]:
+                detail = ''
+                if op['previous'] is not None and (command.startswith('replace') or command == 'add-copy-field'):
+                    changed = sorted(set(op['body']) | set(op['previous']))
+                    detail = ', '.join(
+                        f"{key}: {op['previous'].get(key, '-')} → {op['body'].get(key, '-')}" for key in changed
+                        if key != 'name' and _normalize_schema_value(op['previous'].get(key)) != _normalize_schema_value(op['body'].get(key))
+                    )
+                elif command.startswith('add') and 'type' in op['body']:
+                    detail = op['body']['type']
+                print(f"    {op['name']:40} {Colors.WHITE}{detail[:80]}{Colors.RESET}")
+            if len(group) > 10:
+                print(f"    {Colors.WHITE}... {len(group) - 10:,} more{Colors.RESET}")
+        if not prune:
+            print(f"\n  {Colors.WHITE}Definitions missing from the spec are kept; add --prune to remove them{Colors.RESET}")
+        print()
     
     def get_status(self) -> str:
         """Get connection status"""
+        self.last_result = {'connected': self.connected, 'url': self.base_url}
         if self.connected:
             return f"Connected to {self.base_url}"
         else:
@@ -376,9 +5521,7 @@ class SolrConnection:
         try:
             # Try SolrCloud mode
             collections_url = urljoin(self.base_url + '/', 'solr/admin/collections?action=LIST')
-            response = requests.get(collections_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._fetch_cached_json(collections_url, 'collections')
             
             if data.get('responseHeader', {}).get('status') == 0:
                 collections = data.get('collections', [])
@@ -388,95 +5531,872 @@ class SolrConnection:
                 return self._try_list_cores()
                 
         except Exception:
-            return self._try_list_cores()
+            return self._try_list_cores()
+    
+    def _try_list_cores(self) -> bool:
+        """List cores in standalone Solr mode"""
+        try:
+            cores_url = urljoin(self.base_url + '/', 'solr/admin/cores?action=STATUS')
+            data = self._fetch_cached_json(cores_url, 'cores')
+            
+            if data.get('responseHeader', {}).get('status') == 0:
+                cores = list(data.get('status', {}).keys())
+                self._display_collections(cores, mode="standalone")
+                return True
+            else:
+                print(f"{Colors.RED}Failed to retrieve collections/cores{Colors.RESET}")
+                return False
+                
+        except Exception as e:
+            print(f"{Colors.RED}Error listing collections/cores: {e}{Colors.RESET}")
+            return False
+    
+    @traced('render')
+    def _display_collections(self, collections: List[str], mode: str = "cloud"):
+        """Display collections"""
+        self.last_result = {'mode': mode, 'collections': collections}
+        mode_label = "Collections" if mode == "cloud" else "Cores"
+        
+        print(f"\n{mode_label} ({mode.title()} Mode):")
+        print("-" * 40)
+        
+        if not collections:
+            print(f"No {mode_label.lower()} found")
+        else:
+            print(f"Found {len(collections)} {mode_label.lower()}:\n")
+            
+            for i, collection in enumerate(collections, 1):
+                print(f"  {i}. {collection}")
+        
+        print()
+    
+    def summarize_collection(self, collection_name: str, engine: str = 'auto') -> bool:
+        """Get summary of a collection.
+        
+        engine is 'server' (Luke/JSON Facet/stats statistics over the whole
+        index), 'sample' (client-side analysis of the first 100 documents) or
+        'auto', which uses the server engine and falls back to sampling when
+        those handlers are unavailable.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        print(f"Analyzing collection '{collection_name}'...")
+        
+        if engine != 'sample':
+            try:
+                handled = self._summarize_server_side(collection_name)
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 404:
+                    print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+                else:
+                    print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+                return False
+            except Exception as e:
+                print(f"{Colors.RED}Error analyzing collection: {e}{Colors.RESET}")
+                return False
+            
+            if handled is not None:
+                return handled
+            if engine == 'server':
+                print(f"{Colors.RED}Server-side statistics are not available for '{collection_name}'{Colors.RESET}")
+                return False
+            print(f"{Colors.YELLOW}Server-side statistics unavailable, falling back to sampling{Colors.RESET}")
+        
+        return self._summarize_sampled(collection_name)
+    
+    def _summarize_sampled(self, collection_name: str) -> bool:
+        """Summarize a collection from a 100-document sample"""
+        try:
+            
+            # The sample query also carries numFound, and Solr caps rows at the
+            # result size itself, so schema and sample are independent and can
+            # be fetched concurrently.
+            select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+            schema_url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema')
+            
+            executor = self._get_executor()
+            sample_future = executor.submit(
+                self._fetch_json, select_url, 'select', {'q': '*:*', 'rows': 100, 'omitHeader': 'true'}
+            )
+            schema_future = executor.submit(
+                self._fetch_cached_json, schema_url, 'schema', None, self._schema_version_url(collection_name),
+                self.SCHEMA_SUMMARY_PROJECTION
+            )
+            
+            # The sample is required; a failure here means the collection is unusable
+            sample_data = sample_future.result()
+            total_docs = sample_data['response']['numFound']
+            docs = sample_data['response']['docs']
+            
+            # Schema is optional; keep the sample even if the Schema API fails
+            fields = None
+            dynamic_fields = None
+            try:
+                schema_data = schema_future.result()
+                fields = schema_data['schema']['fields']
+                dynamic_fields = schema_data['schema']['dynamicFields']
+            except Exception as e:
+                print(f"{Colors.YELLOW}Schema unavailable, showing sample only: {e}{Colors.RESET}")
+            
+            # Analyze field usage
+            field_usage = {}
+            for doc in docs:
+                for field_name in doc.keys():
+                    if field_name not in ['_version_', '_root_']:
+                        field_usage[field_name] = field_usage.get(field_name, 0) + 1
+            
+            # Display summary
+            self._display_summary(
+                collection_name, total_docs, fields, dynamic_fields,
+                field_usage, docs[:3], len(docs)
+            )
+            return True
+            
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except Exception as e:
+            print(f"{Colors.RED}Error analyzing collection: {e}{Colors.RESET}")
+            return False
+    
+    # Fields per batched JSON Facet/stats request
+    STATS_BATCH_SIZE = 50
+    # Fields shown with distinct counts and ranges; ranked candidates get twice as many
+    SUMMARY_TOP_FIELDS = 10
+    
+    def _summarize_server_side(self, collection_name: str) -> Optional[bool]:
+        """Summarize using exact statistics computed by Solr.
+        
+        Fields are ranked by Luke's per-field doc counts, so only the top few
+        need the expensive distinct-count and range aggregations. Returns None
+        when Luke or the facet/stats components are unavailable so the caller
+        can fall back to sampling.
+        """
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        schema_url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema')
+        luke_url = urljoin(self.base_url + '/', f'solr/{collection_name}/admin/luke')
+        
+        executor = self._get_executor()
+        sample_future = executor.submit(
+            self._fetch_json, select_url, 'select', {'q': '*:*', 'rows': 3, 'omitHeader': 'true'}
+        )
+        schema_future = executor.submit(
+            self._fetch_cached_json, schema_url, 'schema', None, self._schema_version_url(collection_name),
+            self.SCHEMA_SUMMARY_PROJECTION
+        )
+        luke_future = executor.submit(self._fetch_json, luke_url, 'luke', {'numTerms': 0, 'omitHeader': 'true'})
+        
+        sample_data = sample_future.result()
+        total_docs = sample_data['response']['numFound']
+        sample_docs = sample_data['response']['docs']
+        
+        try:
+            luke_data = luke_future.result()
+        except Exception:
+            return None
+        
+        fields = None
+        dynamic_fields = None
+        type_classes = {}
+        try:
+            schema = schema_future.result()['schema']
+            fields = schema['fields']
+            dynamic_fields = schema['dynamicFields']
+            type_classes = {t['name']: t.get('class', '') for t in schema.get('fieldTypes', [])}
+        except Exception as e:
+            print(f"{Colors.YELLOW}Schema unavailable: {e}{Colors.RESET}")
+        
+        field_specs = []
+        for field_name, info in luke_data.get('fields', {}).items():
+            if field_name in ('_version_', '_root_'):
+                continue
+            flags = info.get('schema', '')
+            if 'I' not in flags and 'D' not in flags:
+                continue
+            type_class = type_classes.get(info.get('type'), '')
+            field_specs.append({
+                'name': field_name,
+                'type': info.get('type', ''),
+                'tokenized': 'T' in flags,
+                'numeric': any(marker in type_class for marker in ('Point', 'Trie', 'Date')),
+                'rank': info.get('docs'),
+            })
+        
+        field_stats = {}
+        if field_specs and total_docs > 0:
+            # Luke's counts cover only the core that answered, which is enough to rank by;
+            # fields it has no count for are counted with cheap doc-count-only batches
+            unranked = [spec for spec in field_specs if spec['rank'] is None]
+            if unranked:
+                batches = [unranked[i:i + self.STATS_BATCH_SIZE]
+                           for i in range(0, len(unranked), self.STATS_BATCH_SIZE)]
+                futures = [executor.submit(self._fetch_field_stats, select_url, batch, False) for batch in batches]
+                counts = {}
+                for future in futures:
+                    try:
+                        counts.update(future.result())
+                    except Exception:
+                        pass
+                if not counts and len(unranked) == len(field_specs):
+                    return None
+                for spec in unranked:
+                    spec['rank'] = counts.get(spec['name'], {}).get('docs', 0)
+            
+            candidates = sorted(field_specs, key=lambda spec: spec['rank'], reverse=True)[:2 * self.SUMMARY_TOP_FIELDS]
+            try:
+                field_stats = self._fetch_field_stats(select_url, candidates)
+            except Exception:
+                return None
+            ordered = sorted(field_stats.items(), key=lambda item: item[1]['docs'], reverse=True)
+            field_stats = dict(ordered[:self.SUMMARY_TOP_FIELDS])
+        
+        self._display_server_summary(
+            collection_name, total_docs, fields, dynamic_fields,
+            luke_data.get('index', {}), len(field_specs), field_stats, sample_docs
+        )
+        return True
+    
+    def _fetch_field_stats(self, select_url: str, field_specs: List[Dict], details: bool = True) -> Dict[str, Dict]:
+        """Fetch doc counts, plus distinct counts and min/max when details is set, for a batch of fields in one request"""
+        facet = {}
+        stats_fields = []
+        for i, spec in enumerate(field_specs):
+            facet[f'f{i}_docs'] = {'type': 'query', 'q': f"{spec['name']}:*"}
+            if not details:
+                continue
+            if not spec['tokenized']:
+                facet[f'f{i}_distinct'] = f"hll({spec['name']})"
+            if spec['numeric']:
+                stats_fields.append(f"{{!min=true max=true}}{spec['name']}")
+        
+        params = {'q': '*:*', 'rows': 0, 'omitHeader': 'true', 'json.facet': json.dumps(facet)}
+        if stats_fields:
+            params['stats'] = 'true'
+            params['stats.field'] = stats_fields
+        
+        try:
+            data = self._fetch_json(select_url, 'stats', params)
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code != 400 or not details:
+                raise
+            # Some field in the batch cannot be aggregated; retry with doc counts only
+            facet = {key: value for key, value in facet.items() if key.endswith('_docs')}
+            data = self._fetch_json(select_url, 'stats', {'q': '*:*', 'rows': 0, 'omitHeader': 'true',
+                                                          'json.facet': json.dumps(facet)})
+        
+        facets = data.get('facets', {})
+        stats = (data.get('stats') or {}).get('stats_fields') or {}
+        results = {}
+        for i, spec in enumerate(field_specs):
+            field_stat = stats.get(spec['name']) or {}
+            results[spec['name']] = {
+                'type': spec['type'],
+                'docs': (facets.get(f'f{i}_docs') or {}).get('count', 0),
+                'distinct': facets.get(f'f{i}_distinct'),
+                'min': field_stat.get('min'),
+                'max': field_stat.get('max'),
+            }
+        return results
+    
+    @traced('render')
+    def _display_server_summary(self, collection_name, total_docs, fields, dynamic_fields,
+                                index_info, indexed_fields, field_stats, sample_docs):
+        """Display collection summary built from server-side statistics"""
+        self.last_result = {
+            'collection': collection_name, 'engine': 'server', 'total_docs': total_docs,
+            'defined_fields': len(fields) if fields is not None else None,
+            'dynamic_fields': len(dynamic_fields) if dynamic_fields is not None else None,
+            'indexed_fields': indexed_fields,
+            'index': index_info, 'fields': field_stats, 'sample_docs': sample_docs,
+        }
+        print(f"\n{Colors.BOLD}COLLECTION: {collection_name}{Colors.RESET}")
+        print("=" * 60)
+        
+        # Document stats
+        print(f"\nDocument Statistics:")
+        print(f"  Total Documents: {total_docs:,}")
+        if index_info:
+            print(f"  Max Doc (core): {index_info.get('maxDoc', 0):,}")
+            print(f"  Deleted Docs (core): {index_info.get('deletedDocs', 0):,}")
+            if index_info.get('segmentCount') is not None:
+                print(f"  Segments (core): {index_info['segmentCount']}")
+        print(f"  Statistics: exact, computed by Solr over all documents")
+        
+        # Schema info
+        print(f"\nSchema Overview:")
+        if fields is None:
+            print(f"  {Colors.YELLOW}Schema information unavailable{Colors.RESET}")
+            dynamic_fields = []
+        else:
+            print(f"  Defined Fields: {len(fields)}")
+            print(f"  Dynamic Fields: {len(dynamic_fields)}")
+        print(f"  Indexed Fields in Use: {indexed_fields}")
+        
+        # Field statistics
+        if field_stats:
+            print(f"\nActive Fields (Top 10):")
+            ordered = sorted(field_stats.items(), key=lambda x: x[1]['docs'], reverse=True)[:10]
+            for field_name, stats in ordered:
+                percentage = (stats['docs'] / total_docs) * 100 if total_docs > 0 else 0
+                line = f"  {field_name:25} {percentage:5.1f}% ({stats['docs']:,}/{total_docs:,})"
+                if stats['distinct'] is not None:
+                    line += f"  distinct ~{stats['distinct']:,}"
+                if stats['min'] is not None:
+                    line += f"  range [{stats['min']} .. {stats['max']}]"
+                print(line)
+        
+        self._display_dynamic_patterns(dynamic_fields)
+        self._display_sample_docs(sample_docs)
+        print()
+    
+    # (gap, rounding unit, label format) for date ranges, finest first
+    EXPLORE_DATE_GAPS = [
+        ('+1MINUTE', 60, 'MINUTE', '%m-%d %H:%M'), ('+5MINUTES', 300, 'MINUTE', '%m-%d %H:%M'),
+        ('+15MINUTES', 900, 'MINUTE', '%m-%d %H:%M'), ('+1HOUR', 3600, 'HOUR', '%m-%d %H:00'),
+        ('+6HOURS', 21600, 'HOUR', '%m-%d %H:00'), ('+1DAY', 86400, 'DAY', '%Y-%m-%d'),
+        ('+7DAYS', 604800, 'DAY', '%Y-%m-%d'), ('+1MONTH', 2629746, 'MONTH', '%Y-%m'),
+        ('+3MONTHS', 7889238, 'MONTH', '%Y-%m'), ('+1YEAR', 31556952, 'YEAR', '%Y'),
+        ('+5YEARS', 157784760, 'YEAR', '%Y'), ('+10YEARS', 315569520, 'YEAR', '%Y'),
+    ]
+    
+    def _index_version(self, collection_name: str) -> Optional[str]:
+        """Fingerprint that changes whenever documents are added, updated or deleted.
+        
+        The highest _version_ moves on every add or update and numFound on
+        deletes; None (no _version_ field) disables result caching.
+        """
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        try:
+            data = self._fetch_json(select_url, 'select', {'q': '*:*', 'rows': 1, 'sort': '_version_ desc',
+                                                           'fl': '_version_', 'omitHeader': 'true'})
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 400:
+                return None
+            raise
+        response = data.get('response', {})
+        docs = response.get('docs') or [{}]
+        return f"{response.get('numFound', 0)}:{docs[0].get('_version_', '')}"
+    
+    @staticmethod
+    def _nice_gap(span: float, buckets: int, integer: bool) -> float:
+        """Smallest 1, 2 or 5 times a power of ten that covers span in at most `buckets` steps"""
+        raw = span / buckets if span > 0 else 1
+        magnitude = 10 ** math.floor(math.log10(raw))
+        gap = next(step * magnitude for step in (1, 2, 5, 10) if step * magnitude >= raw)
+        return max(1, math.ceil(gap)) if integer else gap
+    
+    def _explore_range(self, info: Dict, low, high, buckets: int) -> Optional[Dict]:
+        """Range facet bounds for a numeric or date field, chosen from its type and min/max"""
+        if low is None or high is None:
+            return None
+        if info['kind'] == 'date':
+            try:
+                first = calendar.timegm(time.strptime(str(low)[:19], '%Y-%m-%dT%H:%M:%S'))
+                last = calendar.timegm(time.strptime(str(high)[:19], '%Y-%m-%dT%H:%M:%S'))
+            except ValueError:
+                return None
+            gap, _, unit, label = next((choice for choice in self.EXPLORE_DATE_GAPS
+                                        if (last - first) / choice[1] <= buckets), self.EXPLORE_DATE_GAPS[-1])
+            return {'start': f"{low}/{unit}", 'end': f"{high}/{unit}{gap}", 'gap': gap, 'label': label}
+        
+        integer = any(marker in info.get('type_class', '') for marker in ('Int', 'Long'))
+        gap = self._nice_gap(float(high) - float(low), buckets, integer)
+        start = math.floor(float(low) / gap) * gap
+        end = (math.floor(float(high) / gap) + 1) * gap
+        if integer:
+            start, end = int(start), int(end)
+        else:
+            start, end = round(start, 12), round(end, 12)
+        return {'start': start, 'end': end, 'gap': gap, 'label': None}
+    
+    def _explore_bounds(self, select_url: str, names: List[str],
+                        version: Optional[str]) -> Tuple[Dict[str, Tuple], int]:
+        """Min and max of numeric and date fields over the whole collection, plus the requests made.
+        
+        Bounds are taken without the filters and cached per index version, so
+        bucket edges stay the same while drilling down and histograms of
+        different filter sets line up.
+        """
+        bounds = {}
+        missing = []
+        for name in names:
+            entry = self.cache.get(f"{select_url}#explore-bounds/{version}/{name}") if version else None
+            if entry is not None:
+                bounds[name] = tuple(entry['value'])
+                self.cache.record('hits')
+            else:
+                missing.append(name)
+        if missing:
+            data = self._fetch_json(select_url, 'stats', {
+                'q': '*:*', 'rows': 0, 'omitHeader': 'true', 'stats': 'true',
+                'stats.field': [f"{{!min=true max=true}}{name}" for name in missing],
+            })
+            stats = (data.get('stats') or {}).get('stats_fields') or {}
+            for name in missing:
+                self.cache.record('misses')
+                field_stats = stats.get(name) or {}
+                bounds[name] = (field_stats.get('min'), field_stats.get('max'))
+                if version:
+                    self.cache.put(f"{select_url}#explore-bounds/{version}/{name}", list(bounds[name]))
+        return bounds, 1 if missing else 0
+    
+    def explore_collection(self, collection_name: str, filters: Optional[List[str]] = None,
+                           fields: Optional[List[str]] = None, top: int = 10, buckets: int = 12,
+                           limit: int = 8) -> bool:
+        """Value distributions of the most used fields, optionally under filter queries.
+        
+        Terms facets for string and boolean fields and range facets for
+        numeric and date fields all go in one JSON Facet request. Each field's
+        result is cached under (collection, filters, index version), so
+        drilling down and back, or adding a field, only fetches what is not
+        already known.
+        """
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        filters = sorted(set(filters or []))
+        select_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        luke_url = urljoin(self.base_url + '/', f'solr/{collection_name}/admin/luke')
+        start = time.perf_counter()
+        requests_made = 0
+        try:
+            catalog, _ = self._field_catalog(collection_name)
+            unique_key = self._get_unique_key(collection_name)
+            try:
+                luke_fields = self._fetch_cached_json(luke_url, 'luke', {'numTerms': 0}).get('fields', {})
+            except requests.exceptions.RequestException:
+                luke_fields = {}
+            
+            if fields:
+                unknown = [name for name in fields if name not in catalog]
+                if unknown:
+                    print(f"{Colors.RED}Unknown field(s) in '{collection_name}': {', '.join(unknown)}{Colors.RESET}")
+                    return False
+                chosen = list(dict.fromkeys(fields))
+            else:
+                candidates = [name for name, info in catalog.items() if info['kind'] != 'text' and name != unique_key
+                              and (name in luke_fields or not luke_fields)]
+                # Without Luke every count is 0 and the stable sort keeps catalog order
+                chosen = sorted(candidates, key=lambda name: luke_fields.get(name, {}).get('docs', 0), reverse=True)[:limit]
+            if not chosen:
+                print(f"{Colors.YELLOW}No facetable fields found in '{collection_name}'{Colors.RESET}")
+                return False
+            
+            version = self._index_version(collection_name)
+            requests_made += 1
+            specs = {name: {'type': 'terms', 'field': name, 'limit': top, 'missing': True, 'numBuckets': True}
+                     for name in chosen}
+            ranged = [name for name in chosen if catalog[name]['kind'] in ('numeric', 'date')]
+            if ranged:
+                bounds, fetched = self._explore_bounds(select_url, ranged, version)
+                requests_made += fetched
+                for name in ranged:
+                    # Fields without any values keep the terms facet, which shows the missing count
+                    spec_range = self._explore_range(catalog[name], *bounds[name], buckets)
+                    if spec_range is not None:
+                        specs[name] = dict(spec_range, type='range', field=name)
+            
+            filter_key = urlencode([('fq', fq) for fq in filters])
+            keys = {name: f"{select_url}?{filter_key}#explore/{version}/{json.dumps(specs[name], sort_keys=True)}"
+                    for name in chosen}
+            results: Dict[str, Dict] = {}
+            pending = []
+            for name in chosen:
+                entry = self.cache.get(keys[name]) if version else None
+                if entry is not None:
+                    results[name] = entry['value']
+                    self.cache.record('hits')
+                else:
+                    pending.append(name)
+            
+            if pending:
+                results.update(self._fetch_explore_facets(select_url, filters, pending, specs))
+                requests_made += 1
+                for name in pending:
+                    self.cache.record('misses')
+                    if version and name in results:
+                        self.cache.put(keys[name], results[name])
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                print(f"{Colors.RED}Collection '{collection_name}' not found{Colors.RESET}")
+            else:
+                print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
+            return False
+        except requests.exceptions.RequestException as e:
+            print(f"{Colors.RED}Error exploring collection: {e}{Colors.RESET}")
+            return False
+        
+        self._display_explore(collection_name, filters, chosen, catalog, specs, results,
+                              len(chosen) - len(pending), requests_made, time.perf_counter() - start)
+        return True
+    
+    def _fetch_explore_facets(self, select_url: str, filters: List[str], names: List[str],
+                              specs: Dict[str, Dict]) -> Dict[str, Dict]:
+        """One JSON Facet request for several fields; fields Solr cannot facet on are retried alone and skipped"""
+        facet = {}
+        for i, name in enumerate(names):
+            facet[f'f{i}'] = {key: value for key, value in specs[name].items() if key != 'label'}
+            if specs[name]['type'] == 'range':
+                # Range facets have no missing count
+                facet[f'f{i}_docs'] = {'type': 'query', 'q': f"{name}:[* TO *]"}
+        params = {'q': '*:*', 'rows': 0, 'omitHeader': 'true', 'fq': filters, 'json.facet': json.dumps(facet)}
+        try:
+            data = self._fetch_json(select_url, 'stats', params)
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code != 400 or len(names) == 1:
+                raise
+            results = {}
+            futures = [self._get_executor().submit(self._fetch_explore_facets, select_url, filters, [name], specs)
+                       for name in names]
+            for future in futures:
+                try:
+                    results.update(future.result())
+                except requests.exceptions.HTTPError as e:
+                    if e.response.status_code != 400:
+                        raise
+            return results
+        
+        facets = data.get('facets', {})
+        matched = facets.get('count', data.get('response', {}).get('numFound', 0))
+        results = {}
+        for i, name in enumerate(names):
+            field_facet = facets.get(f'f{i}') or {}
+            buckets = [[bucket.get('val'), bucket.get('count', 0)] for bucket in field_facet.get('buckets', [])]
+            if specs[name]['type'] == 'range':
+                docs = (facets.get(f'f{i}_docs') or {}).get('count', 0)
+            else:
+                docs = matched - (field_facet.get('missing') or {}).get('count', 0)
+            results[name] = {'matched': matched, 'docs': docs, 'buckets': buckets,
+                             'distinct': field_facet.get('numBuckets')}
+        return results
+    
+    @traced('render')
+    def _display_explore(self, collection_name: str, filters: List[str], chosen: List[str], catalog: Dict[str, Dict],
+                         specs: Dict[str, Dict], results: Dict[str, Dict], cached: int, requests_made: int,
+                         elapsed: float):
+        """Terminal histograms of each explored field"""
+        matched = next((result['matched'] for result in results.values()), 0)
+        self.last_result = {'collection': collection_name, 'filters': filters, 'matched': matched,
+                            'fields': {name: dict(results[name], kind=catalog[name]['kind'],
+                                                  gap=specs[name].get('gap'))
+                                       for name in chosen if name in results}}
+        
+        print(f"\n{Colors.BOLD}EXPLORE: {collection_name}{Colors.RESET}  {matched:,} documents"
+              + (f" matching {' AND '.join(filters)}" if filters else ''))
+        print(f"  {len(chosen)} fields, {cached} from cache, {requests_made} quer{'y' if requests_made == 1 else 'ies'} "
+              f"in {elapsed * 1000:,.0f}ms")
+        
+        for name in chosen:
+            result = results.get(name)
+            info = catalog[name]
+            if result is None:
+                print(f"\n  {Colors.CYAN}{name}{Colors.RESET} ({info['type']}): {Colors.YELLOW}cannot be faceted"
+                      f"{Colors.RESET}")
+                continue
+            spec = specs[name]
+            coverage = f"{result['docs'] / matched:.0%} of documents" if matched else 'no documents'
+            detail = f", {result['distinct']:,} distinct" if result.get('distinct') is not None else ''
+            if spec['type'] == 'range' and spec['label']:
+                count, unit = re.match(r'\+(\d+)([A-Z]+?)S?$', spec['gap']).groups()
+                detail = f", per {unit.lower()}" if count == '1' else f", per {count} {unit.lower()}s"
+            elif spec['type'] == 'range':
+                detail = f", per {spec['gap']:,g}"
+            print(f"\n  {Colors.CYAN}{name}{Colors.RESET} ({info['type']}, {coverage}{detail})")
+            
+            rows = []
+            for value, count in result['buckets']:
+                if spec['type'] == 'range' and spec['label']:
+                    label = time.strftime(spec['label'], time.strptime(str(value)[:19], '%Y-%m-%dT%H:%M:%S'))
+                elif spec['type'] == 'range':
+                    label = f"{value:,g} – {value + spec['gap']:,g}"
+                else:
+                    label = str(value)
+                rows.append((label, count))
+            if spec['type'] == 'range':
+                # Trim empty buckets at both ends
+                while rows and not rows[0][1]:
+                    rows.pop(0)
+                while rows and not rows[-1][1]:
+                    rows.pop()
+            elif result['docs'] < matched:
+                rows.append(('(missing)', matched - result['docs']))
+            if not rows:
+                print("    no values")
+                continue
+            
+            widest = max(count for _, count in rows) or 1
+            label_width = min(30, max(len(label) for label, _ in rows))
+            for label, count in rows:
+                share = f" ({count / matched:.1%})" if matched else ''
+                print(f"    {label[:label_width]:>{label_width}} {Colors.CYAN}{'█' * round(count / widest * 40):40}"
+                      f"{Colors.RESET} {count:,}{share}")
+            if spec['type'] != 'range' and result.get('distinct') and result['distinct'] > len(result['buckets']):
+                others = result['docs'] - sum(count for _, count in result['buckets'])
+                print(f"    {'':>{label_width}} ... {result['distinct'] - len(result['buckets']):,} more values"
+                      + (f" in {others:,} documents" if others > 0 else ''))
+        print()
+    
+    def _fetch_json(self, url: str, endpoint: str, params: Optional[Dict] = None,
+                    projection: Optional[Dict] = None) -> Dict:
+        """GET a URL through the shared transport and decode the JSON body"""
+        response = self.transport.get(url, endpoint=endpoint, params=params)
+        response.raise_for_status()
+        return self._decode(response, endpoint, projection)
+    
+    def _decode(self, response: requests.Response, endpoint: str, projection: Optional[Dict] = None):
+        """Decode a JSON response body, timed as a 'decode' span.
+        
+        The raw bytes go straight to the parser (orjson when installed),
+        skipping requests' charset detection and text copy; with a
+        projection only the named paths are parsed.
+        """
+        with TRACER.span('decode', endpoint):
+            if projection is not None:
+                return project_json(response.content, projection)
+            return json_loads(response.content)
+    
+    def _fetch_cached_json(self, url: str, endpoint: str, params: Optional[Dict] = None,
+                           version_url: Optional[str] = None, projection: Optional[Dict] = None) -> Dict:
+        """Fetch JSON metadata through the metadata cache.
+        
+        Fresh entries are answered locally. Stale entries are revalidated
+        with the schema zkVersion (when version_url is given) or with a
+        conditional GET when the server sent ETag/Last-Modified, and only
+        re-downloaded when they actually changed.
+        """
+        key = url + ('?' + urlencode(sorted(params.items())) if params else '')
+        if projection is not None:
+            # Projected values are partial, so they never share an entry with the full body
+            key += '#' + json.dumps(projection, sort_keys=True, separators=(',', ':'))
+        entry = self.cache.get(key)
+        version = None
+        
+        if entry is not None:
+            if time.time() - entry['fetched_at'] < self.cache.ttl(endpoint):
+                self.cache.record('hits')
+                return entry['value']
+            
+            if version_url and entry.get('version') is not None:
+                version = self._fetch_schema_version(version_url)
+                if version is not None and version == entry['version']:
+                    self.cache.touch(key)
+                    self.cache.record('revalidated')
+                    return entry['value']
+            elif entry.get('etag') or entry.get('last_modified'):
+                headers = {}
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+                response = self.transport.get(url, endpoint=endpoint, params=params, headers=headers)
+                if response.status_code == 304:
+                    self.cache.touch(key)
+                    self.cache.record('revalidated')
+                    return entry['value']
+                response.raise_for_status()
+                value = self._decode(response, endpoint, projection)
+                self.cache.put(key, value, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                self.cache.record('misses')
+                return value
+        
+        # Read the version before the body so a concurrent change is never masked
+        if version_url and version is None:
+            version = self._fetch_schema_version(version_url)
+        response = self.transport.get(url, endpoint=endpoint, params=params)
+        response.raise_for_status()
+        value = self._decode(response, endpoint, projection)
+        self.cache.put(key, value, response.headers.get('ETag'), response.headers.get('Last-Modified'), version)
+        self.cache.record('misses')
+        return value
+    
+    def _schema_version_url(self, collection_name: str) -> str:
+        return urljoin(self.base_url + '/', f'solr/{collection_name}/schema/zkversion')
+    
+    def _fetch_schema_version(self, version_url: str) -> Optional[int]:
+        """Current schema zkVersion, or None when it is not tracked (standalone mode)"""
+        try:
+            version = self._fetch_json(version_url, 'schema').get('zkversion')
+        except Exception:
+            return None
+        return version if isinstance(version, int) and version >= 0 else None
     
-    def _try_list_cores(self) -> bool:
-        """List cores in standalone Solr mode"""
+    def refresh(self, collection_name: Optional[str] = None) -> bool:
+        """Invalidate cached metadata for this instance or a single collection"""
+        if not self.connected:
+            print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
+            return False
+        
+        if collection_name:
+            prefix = urljoin(self.base_url + '/', f'solr/{collection_name}/')
+            removed = self.cache.invalidate(prefix)
+            print(f"{Colors.GREEN}Cleared {removed} cached entries for '{collection_name}'{Colors.RESET}")
+        else:
+            # Collection-level entries live under the same base URL
+            removed = self.cache.invalidate(self.base_url + '/')
+            print(f"{Colors.GREEN}Cleared {removed} cached entries for {self.base_url}{Colors.RESET}")
+        return True
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool used to fan out independent requests"""
+        if self._executor is None:
+            self._executor = _ContextExecutor(
+                max_workers=self.transport.pool_maxsize,
+                thread_name_prefix='solr-fanout'
+            )
+        return self._executor
+    
+    def _get_unique_key(self, collection_name: str) -> str:
+        """Look up the uniqueKey field, needed as the cursorMark tie-breaker"""
+        url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema/uniquekey')
         try:
-            cores_url = urljoin(self.base_url + '/', 'solr/admin/cores?action=STATUS')
-            response = requests.get(cores_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('responseHeader', {}).get('status') == 0:
-                cores = list(data.get('status', {}).keys())
-                self._display_collections(cores, mode="standalone")
-                return True
-            else:
-                print(f"{Colors.RED}Failed to retrieve collections/cores{Colors.RESET}")
-                return False
-                
-        except Exception as e:
-            print(f"{Colors.RED}Error listing collections/cores: {e}{Colors.RESET}")
+            data = self._fetch_cached_json(url, 'schema', version_url=self._schema_version_url(collection_name))
+            return data.get('uniqueKey', 'id')
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404 and not self._collection_exists(collection_name):
+                raise
+            return 'id'
+    
+    def _collection_exists(self, collection_name: str) -> bool:
+        url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        try:
+            self._fetch_json(url, 'select', {'q': '*:*', 'rows': 0, 'omitHeader': 'true'})
+            return True
+        except requests.exceptions.HTTPError:
             return False
     
-    def _display_collections(self, collections: List[str], mode: str = "cloud"):
-        """Display collections"""
-        mode_label = "Collections" if mode == "cloud" else "Cores"
+    def iter_cursor_pages(self, collection_name: str, params: Dict, cursor: str = '*',
+                          select_url: Optional[str] = None):
+        """Yield (docs, next_cursor, num_found) pages using cursorMark deep paging.
         
-        print(f"\n{mode_label} ({mode.title()} Mode):")
-        print("-" * 40)
+        The next page is requested in the background while the caller is
+        still processing the current one. `params` must include a sort that
+        ends on the uniqueKey. `select_url` overrides the collection's
+        /select, e.g. to read a single replica core.
+        """
+        url = select_url or urljoin(self.base_url + '/', f'solr/{collection_name}/select')
+        executor = self._get_executor()
         
-        if not collections:
-            print(f"No {mode_label.lower()} found")
-        else:
-            print(f"Found {len(collections)} {mode_label.lower()}:\n")
-            
-            for i, collection in enumerate(collections, 1):
-                print(f"  {i}. {collection}")
+        def fetch(mark):
+            return self._fetch_json(url, 'cursor', dict(params, cursorMark=mark, omitHeader='true'))
         
-        print()
+        future = executor.submit(fetch, cursor)
+        while True:
+            data = future.result()
+            next_cursor = data.get('nextCursorMark', cursor)
+            docs = data['response']['docs']
+            done = next_cursor == cursor or not docs
+            if not done:
+                future = executor.submit(fetch, next_cursor)
+            yield docs, next_cursor, data['response']['numFound']
+            if done:
+                return
+            cursor = next_cursor
+    
+    def _profile_state_path(self, collection_name: str) -> str:
+        host = urlparse(self.base_url).netloc.replace(':', '_')
+        return os.path.join(STATE_DIR, 'profile', f'{host}_{collection_name}.json')
+    
+    def _save_state(self, path: str, state: Dict):
+        """Write a JSON state file atomically"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
     
-    def summarize_collection(self, collection_name: str) -> bool:
-        """Get summary of a collection"""
+    def profile_collection(self, collection_name: str, fields: Optional[List[str]] = None,
+                           slices: int = 1, resume: bool = False, page_size: int = 1000) -> bool:
+        """Profile field coverage over a whole collection (or a hash slice of it)"""
         if not self.connected:
             print(f"{Colors.RED}Not connected to Solr. Use 'connect' command first.{Colors.RESET}")
             return False
         
+        state_path = self._profile_state_path(collection_name)
+        profiler = FieldProfiler()
+        cursor = '*'
+        # Documents of the page starting at `cursor` that were already counted
+        skip = 0
+        
+        if resume:
+            try:
+                with open(state_path) as f:
+                    state = json.load(f)
+                profiler = FieldProfiler.from_state(state['profiler'])
+                cursor = state['cursor']
+                skip = state.get('skip', 0)
+                fields = state.get('fields')
+                slices = state.get('slices', 1)
+                print(f"{Colors.CYAN}Resuming profile of '{collection_name}' at {profiler.docs_seen:,} documents{Colors.RESET}")
+            except FileNotFoundError:
+                print(f"{Colors.YELLOW}No saved profile for '{collection_name}', starting from the beginning{Colors.RESET}")
+            except (ValueError, KeyError) as e:
+                print(f"{Colors.YELLOW}Ignoring unreadable profile state: {e}{Colors.RESET}")
+        
         try:
-            print(f"Analyzing collection '{collection_name}'...")
-            
-            # Get document count
-            count_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
-            count_response = requests.get(count_url, params={'q': '*:*', 'rows': 0}, timeout=10)
-            count_response.raise_for_status()
-            count_data = count_response.json()
-            total_docs = count_data['response']['numFound']
+            unique_key = self._get_unique_key(collection_name)
+            params = {'q': '*:*', 'sort': f'{unique_key} asc', 'rows': page_size}
+            if fields:
+                params['fl'] = ','.join(fields)
+            if slices > 1:
+                # Deterministic 1/N slice of the index, partitioned by uniqueKey hash
+                params['fq'] = f'{{!hash workers={slices} worker=0 partitionKeys={unique_key}}}'
             
-            # Get schema information
-            schema_url = urljoin(self.base_url + '/', f'solr/{collection_name}/schema')
-            schema_response = requests.get(schema_url, timeout=10)
-            schema_response.raise_for_status()
-            schema_data = schema_response.json()
+            print(f"Profiling collection '{collection_name}'" +
+                  (f" (1/{slices} slice)" if slices > 1 else "") + "... press Ctrl-C to pause")
             
-            fields = schema_data['schema']['fields']
-            dynamic_fields = schema_data['schema']['dynamicFields']
+            start = time.perf_counter()
+            started_at = profiler.docs_seen
+            last_report = 0.0
+            last_save = start
+            total = 0
             
-            # Get sample documents
-            field_usage = {}
-            sample_docs = []
-            if total_docs > 0:
-                sample_url = urljoin(self.base_url + '/', f'solr/{collection_name}/select')
-                sample_response = requests.get(
-                    sample_url,
-                    params={'q': '*:*', 'rows': min(100, total_docs)},
-                    timeout=10
-                )
-                sample_response.raise_for_status()
-                sample_data = sample_response.json()
-                sample_docs = sample_data['response']['docs'][:3]
-                
-                # Analyze field usage
-                for doc in sample_data['response']['docs']:
-                    for field_name in doc.keys():
-                        if field_name not in ['_version_', '_root_']:
-                            field_usage[field_name] = field_usage.get(field_name, 0) + 1
+            try:
+                for docs, next_cursor, total in self.iter_cursor_pages(collection_name, params, cursor):
+                    check_cancelled()
+                    for doc in docs[skip:]:
+                        profiler.add(doc)
+                        skip += 1
+                    cursor = next_cursor
+                    skip = 0
+                    
+                    now = time.perf_counter()
+                    if now - last_report >= 0.5:
+                        last_report = now
+                        rate = (profiler.docs_seen - started_at) / max(now - start, 1e-9)
+                        remaining = max(0, total - profiler.docs_seen)
+                        eta = format_duration(remaining / rate) if rate > 0 else "?"
+                        pct = profiler.docs_seen / total * 100 if total else 100.0
+                        print(f"\r{Colors.ORANGE}{profiler.docs_seen:,}/{total:,} docs ({pct:5.1f}%) "
+                              f"{rate:,.0f} docs/s  ETA {eta}{Colors.RESET}   ", end="", flush=True)
+                    if now - last_save >= 5:
+                        last_save = now
+                        self._save_state(state_path, {
+                            'cursor': cursor, 'skip': skip, 'fields': fields, 'slices': slices,
+                            'profiler': profiler.to_state(),
+                        })
+            except KeyboardInterrupt:
+                self._save_state(state_path, {
+                    'cursor': cursor, 'skip': skip, 'fields': fields, 'slices': slices,
+                    'profiler': profiler.to_state(),
+                })
+                print(f"\n{Colors.YELLOW}Profile paused at {profiler.docs_seen:,} documents. "
+                      f"Run 'profile {collection_name} --resume' to continue.{Colors.RESET}")
+                self._display_profile(collection_name, profiler, total, slices)
+                return True
             
-            # Display summary
-            self._display_summary(
-                collection_name, total_docs, fields, dynamic_fields, 
-                field_usage, sample_docs, len(sample_data['response']['docs']) if total_docs > 0 else 0
-            )
+            elapsed = time.perf_counter() - start
+            print("\r" + " " * 72 + "\r", end="")
+            print(f"Processed {profiler.docs_seen - started_at:,} documents in {elapsed:.1f}s "
+                  f"({(profiler.docs_seen - started_at) / max(elapsed, 1e-9):,.0f} docs/s)")
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            self._display_profile(collection_name, profiler, total, slices)
             return True
             
         except requests.exceptions.HTTPError as e:
@@ -486,11 +6406,50 @@ class SolrConnection:
                 print(f"{Colors.RED}HTTP error: {e}{Colors.RESET}")
             return False
         except Exception as e:
-            print(f"{Colors.RED}Error analyzing collection: {e}{Colors.RESET}")
+            print(f"\n{Colors.RED}Error profiling collection: {e}{Colors.RESET}")
             return False
     
+    @traced('render')
+    def _display_profile(self, collection_name: str, profiler: FieldProfiler, total_docs: int, slices: int):
+        """Display field profile"""
+        seen = profiler.docs_seen
+        self.last_result = {
+            'collection': collection_name, 'docs_profiled': seen, 'total_docs': total_docs, 'slices': slices,
+            'fields': {
+                name: {'docs': stats['docs'], 'distinct': min(stats['hll'].estimate(), stats['values']),
+                       'avg_length': stats['total_length'] / stats['values'] if stats['values'] else 0}
+                for name, stats in profiler.fields.items()
+            },
+        }
+        print(f"\n{Colors.BOLD}FIELD PROFILE: {collection_name}{Colors.RESET}")
+        print("=" * 78)
+        scope = f"1/{slices} hash slice" if slices > 1 else "full collection"
+        print(f"  Documents profiled: {seen:,} of {total_docs:,} ({scope})")
+        
+        if not profiler.fields:
+            print("  No fields found\n")
+            return
+        
+        print(f"\n  {'Field':28} {'Coverage':>9} {'~Distinct':>11} {'Avg Len':>8}  Length Histogram")
+        print("  " + "-" * 76)
+        ordered = sorted(profiler.fields.items(), key=lambda x: x[1]['docs'], reverse=True)
+        for field_name, stats in ordered:
+            coverage = stats['docs'] / seen * 100 if seen else 0
+            avg_len = stats['total_length'] / stats['values'] if stats['values'] else 0
+            distinct = min(stats['hll'].estimate(), stats['values'])
+            print(f"  {field_name[:28]:28} {coverage:8.1f}% {distinct:>11,} {avg_len:8.1f}  "
+                  f"{sparkline(stats['lengths'])}")
+        print()
+    
+    @traced('render')
     def _display_summary(self, collection_name, total_docs, fields, dynamic_fields, field_usage, sample_docs, sample_count):
         """Display collection summary"""
+        self.last_result = {
+            'collection': collection_name, 'engine': 'sample', 'total_docs': total_docs,
+            'defined_fields': len(fields) if fields is not None else None,
+            'dynamic_fields': len(dynamic_fields) if dynamic_fields is not None else None,
+            'sample_size': sample_count, 'field_usage': field_usage, 'sample_docs': sample_docs,
+        }
         print(f"\n{Colors.BOLD}COLLECTION: {collection_name}{Colors.RESET}")
         print("=" * 60)
         
@@ -502,8 +6461,13 @@ class SolrConnection:
         
         # Schema info
         print(f"\nSchema Overview:")
-        print(f"  Defined Fields: {len(fields)}")
-        print(f"  Dynamic Fields: {len(dynamic_fields)}")
+        if fields is None:
+            print(f"  {Colors.YELLOW}Schema information unavailable{Colors.RESET}")
+            fields = []
+            dynamic_fields = []
+        else:
+            print(f"  Defined Fields: {len(fields)}")
+            print(f"  Dynamic Fields: {len(dynamic_fields)}")
         
         # Field usage
         if field_usage:
@@ -513,7 +6477,12 @@ class SolrConnection:
                 percentage = (count / sample_count) * 100 if sample_count > 0 else 0
                 print(f"  {field_name:25} {percentage:5.1f}% ({count}/{sample_count})")
         
-        # Dynamic field patterns
+        self._display_dynamic_patterns(dynamic_fields)
+        self._display_sample_docs(sample_docs)
+        print()
+    
+    def _display_dynamic_patterns(self, dynamic_fields: List[Dict]):
+        """Display the common dynamic field patterns defined in the schema"""
         print(f"\nDynamic Field Patterns:")
         
         patterns = [
@@ -525,20 +6494,20 @@ class SolrConnection:
             ('*_b', 'Boolean fields'),
         ]
         
-        found_patterns = []
-        for pattern, description in patterns:
-            for dfield in dynamic_fields:
-                if dfield['name'] == pattern:
-                    found_patterns.append((pattern, description, dfield))
-                    break
+        dynamic_fields = dynamic_fields or []
+        rules = {dfield['name']: dfield for dfield in dynamic_fields}
+        found_patterns = [(pattern, description, rules[pattern]) for pattern, description in patterns if pattern in rules]
         
         if found_patterns:
             for pattern, description, field_info in found_patterns:
                 stored = "Yes" if field_info.get('stored', False) else "No"
                 indexed = "Yes" if field_info.get('indexed', False) else "No"
                 print(f"  {pattern:10} - {description:20} (Indexed: {indexed}, Stored: {stored})")
-        
-        # Sample documents
+        if len(dynamic_fields) > len(found_patterns):
+            print(f"  {Colors.WHITE}{len(dynamic_fields)} rules in total; see 'schema <collection>'{Colors.RESET}")
+    
+    def _display_sample_docs(self, sample_docs: List[Dict]):
+        """Display a few sample documents with long values truncated"""
         if sample_docs:
             print(f"\nSample Documents:")
             
@@ -553,129 +6522,949 @@ class SolrConnection:
                             display_value = value
                         
                         print(f"    {key:18} {display_value}")
-        
+
+# Default per-command timeouts in seconds; streaming and interactive commands
+# (query, profile, export, index, monitor, watch, replay, logs, caches) run until finished or cancelled
+COMMAND_TIMEOUTS = {
+    'connect': 30,
+    'status': 10,
+    'info': 30,
+    'collections': 60,
+    'summarize': 300,
+    'cluster': 60,
+    'inventory': 120,
+    'use': 30,
+    'ask': 60,
+    'refresh': 30,
+    'schema': 600,
+    'explain': 60,
+    'explore': 60,
+}
+
+# Commands that never prompt for input and so can run as background jobs
+BACKGROUND_COMMANDS = ('summarize', 'profile', 'export', 'index', 'cluster', 'inventory', 'collections', 'info', 'ask',
+                       'schema', 'explain', 'explore', 'replay', 'logs', 'caches')
+
+def run_command(solr: SolrConnection, user_input: str) -> Optional[bool]:
+    """Dispatch one REPL command line; False means the command failed or was malformed"""
+    if user_input.lower() == 'help':
+        print(f"\n{Colors.CYAN}Available Commands:{Colors.RESET}")
+        print(f"  {Colors.GREEN}help{Colors.RESET}             - Show this help message")
+        print(f"  {Colors.GREEN}connect{Colors.RESET}          - Connect to a Solr instance")
+        print(f"  {Colors.GREEN}disconnect{Colors.RESET}       - Disconnect from current Solr instance")
+        print(f"  {Colors.GREEN}status{Colors.RESET}           - Show connection status")
+        print(f"  {Colors.GREEN}info{Colors.RESET}             - Show detailed Solr information")
+        print(f"  {Colors.GREEN}collections{Colors.RESET}      - Show all collections/cores")
+        print(f"  {Colors.GREEN}summarize{Colors.RESET}        - Analyze and summarize a collection")
+        print(f"  {Colors.GREEN}explore{Colors.RESET}          - Value distributions of the main fields (explore <collection> [--fq F]... [--fields a,b] [--buckets N])")
+        print(f"  {Colors.GREEN}profile{Colors.RESET}          - Profile field coverage across a whole collection")
+        print(f"  {Colors.GREEN}schema{Colors.RESET}           - Explore a schema (schema <collection> [field <name> | search <text> | type <name> | copies [field]])")
+        print(f"                     or change it from a spec file (schema <collection> diff|apply <spec.json> [--prune] [--batch N])")
+        print(f"  {Colors.GREEN}query{Colors.RESET}            - Run a query and page through results (query <collection> [q] [--sort S] [--fl F] [--limit N] [--all])")
+        print(f"  {Colors.GREEN}explain{Colors.RESET}          - Timing breakdown and parsed form of a query (explain <collection> <q> [--fq F] [--sort S] [--param k=v])")
+        print(f"  {Colors.GREEN}replay{Colors.RESET}           - Load-test with captured queries (replay <collection> <file> [--concurrency N] [--rate R] [--limit N])")
+        print(f"  {Colors.GREEN}logs{Colors.RESET}             - Slow handlers, QTime over time, error bursts and GC pauses from log files (logs [path] [--since T] [--collection C])")
+        print(f"  {Colors.GREEN}export{Colors.RESET}           - Export results to JSONL/CSV/Parquet (export <collection> <query> <file> [--fl F] [--resume])")
+        print(f"  {Colors.GREEN}index{Colors.RESET}            - Bulk index a JSONL/CSV file (index <collection> <file> [--batch N] [--workers N])")
+        print(f"  {Colors.GREEN}use{Colors.RESET}              - Select a collection for plain English questions")
+        print(f"  {Colors.GREEN}ask{Colors.RESET}              - Ask a question in plain English (or just type it)")
+        print(f"  {Colors.GREEN}cluster{Colors.RESET}          - Health of all live nodes (cluster [--sort heap|load|fd])")
+        print(f"  {Colors.GREEN}inventory{Colors.RESET}        - Docs, sizes, segments and replica health (inventory [pattern] [--sort KEY] [--cores] [--unhealthy] [--limit N])")
+        print(f"  {Colors.GREEN}caches{Colors.RESET}           - Cache hit ratios, evictions and warmup with tuning advice (caches [pattern] [--interval N] [--warm FILE [--apply]])")
+        print(f"  {Colors.GREEN}monitor{Colors.RESET}          - Live metrics (monitor start [collection] [--interval N] | stop)")
+        print(f"  {Colors.GREEN}watch{Colors.RESET}            - Growth, deletes and size changes of a collection (watch <collection> [--interval N] [--fields a,b] [--count N])")
+        print(f"  {Colors.GREEN}bg{Colors.RESET}               - Run a command in the background (bg summarize <collection>)")
+        print(f"  {Colors.GREEN}jobs{Colors.RESET}             - List background jobs (cancel <job> to stop one)")
+        print(f"  {Colors.GREEN}timings{Colors.RESET}          - Show timing of recent HTTP requests")
+        print(f"  {Colors.GREEN}stats{Colors.RESET}            - Latency percentiles per endpoint and command (stats [reset])")
+        print(f"  {Colors.GREEN}trace{Colors.RESET}            - Record timing spans (trace on|off|export <file>)")
+        print(f"  {Colors.GREEN}refresh{Colors.RESET}          - Clear cached schema/collection metadata")
+        print(f"  {Colors.GREEN}clear{Colors.RESET}            - Clear the screen")
+        print(f"  {Colors.GREEN}exit{Colors.RESET}             - Exit Solr Assistant")
+        print(f"\n{Colors.WHITE}Ctrl-C cancels the running command; add --timeout N to any command to limit it.{Colors.RESET}")
+        print(f"\n{Colors.YELLOW}More Solr features coming soon!{Colors.RESET}\n")
+    elif user_input.lower() == 'clear':
+        print("\033[2J\033[H")
+        print_solr_logo()
         print()
+        print_logo()
+        print(f"\n{Colors.CYAN}{'═' * 72}{Colors.RESET}")
+        print(f"{Colors.BOLD}{Colors.WHITE}  Welcome to Apache Solr - Your Search and AI Assistant{Colors.RESET}")
+        print(f"{Colors.CYAN}{'═' * 72}{Colors.RESET}\n")
+    elif user_input.lower() == 'connect':
+        solr_url = read_input("Enter Solr URL: ").strip()
+        if solr_url:
+            return solr.connect(solr_url)
+        else:
+            print("Invalid URL")
+    elif user_input.lower() == 'disconnect':
+        if solr.connected:
+            solr.disconnect()
+        else:
+            print("Not connected")
+    elif user_input.lower() == 'status':
+        print(f"Status: {solr.get_status()}\n")
+    elif user_input.lower() == 'info':
+        if solr.connected:
+            solr._display_info()
+        else:
+            print("Not connected. Use 'connect' command first.")
+            return False
+    elif user_input.lower() == 'collections':
+        return solr.list_collections()
+    elif user_input.lower().startswith('profile'):
+        parts = user_input.split()
+        if len(parts) < 2:
+            print("Usage: profile <collection> [--slice N] [--fields f1,f2] [--resume]")
+            return False
+        else:
+            fields = None
+            slices = 1
+            resume = False
+            valid = True
+            args = parts[2:]
+            while args:
+                arg = args.pop(0)
+                if arg == '--resume':
+                    resume = True
+                elif arg == '--slice' and args and args[0].isdigit():
+                    slices = max(1, int(args.pop(0)))
+                elif arg == '--fields' and args:
+                    fields = [f for f in args.pop(0).split(',') if f]
+                else:
+                    valid = False
+            if valid:
+                return solr.profile_collection(parts[1], fields=fields, slices=slices, resume=resume)
+            else:
+                print("Usage: profile <collection> [--slice N] [--fields f1,f2] [--resume]")
+                return False
+    elif user_input.lower().startswith('schema ') or user_input.lower() == 'schema':
+        usage = ("Usage: schema <collection> [field <name> | search <text> | type <name> | copies [field]]\n"
+                 "       schema <collection> diff|apply <spec.json> [--prune] [--batch N]")
+        try:
+            parts = shlex.split(user_input)
+        except ValueError:
+            parts = []
+        if len(parts) == 2:
+            return solr.explore_schema(parts[1])
+        elif len(parts) == 4 and parts[2] in ('field', 'search', 'type', 'copies'):
+            return solr.explore_schema(parts[1], parts[2], parts[3])
+        elif len(parts) == 3 and parts[2] == 'copies':
+            return solr.explore_schema(parts[1], 'copies')
+        elif len(parts) >= 4 and parts[2] in ('diff', 'apply'):
+            options = {'prune': False, 'batch': 500}
+            args = parts[4:]
+            valid = True
+            while args:
+                arg = args.pop(0)
+                if arg == '--prune':
+                    options['prune'] = True
+                elif arg == '--batch' and args and args[0].isdigit():
+                    options['batch'] = max(1, int(args.pop(0)))
+                else:
+                    valid = False
+            if valid:
+                return solr.manage_schema(parts[1], parts[3], apply=parts[2] == 'apply',
+                                          prune=options['prune'], batch_size=options['batch'])
+            print(usage)
+            return False
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('query ') or user_input.lower() == 'query':
+        usage = "Usage: query <collection> [q] [--sort \"field dir\"] [--fl a,b] [--limit N] [--rows N] [--all] [--export|--cursor]"
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'sort': None, 'fl': None, 'limit': None, 'rows': 20, 'export': None, 'interactive': True}
+        terms = []
+        valid = bool(parts)
+        while valid and len(parts) > 1:
+            arg = parts.pop(1)
+            if arg in ('--sort', '--fl') and len(parts) > 1:
+                options[arg[2:]] = parts.pop(1)
+            elif arg in ('--limit', '--rows') and len(parts) > 1 and parts[1].isdigit():
+                options[arg[2:]] = max(1, int(parts.pop(1)))
+            elif arg == '--all':
+                options['interactive'] = False
+            elif arg in ('--export', '--cursor'):
+                options['export'] = arg == '--export'
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                terms.append(arg)
+        if valid:
+            return solr.run_query(parts[0], ' '.join(terms) or '*:*', sort=options['sort'], fl=options['fl'],
+                                  limit=options['limit'], page_size=options['rows'],
+                                  export=options['export'], interactive=options['interactive'])
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('explain ') or user_input.lower() == 'explain':
+        usage = "Usage: explain <collection> <q> [--fq F]... [--sort \"field dir\"] [--rows N] [--param name=value]..."
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        params = {}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg in ('--fq', '--sort', '--rows') and parts:
+                params.setdefault(arg[2:], []).append(parts.pop(0))
+            elif arg == '--param' and parts and '=' in parts[0]:
+                name, value = parts.pop(0).split('=', 1)
+                params.setdefault(name, []).append(value)
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) >= 2:
+            return solr.explain_query(positional[0], ' '.join(positional[1:]), params)
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('explore ') or user_input.lower() == 'explore':
+        usage = "Usage: explore <collection> [--fq F]... [--fields a,b] [--top N] [--buckets N] [--limit N]"
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'filters': [], 'fields': None, 'top': 10, 'buckets': 12, 'limit': 8}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg == '--fq' and parts:
+                options['filters'].append(parts.pop(0))
+            elif arg == '--fields' and parts:
+                options['fields'] = [name.strip() for name in parts.pop(0).split(',') if name.strip()]
+            elif arg in ('--top', '--buckets', '--limit') and parts and parts[0].isdigit():
+                options[arg[2:]] = max(1, int(parts.pop(0)))
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) == 1:
+            return solr.explore_collection(positional[0], **options)
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('replay ') or user_input.lower() == 'replay':
+        usage = "Usage: replay <collection> <file> [--concurrency N] [--rate QPS] [--limit N] [--top N]"
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'concurrency': 4, 'rate': None, 'limit': None, 'top': 10}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg in ('--concurrency', '--limit', '--top') and parts and parts[0].isdigit():
+                options[arg[2:]] = max(1, int(parts.pop(0)))
+            elif arg == '--rate' and parts:
+                try:
+                    options['rate'] = float(parts.pop(0)) or None
+                except ValueError:
+                    valid = False
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) == 2:
+            return solr.replay_queries(positional[0], os.path.expanduser(positional[1]),
+                                       concurrency=options['concurrency'], rate=options['rate'],
+                                       limit=options['limit'], top=options['top'])
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('logs ') or user_input.lower() == 'logs':
+        usage = ("Usage: logs [file|dir|glob] [--since T] [--until T] [--collection C] [--bucket 15m] [--top N] "
+                 "[--workers N] [--rebuild]  (T: 'YYYY-MM-DD HH:MM' or 30m, 6h, 2d before the newest line)")
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'since': None, 'until': None, 'collection': None, 'bucket': None, 'top': 10, 'workers': None,
+                   'rebuild': False}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg in ('--since', '--until', '--collection') and parts:
+                options[arg[2:]] = parts.pop(0)
+            elif arg in ('--top', '--workers') and parts and parts[0].isdigit():
+                options[arg[2:]] = max(1, int(parts.pop(0)))
+            elif arg == '--bucket' and parts:
+                bucket = re.fullmatch(r'(\d+)([mh]?)', parts.pop(0))
+                if bucket and int(bucket.group(1)):
+                    options['bucket'] = int(bucket.group(1)) * (60 if bucket.group(2) == 'h' else 1)
+                else:
+                    valid = False
+            elif arg == '--rebuild':
+                options['rebuild'] = True
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) <= 1:
+            return solr.analyze_logs(os.path.expanduser(positional[0]) if positional else None, **options)
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('caches ') or user_input.lower() == 'caches':
+        usage = ("Usage: caches [collection|pattern] [--interval SECONDS] [--top N] "
+                 "[--warm <query file> [--apply]]  (--warm needs one collection)")
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'interval': 30.0, 'warm_file': None, 'apply': False, 'top': 20}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg == '--interval' and parts:
+                try:
+                    options['interval'] = max(0.0, float(parts.pop(0)))
+                except ValueError:
+                    valid = False
+            elif arg == '--top' and parts and parts[0].isdigit():
+                options['top'] = max(1, int(parts.pop(0)))
+            elif arg == '--warm' and parts:
+                options['warm_file'] = os.path.expanduser(parts.pop(0))
+            elif arg == '--apply':
+                options['apply'] = True
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if options['apply'] and not options['warm_file']:
+            valid = False
+        if valid and len(positional) <= 1 and (positional or not options['warm_file']):
+            return solr.cache_report(positional[0] if positional else None, **options)
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('export ') or user_input.lower() == 'export':
+        usage = "Usage: export <collection> <query> <file> [--fl a,b] [--format jsonl|csv|parquet] [--parallel N] [--resume]"
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'fl': None, 'format': None, 'parallel': 8, 'resume': False}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg in ('--fl', '--format') and parts:
+                options[arg[2:]] = parts.pop(0)
+            elif arg == '--parallel' and parts and parts[0].isdigit():
+                options['parallel'] = max(1, int(parts.pop(0)))
+            elif arg == '--resume':
+                options['resume'] = True
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) == 3:
+            return solr.export_collection(positional[0], positional[1], positional[2], fl=options['fl'],
+                                          fmt=options['format'], parallel=options['parallel'],
+                                          resume=options['resume'])
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('index ') or user_input.lower() == 'index':
+        usage = ("Usage: index <collection> <file> [--format jsonl|csv] [--batch N] [--workers N] "
+                 "[--commit-within MS] [--commit]")
+        try:
+            parts = shlex.split(user_input)[1:]
+        except ValueError:
+            parts = []
+        options = {'format': None, 'batch': 500, 'workers': 4, 'commit-within': 10000, 'commit': False}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg == '--format' and parts:
+                options['format'] = parts.pop(0)
+            elif arg in ('--batch', '--workers', '--commit-within') and parts and parts[0].isdigit():
+                options[arg[2:]] = max(1, int(parts.pop(0)))
+            elif arg == '--commit':
+                options['commit'] = True
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) == 2:
+            return solr.index_file(positional[0], positional[1], fmt=options['format'],
+                                   batch_size=options['batch'], workers=options['workers'],
+                                   commit_within=options['commit-within'], commit=options['commit'])
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('use ') or user_input.lower() == 'use':
+        parts = user_input.split()
+        if len(parts) == 2:
+            return solr.use_collection(parts[1])
+        else:
+            print("Usage: use <collection_name>")
+            return False
+    elif user_input.lower().startswith('ask ') or user_input.lower() == 'ask':
+        question = user_input[3:].strip()
+        if question:
+            return solr.ask(question)
+        else:
+            print("Usage: ask <question>")
+            return False
+    elif user_input.lower().startswith('cluster'):
+        parts = user_input.split()
+        if len(parts) == 1:
+            return solr.cluster_health()
+        elif len(parts) == 3 and parts[1] == '--sort' and parts[2] in ('heap', 'load', 'fd'):
+            return solr.cluster_health(sort_by=parts[2])
+        else:
+            print("Usage: cluster [--sort heap|load|fd]")
+            return False
+    elif user_input.lower().startswith('inventory'):
+        usage = (f"Usage: inventory [pattern] [--sort {'|'.join(SolrConnection.INVENTORY_SORTS)}] [--cores] "
+                 "[--unhealthy] [--limit N]")
+        parts = user_input.split()[1:]
+        options = {'sort': 'name', 'cores': False, 'unhealthy': False, 'limit': None}
+        patterns = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg == '--sort' and parts and parts[0] in SolrConnection.INVENTORY_SORTS:
+                options['sort'] = parts.pop(0)
+            elif arg == '--limit' and parts and parts[0].isdigit():
+                options['limit'] = max(1, int(parts.pop(0)))
+            elif arg in ('--cores', '--unhealthy'):
+                options[arg[2:]] = True
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                patterns.append(arg)
+        if valid and len(patterns) <= 1:
+            return solr.inventory(patterns[0] if patterns else None, sort_by=options['sort'], cores=options['cores'],
+                                  unhealthy=options['unhealthy'], limit=options['limit'])
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('watch ') or user_input.lower() == 'watch':
+        usage = "Usage: watch <collection> [--interval N] [--fields a,b] [--count N] [--since FIELD]"
+        parts = user_input.split()[1:]
+        options = {'interval': 10.0, 'fields': None, 'count': None, 'since': '_version_'}
+        positional = []
+        valid = True
+        while parts:
+            arg = parts.pop(0)
+            if arg == '--interval' and parts:
+                try:
+                    options['interval'] = max(1.0, float(parts.pop(0)))
+                except ValueError:
+                    valid = False
+            elif arg == '--count' and parts and parts[0].isdigit():
+                options['count'] = max(1, int(parts.pop(0)))
+            elif arg == '--fields' and parts:
+                options['fields'] = [f for f in parts.pop(0).split(',') if f]
+            elif arg == '--since' and parts:
+                options['since'] = parts.pop(0)
+            elif arg.startswith('--'):
+                valid = False
+            else:
+                positional.append(arg)
+        if valid and len(positional) == 1:
+            return solr.watch_collection(positional[0], interval=options['interval'], fields=options['fields'],
+                                         count=options['count'], marker=options['since'])
+        else:
+            print(usage)
+            return False
+    elif user_input.lower().startswith('monitor'):
+        parts = user_input.split()
+        if len(parts) == 1:
+            solr.show_monitor()
+        elif parts[1] == 'stop' and len(parts) == 2:
+            solr.stop_monitor()
+        elif parts[1] == 'start':
+            args = parts[2:]
+            interval = 5.0
+            if '--interval' in args:
+                index = args.index('--interval')
+                try:
+                    interval = max(0.5, float(args[index + 1]))
+                    del args[index:index + 2]
+                except (IndexError, ValueError):
+                    args = None
+            if args is None or len(args) > 1:
+                print("Usage: monitor start [collection] [--interval N]")
+                return False
+            else:
+                return solr.start_monitor(args[0] if args else None, interval)
+        else:
+            print("Usage: monitor [start [collection] [--interval N] | stop]")
+            return False
+    elif user_input.lower().startswith('refresh'):
+        parts = user_input.split()
+        if len(parts) <= 2:
+            return solr.refresh(parts[1] if len(parts) == 2 else None)
+        else:
+            print("Usage: refresh [collection_name]")
+            return False
+    elif user_input.lower() == 'timings':
+        solr.display_timings()
+    elif user_input.lower().startswith('stats'):
+        parts = user_input.split()
+        if len(parts) == 1:
+            solr.display_stats()
+        elif parts[1:] == ['reset']:
+            TRACER.reset()
+            print("Span statistics cleared\n")
+        else:
+            print("Usage: stats [reset]")
+            return False
+    elif user_input.lower().startswith('trace'):
+        parts = user_input.split(maxsplit=2)
+        if parts[1:] == ['on']:
+            TRACER.enable()
+            print(f"{Colors.GREEN}Tracing on{Colors.RESET}: HTTP calls, decoding, commands and rendering are timed\n")
+        elif parts[1:] == ['off']:
+            TRACER.disable()
+            print(f"{Colors.YELLOW}Tracing off{Colors.RESET} (collected statistics are kept)\n")
+        elif len(parts) == 3 and parts[1] == 'export':
+            try:
+                spans = TRACER.export_chrome(os.path.expanduser(parts[2]))
+            except OSError as e:
+                print(f"{Colors.RED}Could not write trace: {e}{Colors.RESET}")
+                return False
+            print(f"Wrote {spans} spans to {parts[2]} (open in chrome://tracing or ui.perfetto.dev)\n")
+        else:
+            print("Usage: trace on|off|export <file>")
+            return False
+    elif user_input.lower().startswith('summarize'):
+        parts = user_input.split()
+        engine = 'auto'
+        if len(parts) > 1 and parts[-1] in ('--server', '--sample'):
+            engine = parts.pop()[2:]
+        if len(parts) == 1:
+            collection_name = read_input("Enter collection name: ").strip()
+            if collection_name:
+                return solr.summarize_collection(collection_name, engine=engine)
+            else:
+                print("Invalid collection name")
+        elif len(parts) == 2:
+            collection_name = parts[1]
+            return solr.summarize_collection(collection_name, engine=engine)
+        else:
+            print("Usage: summarize [collection_name] [--server|--sample]")
+            return False
+    elif user_input and solr.connected and solr.current_collection:
+        return solr.ask(user_input)
+    elif user_input:
+        print(f"Unknown command: {user_input}")
+        return False
 
-def main():
-    """Main entry point"""
-    # Clear screen
-    print("\033[2J\033[H")
-    
-    # Display logo with animation
-    print_solr_logo()
-    print()
-    print_logo()
+def _settle(future: asyncio.Future, outcome: Tuple):
+    if not future.done():
+        future.set_result(outcome)
+
+class CommandRunner:
+    """Runs REPL commands as cancellable asyncio tasks.
     
-    # Show loading animation
-    animate_loading()
+    The HTTP layer is synchronous, so each command runs on its own thread and
+    the event loop supervises it. Ctrl-C and timeouts cancel the command's
+    CancelScope, which the transport checks before every request and clamps
+    socket timeouts to. Background jobs run alongside the foreground command.
+    """
     
-    # Print welcome message
-    print(f"\n{Colors.CYAN}{'═' * 72}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.WHITE}  Welcome to Apache Solr - Your Search and AI Assistant{Colors.RESET}")
-    print(f"{Colors.CYAN}{'═' * 72}{Colors.RESET}")
-    print(f"\n{Colors.GREEN}Ready to help with your Solr development tasks!{Colors.RESET}")
-    print(f"{Colors.YELLOW}Type 'help' for available commands{Colors.RESET}")
-    print(f"{Colors.BLUE}Happy searching and indexing!{Colors.RESET}\n")
+    def __init__(self, solr: SolrConnection):
+        self.solr = solr
+        self.jobs: Dict[int, Dict] = {}
+        self._next_job = 1
+        self._foreground: Optional[Dict] = None
+        self._input: Optional[asyncio.Future] = None
+        self._prompt: Optional[asyncio.Future] = None
     
-    # Initialize connection
-    solr = SolrConnection()
+    def _start(self, line: str, func, args: Tuple, timeout: Optional[float], interactive: bool = False) -> Dict:
+        loop = asyncio.get_running_loop()
+        scope = CancelScope(timeout)
+        context = contextvars.copy_context()
+        context.run(_current_scope.set, scope)
+        # Only the foreground command may prompt; a background job must not compete for stdin
+        context.run(_current_reader.set, functools.partial(self._command_input, loop, scope) if interactive
+                    else self._no_input)
+        future = loop.create_future()
+        
+        def target():
+            # Exceptions travel as values: a KeyboardInterrupt set on an asyncio
+            # future would escape the event loop
+            try:
+                with TRACER.span('command', word):
+                    outcome = (context.run(func, *args), None)
+            except BaseException as e:
+                outcome = (None, e)
+            loop.call_soon_threadsafe(_settle, future, outcome)
+        
+        word = line.split(maxsplit=1)[0].lower() if line.strip() else ''
+        thread = threading.Thread(target=target, name='solr-command', daemon=True)
+        watchdog = loop.call_later(timeout, scope.cancel, f'timed out after {timeout:g}s') if timeout else None
+        return {'line': line, 'scope': scope, 'future': future, 'watchdog': watchdog, 'thread': thread,
+                'started': time.perf_counter()}
     
-    # Prompt for connection
-    print(f"{Colors.CYAN}Let's connect to your Apache Solr instance!{Colors.RESET}")
-    print(f"{Colors.WHITE}Please enter your Solr URL (e.g., http://127.0.0.1:8983 or just 127.0.0.1:8983):{Colors.RESET}")
+    def _finish(self, job: Dict, label: str = ''):
+        if job['watchdog'] is not None:
+            job['watchdog'].cancel()
+        result, error = job['future'].result()
+        elapsed = format_duration(time.perf_counter() - job['started'])
+        if isinstance(error, CommandCancelled):
+            message = str(error).capitalize()
+            if 'after' not in message:
+                message += f" after {elapsed}"
+            print(f"\n{Colors.YELLOW}{label}{message}{Colors.RESET}")
+        elif isinstance(error, (KeyboardInterrupt, EOFError)):
+            print(f"\n{Colors.YELLOW}{label}Cancelled{Colors.RESET}")
+        elif error is not None:
+            print(f"\n{Colors.RED}{label}Command failed: {error}{Colors.RESET}")
+        elif job['scope'].reason:
+            print(f"\n{Colors.YELLOW}{label}Stopped ({job['scope'].reason}) after {elapsed}{Colors.RESET}")
+        elif label:
+            print(f"\n{Colors.GREEN}{label}Finished in {elapsed}{Colors.RESET}")
+        return result
     
-    while True:
+    async def run_foreground(self, line: str, func, args: Tuple, timeout: Optional[float]):
+        """Run a command and wait for it; Ctrl-C cancels it, a second Ctrl-C stops waiting"""
+        job = self._start(line, func, args, timeout, interactive=True)
+        job['thread'].start()
+        job['detach'] = asyncio.Event()
+        self._foreground = job
+        detach = asyncio.ensure_future(job['detach'].wait())
         try:
-            solr_url = input(f"{Colors.ORANGE}Solr URL{Colors.RESET} {Colors.GREEN}>{Colors.RESET} ").strip()
-            
-            if not solr_url:
-                print(f"{Colors.YELLOW}Please enter a Solr URL to continue, or type 'skip' to continue without connection.{Colors.RESET}")
-                continue
-            elif solr_url.lower() == 'skip':
-                print(f"{Colors.YELLOW}Skipping Solr connection. You can connect later using the 'connect' command.{Colors.RESET}\n")
+            await asyncio.wait({job['future'], detach}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            detach.cancel()
+            self._foreground = None
+        
+        if not job['future'].done():
+            job_id = self._add_job(job)
+            print(f"\n{Colors.YELLOW}[{job_id}] still stopping; moved to the background{Colors.RESET}")
+            return None
+        return self._finish(job)
+    
+    def start_background(self, line: str, timeout: Optional[float]):
+        parts = line.split()
+        if not parts or parts[0].lower() not in BACKGROUND_COMMANDS or len(parts) < 2:
+            print(f"Usage: bg <command> <args...>  (commands: {', '.join(BACKGROUND_COMMANDS)})")
+            return
+        job = self._start(line, run_command, (self.solr, line), timeout)
+        job_id = self._add_job(job)
+        print(f"{Colors.CYAN}[{job_id}] started: {line}{Colors.RESET}")
+        job['thread'].start()
+    
+    def _add_job(self, job: Dict) -> int:
+        job_id = self._next_job
+        self._next_job += 1
+        self.jobs[job_id] = job
+        
+        def done(_):
+            self.jobs.pop(job_id, None)
+            self._finish(job, label=f"[{job_id}] {job['line']}: ")
+        
+        job['future'].add_done_callback(done)
+        return job_id
+    
+    def show_jobs(self):
+        if not self.jobs:
+            print("No background jobs\n")
+            return
+        print(f"\n{Colors.CYAN}Background jobs:{Colors.RESET}")
+        for job_id, job in sorted(self.jobs.items()):
+            state = 'cancelling' if job['scope'].reason else 'running'
+            elapsed = format_duration(time.perf_counter() - job['started'])
+            print(f"  [{job_id}] {state:<10} {elapsed:>8}  {job['line']}")
+        print()
+    
+    def cancel_job(self, job_id: int):
+        job = self.jobs.get(job_id)
+        if job is None:
+            print(f"No such job: {job_id}")
+            return
+        job['scope'].cancel()
+        print(f"{Colors.YELLOW}[{job_id}] cancelling{Colors.RESET}")
+    
+    def cancel_all(self):
+        for job in self.jobs.values():
+            job['scope'].cancel()
+    
+    def interrupt(self):
+        """SIGINT handler: cancel the foreground command, or interrupt the prompt"""
+        job = self._foreground
+        if job is not None:
+            if job['scope'].reason is None:
+                job['scope'].cancel()
+                print(f"\n{Colors.YELLOW}Cancelling... (Ctrl-C again to stop waiting){Colors.RESET}")
+            else:
+                job['detach'].set()
+        elif self._prompt is not None and not self._prompt.done():
+            self._prompt.set_result(None)
+    
+    def _command_input(self, loop, scope: CancelScope, prompt: str) -> str:
+        """Prompt reader for the foreground command, run on its thread; the line
+        is read by read_line, so there is only ever one stdin reader"""
+        future = asyncio.run_coroutine_threadsafe(self.read_line(prompt), loop)
+        while True:
+            try:
+                line = future.result(timeout=0.1)
                 break
+            except FutureTimeoutError:
+                if scope.reason is None and (scope.remaining() is None or scope.remaining() > 0):
+                    continue
+                # Abandon the prompt; its stdin reader is picked up by the next read_line
+                future.cancel()
+                scope.check()
+                raise CommandCancelled(scope.reason)
+        if line is None:
+            raise KeyboardInterrupt()
+        return line
+    
+    @staticmethod
+    def _no_input(prompt: str) -> str:
+        raise EOFError('background jobs cannot read input')
+    
+    async def read_line(self, prompt: str) -> Optional[str]:
+        """Read a line without blocking the loop; None means Ctrl-C at the prompt"""
+        loop = asyncio.get_running_loop()
+        if self._input is None:
+            self._input = future = loop.create_future()
+            
+            def target():
+                try:
+                    outcome = (input(prompt), None)
+                except BaseException as e:
+                    outcome = (None, e)
+                loop.call_soon_threadsafe(_settle, future, outcome)
+            
+            threading.Thread(target=target, name='solr-input', daemon=True).start()
+        else:
+            # A reader abandoned by an earlier Ctrl-C is still waiting on stdin
+            print(prompt, end="", flush=True)
+        
+        self._prompt = loop.create_future()
+        try:
+            await asyncio.wait({self._input, self._prompt}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._prompt = None
+        if not self._input.done():
+            return None
+        line, error = self._input.result()
+        self._input = None
+        if error is not None:
+            raise EOFError() if isinstance(error, EOFError) else error
+        return line
+    
+    async def dispatch(self, line: str):
+        line, timeout = self._split_timeout(line)
+        parts = line.split(maxsplit=1)
+        word = parts[0].lower() if parts else ''
+        if word == 'bg':
+            rest = parts[1] if len(parts) > 1 else ''
+            command = rest.split()[0].lower() if rest else ''
+            self.start_background(rest, timeout if timeout != -1 else COMMAND_TIMEOUTS.get(command))
+        elif word == 'jobs':
+            self.show_jobs()
+        elif word == 'cancel':
+            if len(parts) == 2 and parts[1].strip().isdigit():
+                self.cancel_job(int(parts[1]))
             else:
-                if solr.connect(solr_url):
-                    break
-                else:
-                    print(f"{Colors.YELLOW}Would you like to try a different URL? Or type 'skip' to continue without connection.{Colors.RESET}")
-                    
-        except KeyboardInterrupt:
+                print("Usage: cancel <job>")
+        elif line:
+            await self.run_foreground(line, run_command, (self.solr, line),
+                                      timeout if timeout != -1 else COMMAND_TIMEOUTS.get(word))
+    
+    @staticmethod
+    def _split_timeout(line: str) -> Tuple[str, Optional[float]]:
+        """Strip a '--timeout N' option; -1 means not given, None (from 0) means no limit"""
+        match = re.search(r'\s--timeout\s+(\d+(?:\.\d+)?)\b', line)
+        if not match:
+            return line, -1
+        seconds = float(match.group(1))
+        return (line[:match.start()] + line[match.end():]).strip(), seconds or None
+
+async def repl(solr: SolrConnection, url: Optional[str] = None):
+    """Connection prompt and command loop, run on the event loop"""
+    runner = CommandRunner(solr)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, runner.interrupt)
+    except (NotImplementedError, RuntimeError):
+        # No loop signal handlers (e.g. Windows): Ctrl-C exits as before
+        pass
+    
+    connected = bool(url) and await runner.run_foreground('connect', solr.connect, (url,), COMMAND_TIMEOUTS['connect'])
+    
+    # Prompt for connection
+    if not connected:
+        print(f"{Colors.CYAN}Let's connect to your Apache Solr instance!{Colors.RESET}")
+        print(f"{Colors.WHITE}Please enter your Solr URL (e.g., http://127.0.0.1:8983 or just 127.0.0.1:8983):{Colors.RESET}")
+    
+    while not connected:
+        try:
+            solr_url = await runner.read_line(f"{Colors.ORANGE}Solr URL{Colors.RESET} {Colors.GREEN}>{Colors.RESET} ")
+        except EOFError:
+            return
+        if solr_url is None:
             print(f"\n{Colors.YELLOW}Skipping connection...{Colors.RESET}\n")
             break
+        solr_url = solr_url.strip()
+        
+        if not solr_url:
+            print(f"{Colors.YELLOW}Please enter a Solr URL to continue, or type 'skip' to continue without connection.{Colors.RESET}")
+        elif solr_url.lower() == 'skip':
+            print(f"{Colors.YELLOW}Skipping Solr connection. You can connect later using the 'connect' command.{Colors.RESET}\n")
+            break
+        elif await runner.run_foreground('connect', solr.connect, (solr_url,), COMMAND_TIMEOUTS['connect']):
+            break
+        else:
+            print(f"{Colors.YELLOW}Would you like to try a different URL? Or type 'skip' to continue without connection.{Colors.RESET}")
     
     # Main loop
     while True:
+        status_indicator = "+" if solr.connected else "-"
+        if solr.current_collection:
+            status_indicator += f" {Colors.CYAN}[{solr.current_collection}]{Colors.RESET}"
         try:
-            status_indicator = "+" if solr.connected else "-"
-            user_input = input(f"{Colors.ORANGE}solr-assistant{Colors.RESET} {status_indicator} {Colors.GREEN}>{Colors.RESET} ").strip()
-            
-            if user_input.lower() in ['exit', 'quit', 'q']:
-                if solr.connected:
-                    solr.disconnect()
-                print(f"\n{Colors.YELLOW}Goodbye! Thanks for using Solr Assistant!{Colors.RESET}")
-                break
-            elif user_input.lower() == 'help':
-                print(f"\n{Colors.CYAN}Available Commands:{Colors.RESET}")
-                print(f"  {Colors.GREEN}help{Colors.RESET}             - Show this help message")
-                print(f"  {Colors.GREEN}connect{Colors.RESET}          - Connect to a Solr instance")
-                print(f"  {Colors.GREEN}disconnect{Colors.RESET}       - Disconnect from current Solr instance")
-                print(f"  {Colors.GREEN}status{Colors.RESET}           - Show connection status")
-                print(f"  {Colors.GREEN}info{Colors.RESET}             - Show detailed Solr information")
-                print(f"  {Colors.GREEN}collections{Colors.RESET}      - Show all collections/cores")
-                print(f"  {Colors.GREEN}summarize{Colors.RESET}        - Analyze and summarize a collection")
-                print(f"  {Colors.GREEN}clear{Colors.RESET}            - Clear the screen")
-                print(f"  {Colors.GREEN}exit{Colors.RESET}             - Exit Solr Assistant")
-                print(f"\n{Colors.YELLOW}More Solr features coming soon!{Colors.RESET}\n")
-            elif user_input.lower() == 'clear':
-                print("\033[2J\033[H")
-                print_solr_logo()
-                print()
-                print_logo()
-                print(f"\n{Colors.CYAN}{'═' * 72}{Colors.RESET}")
-                print(f"{Colors.BOLD}{Colors.WHITE}  Welcome to Apache Solr - Your Search and AI Assistant{Colors.RESET}")
-                print(f"{Colors.CYAN}{'═' * 72}{Colors.RESET}\n")
-            elif user_input.lower() == 'connect':
-                solr_url = input("Enter Solr URL: ").strip()
-                if solr_url:
-                    solr.connect(solr_url)
-                else:
-                    print("Invalid URL")
-            elif user_input.lower() == 'disconnect':
-                if solr.connected:
-                    solr.disconnect()
-                else:
-                    print("Not connected")
-            elif user_input.lower() == 'status':
-                print(f"Status: {solr.get_status()}\n")
-            elif user_input.lower() == 'info':
-                if solr.connected:
-                    solr._display_info()
-                else:
-                    print("Not connected. Use 'connect' command first.")
-            elif user_input.lower() == 'collections':
-                solr.list_collections()
-            elif user_input.lower().startswith('summarize'):
-                parts = user_input.split()
-                if len(parts) == 1:
-                    collection_name = input("Enter collection name: ").strip()
-                    if collection_name:
-                        solr.summarize_collection(collection_name)
-                    else:
-                        print("Invalid collection name")
-                elif len(parts) == 2:
-                    collection_name = parts[1]
-                    solr.summarize_collection(collection_name)
-                else:
-                    print("Usage: summarize [collection_name]")
-            elif user_input:
-                print(f"Unknown command: {user_input}")
-                
-        except KeyboardInterrupt:
+            user_input = await runner.read_line(f"{Colors.ORANGE}solr-assistant{Colors.RESET} {status_indicator} {Colors.GREEN}>{Colors.RESET} ")
+        except EOFError:
+            break
+        if user_input is None:
             print("\nGoodbye")
             break
-        except EOFError:
+        user_input = user_input.strip()
+        
+        if user_input.lower() in ['exit', 'quit', 'q']:
+            runner.cancel_all()
+            if solr.connected:
+                solr.disconnect()
+            print(f"\n{Colors.YELLOW}Goodbye! Thanks for using Solr Assistant!{Colors.RESET}")
             break
+        await runner.dispatch(user_input)
+    
+    runner.cancel_all()
+
+def parse_args(argv: Optional[List[str]] = None):
+    """Parse command-line options; anything after the options is a command to run non-interactively"""
+    parser = argparse.ArgumentParser(
+        prog='solr-assistant',
+        description="Apache Solr assistant. Without a command it starts the interactive shell; "
+                    "with one (e.g. 'summarize books --json') it runs it and exits.",
+    )
+    parser.add_argument('--url', default=os.environ.get('SOLR_ASSISTANT_URL'),
+                        help='Solr URL (default: $SOLR_ASSISTANT_URL)')
+    parser.add_argument('--json', action='store_true', help='print the command result as JSON')
+    parser.add_argument('--timeout', type=float, help='limit the command to N seconds (0 for no limit)')
+    parser.add_argument('--no-banner', action='store_true', help='skip the logo and loading animation')
+    parser.add_argument('--trace', metavar='FILE', help='record spans and write a Chrome trace file on exit')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='command to run, as typed in the shell')
+    args = parser.parse_args(argv)
+    if args.trace:
+        TRACER.enable()
+    
+    # --json and --timeout may also follow the command
+    command = []
+    words = list(args.command)
+    while words:
+        word = words.pop(0)
+        if word == '--json':
+            args.json = True
+        elif word == '--timeout' and words:
+            try:
+                args.timeout = float(words.pop(0))
+            except ValueError:
+                parser.error('--timeout expects a number of seconds')
+        else:
+            command.append(word)
+    args.command = shlex.join(command) if command else None
+    return args
+
+def run_cli(args) -> int:
+    """Run a single command non-interactively and return the exit status"""
+    if not args.url:
+        print("solr-assistant: --url or SOLR_ASSISTANT_URL is required to run a command", file=sys.stderr)
+        return 2
+    
+    word = args.command.split()[0].lower()
+    timeout = args.timeout if args.timeout is not None else COMMAND_TIMEOUTS.get(word)
+    _current_scope.set(CancelScope(timeout or None))
+    
+    solr = SolrConnection()
+    result_stream = sys.stdout
+    ok = False
+    try:
+        # With --json, human-readable output goes to stderr so stdout stays parseable
+        with redirect_stdout(sys.stderr) if args.json else nullcontext():
+            try:
+                with TRACER.span('command', 'connect'):
+                    ok = solr.connect(args.url, quiet=True)
+                with TRACER.span('command', word):
+                    ok = ok and run_command(solr, args.command) is not False
+            except CommandCancelled as e:
+                ok = False
+                print(f"{Colors.RED}{str(e).capitalize()}{Colors.RESET}")
+            except EOFError:
+                ok = False
+                print(f"{Colors.RED}'{word}' needs interactive input{Colors.RESET}")
+    finally:
+        if solr.monitor is not None:
+            solr.monitor.stop()
+        solr.transport.close()
+    
+    if args.trace:
+        spans = TRACER.export_chrome(args.trace)
+        print(f"Wrote {spans} spans to {args.trace}", file=sys.stderr)
+    if args.json:
+        json.dump({'command': args.command, 'ok': ok, 'result': solr.last_result},
+                  result_stream, indent=2, default=str)
+        result_stream.write('\n')
+    return 0 if ok else 1
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point"""
+    args = parse_args(argv)
+    if args.command:
+        sys.exit(run_cli(args))
+    
+    if not args.no_banner:
+        # Clear screen
+        print("\033[2J\033[H")
+        
+        # Display logo with animation
+        print_solr_logo()
+        print()
+        print_logo()
+        
+        # Show loading animation
+        animate_loading()
+    
+    # Print welcome message
+    print(f"\n{Colors.CYAN}{'═' * 72}{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.WHITE}  Welcome to Apache Solr - Your Search and AI Assistant{Colors.RESET}")
+    print(f"{Colors.CYAN}{'═' * 72}{Colors.RESET}")
+    print(f"\n{Colors.GREEN}Ready to help with your Solr development tasks!{Colors.RESET}")
+    print(f"{Colors.YELLOW}Type 'help' for available commands{Colors.RESET}")
+    print(f"{Colors.BLUE}Happy searching and indexing!{Colors.RESET}\n")
+    
+    # Initialize connection
+    solr = SolrConnection()
+    
+    try:
+        asyncio.run(repl(solr, args.url))
+    except KeyboardInterrupt:
+        print("\nGoodbye")
+    if args.trace:
+        print(f"Wrote {TRACER.export_chrome(args.trace)} spans to {args.trace}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file